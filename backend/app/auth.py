@@ -1,17 +1,21 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app import models, schemas
+from app.database import get_db, get_async_db
+from app import models, schemas, statements
 import os
+import hashlib
+import secrets
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -58,46 +62,124 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage/lookup.
+
+    Refresh tokens are 256-bit random strings, so a plain SHA-256 is enough
+    (no salt, no bcrypt) and doubles as the unique lookup index.
+    """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite trả về datetime naive, PostgreSQL trả về datetime có timezone
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def create_refresh_token(db: Session, user_id: int) -> Tuple[str, models.RefreshToken]:
+    """Create and persist a new refresh token, returns (raw_token, db_token)"""
+    raw_token = secrets.token_urlsafe(32)
+    db_token = models.RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(raw_token),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    db.add(db_token)
+    db.flush()
+    return raw_token, db_token
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """Revoke every active refresh token of a user (logout everywhere, password change)"""
+    return db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.revoked_at.is_(None)
+    ).update({"revoked_at": datetime.now(timezone.utc)}, synchronize_session=False)
+
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """Revoke a single refresh token, returns False if it does not exist"""
+    db_token = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == hash_refresh_token(token)
+    ).first()
+    if not db_token:
+        return False
+    if db_token.revoked_at is None:
+        db_token.revoked_at = datetime.now(timezone.utc)
+    return True
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[Tuple[models.User, str]]:
+    """Exchange a refresh token for a new one (rotation).
+
+    Returns (user, new_raw_token) or None if the token is unknown, expired or
+    revoked. Presenting an already-rotated token is treated as token theft:
+    every refresh token of that user is revoked.
+    """
+    db_token = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == hash_refresh_token(token)
+    ).first()
+    if not db_token:
+        return None
+    
+    now = datetime.now(timezone.utc)
+    if db_token.revoked_at is not None:
+        if db_token.replaced_by_id is not None:
+            print(f"⚠️  Refresh token reuse detected for user_id={db_token.user_id}, revoking all tokens")
+            revoke_user_refresh_tokens(db, db_token.user_id)
+            db.commit()
+        return None
+    if _as_utc(db_token.expires_at) <= now:
+        return None
+    
+    user = db.query(models.User).filter(models.User.id == db_token.user_id).first()
+    if not user or not user.is_active:
+        return None
+    
+    new_raw_token, new_db_token = create_refresh_token(db, user.id)
+    db_token.revoked_at = now
+    db_token.replaced_by_id = new_db_token.id
+    return user, new_raw_token
+
 def get_user_by_username(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
+    return db.execute(statements.USER_BY_USERNAME, {"username": username}).scalars().first()
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 def authenticate_user(db: Session, username: str, password: str):
     user = get_user_by_username(db, username)
-    if not user:
+    # User đã soft-delete (đang chờ purge, app/purge.py) coi như không tồn tại
+    if not user or user.deleted_at is not None:
         return False
     if not verify_password(password, user.hashed_password):
         return False
     return user
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_username(token: str) -> str:
+    """Decode the access token and return its subject (username)"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
-            print(f"❌ Token validation failed: username not found in payload")
-            raise credentials_exception
     except JWTError as e:
         print(f"❌ JWT Error: {str(e)}")
-        raise credentials_exception
+        raise _credentials_exception()
     except Exception as e:
         print(f"❌ Unexpected error decoding token: {str(e)}")
-        raise credentials_exception
-    
-    user = get_user_by_username(db, username=username)
+        raise _credentials_exception()
+    if username is None:
+        print(f"❌ Token validation failed: username not found in payload")
+        raise _credentials_exception()
+    return username
+
+def _check_user(user: Optional[models.User], username: str) -> models.User:
     if user is None:
         print(f"❌ User not found: {username}")
-        raise credentials_exception
+        raise _credentials_exception()
     if not user.is_active:
         print(f"❌ User account is inactive: {username}")
         raise HTTPException(
@@ -106,3 +188,20 @@ async def get_current_user(
         )
     return user
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    # Sync dependency: FastAPI chạy trong threadpool, không block event loop
+    username = _decode_username(token)
+    user = get_user_by_username(db, username=username)
+    return _check_user(user, username)
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Same as get_current_user, for routers using the async session"""
+    username = _decode_username(token)
+    user = (await db.execute(statements.USER_BY_USERNAME, {"username": username})).scalars().first()
+    return _check_user(user, username)
@@ -0,0 +1,96 @@
+"""
+Compact response formats for card lists, chosen by the Accept header
+
+- application/json (default): the usual list of card objects
+- application/vnd.flashcards.columnar+json: one array per field instead of one object per card
+
+      {"count": 2, "id": [1, 2], "set_id": [7, 7], "front": [...], "back": [...],
+       "position": [1, 2], "created_at": ["2026-10-19T08:07:29", ...]}
+
+- application/msgpack (or application/x-msgpack): the same columnar payload in MessagePack
+
+GET /api/flashcards/sets/{id}/cards returns the columnar payload itself;
+GET /api/flashcards/sets/{id} returns the set fields with `flashcards` in columnar form.
+
+The compact forms read plain column tuples (statements.CARD_COLUMNS_OF_SET) and
+encode them with orjson / msgpack: no ORM object and no Pydantic model per card.
+Both encoders are optional at import: without orjson the stdlib json is used,
+without msgpack the MessagePack format is not offered and clients get JSON.
+bench_card_formats.py compares payload size and serialization time.
+"""
+import json
+from typing import Any, Dict
+
+from fastapi import Request, Response
+
+from app import statements
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+COLUMNAR = "columnar"
+MSGPACK = "msgpack"
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.flashcards.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Accept media type -> format
+FORMATS = {
+    "application/json": JSON,
+    COLUMNAR_MEDIA_TYPE: COLUMNAR,
+}
+if msgpack is not None:
+    FORMATS["application/msgpack"] = MSGPACK
+    FORMATS["application/x-msgpack"] = MSGPACK
+
+def negotiate(request: Request, response: Response) -> str:
+    """Format with the highest q in Accept among the supported ones, JSON by default"""
+    response.headers["Vary"] = "Accept"
+    best, best_q = JSON, 0.0
+    for item in request.headers.get("accept", "").split(","):
+        media_type, _, params = item.partition(";")
+        fmt = FORMATS.get(media_type.strip().lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+def card_columns(db, set_id: int) -> Dict[str, Any]:
+    """Cards of a set as parallel arrays, in CARDS_OF_SET order"""
+    result = db.execute(statements.CARD_COLUMNS_OF_SET, {"set_id": set_id})
+    fields = list(result.keys())
+    rows = result.all()
+    columns = {field: list(values) for field, values in zip(fields, zip(*rows))} if rows else {field: [] for field in fields}
+    # MessagePack không có kiểu datetime: dùng chuỗi ISO như bản JSON
+    columns["created_at"] = [value.isoformat() if value is not None else None for value in columns["created_at"]]
+    return {"count": len(rows), **columns}
+
+def encode(fmt: str, content: Any) -> bytes:
+    if fmt == MSGPACK:
+        return msgpack.packb(content, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+def render(fmt: str, content: Any, response: Response) -> Response:
+    """Encoded response, keeping the headers already set on the injected response (ETag, Vary)"""
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    media_type = {MSGPACK: MSGPACK_MEDIA_TYPE, COLUMNAR: COLUMNAR_MEDIA_TYPE}.get(fmt, "application/json")
+    return Response(content=encode(fmt, content), media_type=media_type, headers=headers)
@@ -0,0 +1,139 @@
+"""
+In-process cache of the public catalog: approved public sets of all users
+
+GET /api/flashcards/sets ("My Decks") used to run one OR query per request
+(own sets + is_public AND approved sets of everyone else, joined with owners).
+The catalog part is the same for every user and only changes when a set is
+approved/rejected, edited, deleted or created already approved, so it is kept
+here pre-serialized (JSON-ready dicts sorted by id) and each request only
+queries the user's own sets, then merges both by id:
+
+    catalog = public_catalog(db)
+    page, next_cursor = merge_page(own_sets, catalog, current_user.id, after_id, limit)
+
+Per-user and fast-changing fields (card_count, last_studied_at) are not cached:
+they are loaded for the catalog sets of the page only (fill_stats).
+
+Writers call invalidate_catalog() after committing. The cache is per process:
+with several workers another worker may serve the old catalog for up to
+CATALOG_CACHE_SECONDS.
+"""
+import bisect
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app import models, statements
+from app.pagination import encode_cursor
+from app.schemas import FlashcardSetResponse
+
+CATALOG_CACHE_SECONDS = float(os.getenv("CATALOG_CACHE_SECONDS", "300"))
+
+# Không cache: đổi theo user / mỗi khi thêm bớt thẻ
+PER_REQUEST_FIELDS = {"card_count", "last_studied_at"}
+
+class Catalog:
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+        self.ids = [entry["id"] for entry in entries]
+        self.per_owner = Counter(entry["owner_id"] for entry in entries)
+
+    def visible_count(self, user_id: int) -> int:
+        """Catalog sets not owned by user_id (own sets are listed separately)"""
+        return len(self.entries) - self.per_owner.get(user_id, 0)
+
+    def after(self, after_id: int, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        """First `limit` entries with id > after_id not owned by user_id"""
+        result = []
+        for entry in self.entries[bisect.bisect_right(self.ids, after_id):]:
+            if entry["owner_id"] != user_id:
+                result.append(entry)
+                if len(result) >= limit:
+                    break
+        return result
+
+_catalog: Optional[Tuple[Catalog, float]] = None
+_generation = 0
+_lock = threading.Lock()
+
+def load_catalog(db) -> Catalog:
+    rows = db.execute(
+        select(
+            models.FlashcardSet.id, models.FlashcardSet.title, models.FlashcardSet.description,
+            models.FlashcardSet.is_public, models.FlashcardSet.owner_id, models.FlashcardSet.status,
+            models.FlashcardSet.created_at, models.FlashcardSet.updated_at,
+            models.User.username.label("owner_username"),
+        )
+        .outerjoin(models.User, models.User.id == models.FlashcardSet.owner_id)
+        .where(
+            models.FlashcardSet.is_public == True, models.FlashcardSet.status == 'approved',
+            models.FlashcardSet.deleted_at.is_(None)
+        )
+        .order_by(models.FlashcardSet.id)
+    ).mappings().all()
+    return Catalog([
+        FlashcardSetResponse.model_validate(dict(row)).model_dump(mode="json", exclude=PER_REQUEST_FIELDS)
+        for row in rows
+    ])
+
+def public_catalog(db) -> Catalog:
+    """Cached catalog, loaded with `db` when missing or older than CATALOG_CACHE_SECONDS"""
+    global _catalog
+    cached = _catalog
+    now = time.monotonic()
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    generation = _generation
+    catalog = load_catalog(db)
+    with _lock:
+        # Bị invalidate trong lúc đang load: dùng kết quả cho request này nhưng không lưu
+        if generation == _generation:
+            _catalog = (catalog, now + CATALOG_CACHE_SECONDS)
+    return catalog
+
+def invalidate_catalog():
+    global _catalog, _generation
+    with _lock:
+        _catalog = None
+        _generation += 1
+
+def fill_stats(db, entries: List[Dict[str, Any]], user_id: int) -> List[Dict[str, Any]]:
+    """Copies of catalog entries with card_count and the user's last_studied_at (one query)"""
+    if not entries:
+        return []
+    stats = {
+        row.id: row
+        for row in db.execute(
+            select(
+                models.FlashcardSet.id, statements.card_count_column(), statements.last_studied_column(user_id)
+            ).where(models.FlashcardSet.id.in_([entry["id"] for entry in entries]))
+        )
+    }
+    filled = []
+    for entry in entries:
+        row = stats.get(entry["id"])
+        last_studied = row.last_studied_at if row is not None else None
+        filled.append({
+            **entry,
+            "card_count": row.card_count if row is not None else 0,
+            "last_studied_at": last_studied.isoformat() if last_studied is not None else None,
+        })
+    return filled
+
+def merge_page(
+    own: List[Dict[str, Any]], catalog: Catalog, user_id: int, after_id: int, limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Merge the user's own sets (id > after_id, ascending, up to limit + 1 of them) with the
+    catalog into one page ordered by id. Returns (page, next_cursor); catalog entries of the
+    page still lack card_count / last_studied_at (fill_stats)."""
+    merged = sorted(own + catalog.after(after_id, user_id, limit + 1), key=lambda entry: entry["id"])
+    next_cursor = None
+    if len(merged) > limit:
+        merged = merged[:limit]
+        last_id = merged[-1]["id"]
+        next_cursor = encode_cursor(last_id, last_id)
+    return merged, next_cursor
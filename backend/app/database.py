@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from jose import JWTError, jwt
+from typing import Dict, Optional
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,20 +14,65 @@ load_dotenv()
 # Database URL - use PostgreSQL in production, SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./flashcard_app.db")
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
+# SQLite tuning profile - áp dụng cho mỗi connection mới (SQLITE_TUNING=false để tắt)
+# WAL cho phép đọc song song với ghi, synchronous=NORMAL bỏ fsync mỗi commit (an toàn với WAL),
+# busy_timeout để writer chờ lock thay vì lỗi "database is locked" ngay lập tức
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() in ("true", "1", "yes")
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),  # bytes
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-64000")),  # negative = KiB (~64MB)
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# Compiled cache của SQLAlchemy (mỗi engine): số câu SQL đã compile được giữ lại.
+# Mặc định của SQLAlchemy là 500; app có vài trăm statement khác nhau (mỗi biến thể
+# filter/option là một entry) nên để dư để không bị đẩy ra khỏi cache (SQL_COMPILED_CACHE_SIZE=0 để tắt)
+SQL_COMPILED_CACHE_SIZE = int(os.getenv("SQL_COMPILED_CACHE_SIZE", "1200"))
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Connect-event hook, always on (không phụ thuộc SQLITE_TUNING): SQLite chỉ kiểm tra
+    foreign key và chạy ON DELETE CASCADE khi bật pragma này - xóa bộ thẻ / user dựa vào nó (app/purge.py)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Connect-event hook applying SQLITE_PRAGMAS to a new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def create_db_engine(url: str):
+    """Build a sync engine for url (SQLite with tuning pragmas, or pooled PostgreSQL)"""
+    if url.startswith("sqlite"):
+        db_engine = create_engine(
+            url, connect_args={"check_same_thread": False},
+            query_cache_size=SQL_COMPILED_CACHE_SIZE
+        )
+        event.listen(db_engine, "connect", enable_sqlite_foreign_keys)
+        if SQLITE_TUNING:
+            event.listen(db_engine, "connect", apply_sqlite_pragmas)
+        return db_engine
     # PostgreSQL connection với connection pooling cho server
-    engine = create_engine(
-        DATABASE_URL,
+    return create_engine(
+        url,
         pool_size=10,
         max_overflow=20,
         pool_pre_ping=True,  # Kiểm tra kết nối trước khi dùng
+        query_cache_size=SQL_COMPILED_CACHE_SIZE,
         echo=False  # Set True để debug SQL queries
     )
 
+engine = create_db_engine(DATABASE_URL)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -34,3 +84,196 @@ def get_db():
     finally:
         db.close()
 
+# Async mode (tùy chọn): DATABASE_ASYNC=true dùng asyncpg (PostgreSQL) / aiosqlite (SQLite)
+# cho các router đã port sang async (study, leaderboard, notifications)
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("true", "1", "yes")
+
+def get_async_database_url(url: str) -> str:
+    """Convert a sync DATABASE_URL to its async driver equivalent"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            # asyncpg dùng tham số ssl thay vì sslmode
+            return url.replace(prefix, "postgresql+asyncpg://", 1).replace("sslmode=", "ssl=")
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+
+def create_async_db_engine(url: str):
+    """Build an async engine for a sync-style url (see get_async_database_url)"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    
+    async_url = get_async_database_url(url)
+    if url.startswith("sqlite"):
+        db_engine = create_async_engine(async_url, query_cache_size=SQL_COMPILED_CACHE_SIZE)
+        event.listen(db_engine.sync_engine, "connect", enable_sqlite_foreign_keys)
+        if SQLITE_TUNING:
+            event.listen(db_engine.sync_engine, "connect", apply_sqlite_pragmas)
+        return db_engine
+    return create_async_engine(
+        async_url,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        query_cache_size=SQL_COMPILED_CACHE_SIZE
+    )
+
+def _async_sessionmaker(db_engine):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+    # expire_on_commit=False: tránh lazy load ngầm (không được phép với AsyncSession)
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+if DATABASE_ASYNC:
+    async_engine = create_async_db_engine(DATABASE_URL)
+    AsyncSessionLocal = _async_sessionmaker(async_engine)
+
+class SyncSessionAdapter:
+    """Expose a sync Session through the AsyncSession API.
+
+    Used by the async routers when DATABASE_ASYNC is off: every awaited call
+    runs in Starlette's threadpool, so the same handler code works in both modes.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+async def get_async_db():
+    """Async session dependency: AsyncSession in async mode, SyncSessionAdapter otherwise"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        db = SyncSessionAdapter(SessionLocal(expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+# Read replica (tùy chọn): DATABASE_READ_URL trỏ tới replica chỉ đọc.
+# Các route thống kê/chỉ đọc dùng get_read_db / get_async_read_db; user vừa ghi dữ liệu
+# trong READ_YOUR_WRITES_SECONDS giây gần đây vẫn đọc từ primary (tránh replication lag)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if DATABASE_READ_URL:
+    read_engine = create_db_engine(DATABASE_READ_URL)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if DATABASE_ASYNC:
+        async_read_engine = create_async_db_engine(DATABASE_READ_URL)
+        AsyncReadSessionLocal = _async_sessionmaker(async_read_engine)
+
+# {identity: monotonic time of last successful write} - theo từng process
+_recent_writes: Dict[str, float] = {}
+
+def request_identity(request: Request) -> Optional[str]:
+    """Identify the caller from the bearer token subject.
+
+    The signature is not verified here: the identity only decides which engine
+    serves a read, the route's auth dependency still validates the token.
+    """
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.get_unverified_claims(authorization[7:]).get("sub")
+    except JWTError:
+        return None
+
+def mark_recent_write(identity: str):
+    _recent_writes[identity] = time.monotonic()
+    if len(_recent_writes) > 10000:
+        cutoff = time.monotonic() - READ_YOUR_WRITES_SECONDS
+        for key in [k for k, t in _recent_writes.items() if t < cutoff]:
+            _recent_writes.pop(key, None)
+
+def wrote_recently(identity: Optional[str]) -> bool:
+    if identity is None:
+        return False
+    last_write = _recent_writes.get(identity)
+    return last_write is not None and time.monotonic() - last_write < READ_YOUR_WRITES_SECONDS
+
+def _use_replica(request: Request) -> bool:
+    return ReadSessionLocal is not None and not wrote_recently(request_identity(request))
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Remember callers whose write requests succeeded (only when a replica is configured)"""
+    response = await call_next(request)
+    if (
+        ReadSessionLocal is not None
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        identity = request_identity(request)
+        if identity is not None:
+            mark_recent_write(identity)
+    return response
+
+def get_read_db(request: Request):
+    """Session for read-only routes: replica if configured, primary after own recent writes"""
+    db = ReadSessionLocal() if _use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """Async counterpart of get_read_db"""
+    use_replica = _use_replica(request)
+    if AsyncSessionLocal is not None:
+        factory = AsyncReadSessionLocal if use_replica else AsyncSessionLocal
+        async with factory() as session:
+            yield session
+    else:
+        factory = ReadSessionLocal if use_replica else SessionLocal
+        db = SyncSessionAdapter(factory(expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
@@ -0,0 +1,97 @@
+"""
+Duplicate cards on import (/api/ai/import, /api/ai/import/file)
+
+Every card stores content_hash: sha1 of its normalized front (Unicode NFKC,
+case-folded, whitespace collapsed), indexed together with set_id
+(ix_flashcards_set_id_content_hash, migration 0012). Two cards of a set are
+duplicates when their fronts normalize to the same text, e.g. "Hello  World"
+and "hello world".
+
+An import chooses what happens to duplicates - of cards already in the set or
+of an earlier row of the same file:
+- skip (default): the existing card stays, the imported row is dropped
+- update: the existing card takes the imported front/back (last row wins)
+- keep: everything is inserted (the behaviour before deduplication)
+
+Existing cards are looked up with one IN query per DEDUP_CHUNK hashes, never
+one query per row. Every write path that sets `front` must also set
+content_hash (see insert_cards and the card endpoints in routers/flashcards.py).
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app import models
+
+SKIP = "skip"
+UPDATE = "update"
+KEEP = "keep"
+DUPLICATE_MODES = (SKIP, UPDATE, KEEP)
+DEDUP_CHUNK = 500
+
+_SPACES = re.compile(r"\s+")
+
+def normalize(text: str) -> str:
+    # Giữ đồng bộ với migration 0012 (backfill các thẻ có sẵn)
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+def check_mode(mode: str) -> str:
+    """400 on an unknown duplicates mode"""
+    if mode not in DUPLICATE_MODES:
+        raise HTTPException(status_code=400, detail=f"duplicates must be one of: {', '.join(DUPLICATE_MODES)}")
+    return mode
+
+def content_hash(front: str) -> str:
+    return hashlib.sha1(normalize(front).encode("utf-8")).hexdigest()
+
+def existing_cards(db, set_id: int, hashes: Iterable[str]) -> Dict[str, int]:
+    """{content_hash: id of the oldest card with it} among the set's cards"""
+    hashes = list(hashes)
+    found = {}
+    for start in range(0, len(hashes), DEDUP_CHUNK):
+        rows = db.execute(
+            select(models.Flashcard.content_hash, models.Flashcard.id)
+            .where(
+                models.Flashcard.set_id == set_id,
+                models.Flashcard.content_hash.in_(hashes[start:start + DEDUP_CHUNK])
+            )
+            .order_by(models.Flashcard.id.desc())
+        )
+        # Giảm dần theo id: id nhỏ nhất ghi đè sau cùng
+        found.update({row.content_hash: row.id for row in rows})
+    return found
+
+def resolve_duplicates(db, set_id: int, cards: List, mode: str) -> Tuple[List, List[dict], int]:
+    """Split imported cards (objects with front/back) by `mode`.
+
+    Returns (cards to insert, UPDATE rows {id, front, back, content_hash} for
+    existing cards, number of rows skipped).
+    """
+    if mode == KEEP:
+        return list(cards), [], 0
+    hashed = [(content_hash(card.front), card) for card in cards]
+    existing = existing_cards(db, set_id, {card_hash for card_hash, _ in hashed})
+    new_cards: Dict[str, object] = {}  # giữ thứ tự trong file
+    updates: Dict[int, dict] = {}
+    skipped = 0
+    for card_hash, card in hashed:
+        if card_hash in existing:
+            if mode == UPDATE:
+                if existing[card_hash] in updates:
+                    skipped += 1  # dòng trước trong file bị dòng này thay thế
+                updates[existing[card_hash]] = {
+                    "id": existing[card_hash], "front": card.front, "back": card.back, "content_hash": card_hash
+                }
+            else:
+                skipped += 1
+        elif card_hash in new_cards:
+            skipped += 1
+            if mode == UPDATE:
+                new_cards[card_hash] = card
+        else:
+            new_cards[card_hash] = card
+    return list(new_cards.values()), list(updates.values()), skipped
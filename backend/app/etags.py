@@ -0,0 +1,46 @@
+"""
+Conditional GET (ETag / If-None-Match) for sets, cards and study progress
+
+Representations are identified by versions kept in the database instead of
+hashing the response body, so an unchanged resource is answered with 304
+before its card rows (or progress aggregates) are loaded:
+- flashcard_sets.version: bumped on every set or card mutation (BUMP_SET_VERSION)
+- users.progress_version: bumped on every study write of that user (BUMP_PROGRESS_VERSION)
+
+    not_modified = conditional(request, response, "set", db_set.id, db_set.version)
+    if not_modified:
+        return not_modified
+
+Responses carry `Cache-Control: private, no-cache`, so browsers keep the body
+and revalidate with If-None-Match on their own - the frontend needs no changes.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Tăng khi đổi schema của các response có ETag, để client không giữ bản cũ sau khi deploy
+REPRESENTATION_VERSION = 1
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that identify a representation"""
+    raw = "|".join(str(part) for part in (REPRESENTATION_VERSION, *parts))
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+def conditional(request: Request, response: Response, *parts) -> Optional[Response]:
+    """Set the ETag of `parts` on response; return a 304 response if the client already has it"""
+    etag = make_etag(*parts)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
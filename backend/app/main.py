@@ -1,318 +1,49 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
+from app import database
+from app.database import read_your_writes_middleware
+from app.query_counter import query_stats_middleware
+from app.metrics import METRICS_TOKEN, MetricsMiddleware, render_metrics
+from app.slow_queries import SlowQueryContextMiddleware
+from app.profiling import ProfilingMiddleware
+from app.warmup import APP_WARMUP, run_warm_up
+from app.purge import purge_on_startup
 from app.routers import auth, flashcards, study, leaderboard, ai, admin, reports, notifications
 from pathlib import Path
-from sqlalchemy import text, inspect
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema và admin mặc định được tạo bởi migrate.py (Alembic) khi deploy.
+# Import app không làm I/O nào: thư mục uploads, warm-up và đóng kết nối
+# được xử lý trong lifespan khi server khởi động / tắt
 
-# Migration: Add avatar_url column if not exists
-def migrate_add_avatar_url():
-    """Thêm cột avatar_url vào bảng users nếu chưa có"""
-    try:
-        # Kiểm tra xem có phải PostgreSQL không
-        if not str(engine.url).startswith("sqlite"):
-            with engine.begin() as conn:
-                # Kiểm tra cột đã tồn tại chưa
-                check_query = text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='users' AND column_name='avatar_url';
-                """)
-                result = conn.execute(check_query)
-                
-                if result.fetchone() is None:
-                    # Thêm cột
-                    alter_query = text("ALTER TABLE users ADD COLUMN avatar_url VARCHAR(255);")
-                    conn.execute(alter_query)
-                    print("✅ Đã thêm cột avatar_url vào bảng users")
-                else:
-                    print("ℹ️  Cột avatar_url đã tồn tại trong database")
-        else:
-            # SQLite - kiểm tra bằng inspect
-            inspector = inspect(engine)
-            columns = [col['name'] for col in inspector.get_columns('users')]
-            if 'avatar_url' not in columns:
-                with engine.begin() as conn:
-                    alter_query = text("ALTER TABLE users ADD COLUMN avatar_url VARCHAR(255);")
-                    conn.execute(alter_query)
-                    print("✅ Đã thêm cột avatar_url vào bảng users (SQLite)")
-            else:
-                print("ℹ️  Cột avatar_url đã tồn tại trong database (SQLite)")
-    except Exception as e:
-        print(f"⚠️  Lỗi khi migration avatar_url: {e}")
-        # Không throw exception để app vẫn chạy được
-
-# Migration: Add status column to flashcard_sets if not exists
-def migrate_add_status():
-    """Thêm cột status vào bảng flashcard_sets nếu chưa có"""
-    try:
-        if not str(engine.url).startswith("sqlite"):
-            with engine.begin() as conn:
-                check_query = text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='flashcard_sets' AND column_name='status';
-                """)
-                result = conn.execute(check_query)
-                
-                if result.fetchone() is None:
-                    alter_query = text("ALTER TABLE flashcard_sets ADD COLUMN status VARCHAR(20) DEFAULT 'pending';")
-                    conn.execute(alter_query)
-                    # Update existing records to 'approved'
-                    update_query = text("UPDATE flashcard_sets SET status = 'approved' WHERE status IS NULL;")
-                    conn.execute(update_query)
-                    print("✅ Đã thêm cột status vào bảng flashcard_sets")
-                else:
-                    print("ℹ️  Cột status đã tồn tại trong database")
-        else:
-            inspector = inspect(engine)
-            columns = [col['name'] for col in inspector.get_columns('flashcard_sets')]
-            if 'status' not in columns:
-                with engine.begin() as conn:
-                    alter_query = text("ALTER TABLE flashcard_sets ADD COLUMN status VARCHAR(20) DEFAULT 'pending';")
-                    conn.execute(alter_query)
-                    update_query = text("UPDATE flashcard_sets SET status = 'approved' WHERE status IS NULL;")
-                    conn.execute(update_query)
-                    print("✅ Đã thêm cột status vào bảng flashcard_sets (SQLite)")
-            else:
-                print("ℹ️  Cột status đã tồn tại trong database (SQLite)")
-    except Exception as e:
-        print(f"⚠️  Lỗi khi migration status: {e}")
-
-# Migration: Create reports table if not exists
-def migrate_create_reports_table():
-    """Tạo bảng reports nếu chưa có"""
-    try:
-        if not str(engine.url).startswith("sqlite"):
-            with engine.begin() as conn:
-                check_query = text("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_name='reports';
-                """)
-                result = conn.execute(check_query)
-                
-                if result.fetchone() is None:
-                    create_query = text("""
-                        CREATE TABLE reports (
-                            id SERIAL PRIMARY KEY,
-                            report_type VARCHAR(20) NOT NULL,
-                            reported_item_id INTEGER NOT NULL,
-                            reporter_id INTEGER NOT NULL REFERENCES users(id),
-                            reason VARCHAR(50) NOT NULL,
-                            description TEXT,
-                            status VARCHAR(20) DEFAULT 'pending',
-                            admin_notes TEXT,
-                            resolved_by INTEGER REFERENCES users(id),
-                            resolved_at TIMESTAMP WITH TIME ZONE,
-                            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                        );
-                    """)
-                    conn.execute(create_query)
-                    print("✅ Đã tạo bảng reports")
-                else:
-                    print("ℹ️  Bảng reports đã tồn tại")
-        else:
-            inspector = inspect(engine)
-            tables = inspector.get_table_names()
-            if 'reports' not in tables:
-                with engine.begin() as conn:
-                    create_query = text("""
-                        CREATE TABLE reports (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            report_type VARCHAR(20) NOT NULL,
-                            reported_item_id INTEGER NOT NULL,
-                            reporter_id INTEGER NOT NULL REFERENCES users(id),
-                            reason VARCHAR(50) NOT NULL,
-                            description TEXT,
-                            status VARCHAR(20) DEFAULT 'pending',
-                            admin_notes TEXT,
-                            resolved_by INTEGER REFERENCES users(id),
-                            resolved_at TIMESTAMP,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        );
-                    """)
-                    conn.execute(create_query)
-                    print("✅ Đã tạo bảng reports (SQLite)")
-            else:
-                print("ℹ️  Bảng reports đã tồn tại (SQLite)")
-    except Exception as e:
-        print(f"⚠️  Lỗi khi migration reports table: {e}")
-
-# Migration: Add snapshot fields to reports table
-def migrate_add_report_snapshot_fields():
-    """Thêm các cột snapshot vào bảng reports nếu chưa có"""
-    try:
-        if not str(engine.url).startswith("sqlite"):
-            with engine.begin() as conn:
-                # Check and add item_title
-                check_title = text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='reports' AND column_name='item_title';
-                """)
-                result = conn.execute(check_title)
-                if result.fetchone() is None:
-                    conn.execute(text("ALTER TABLE reports ADD COLUMN item_title TEXT;"))
-                    print("✅ Đã thêm cột item_title vào bảng reports")
-                
-                # Check and add item_owner_id
-                check_owner_id = text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='reports' AND column_name='item_owner_id';
-                """)
-                result = conn.execute(check_owner_id)
-                if result.fetchone() is None:
-                    conn.execute(text("ALTER TABLE reports ADD COLUMN item_owner_id INTEGER REFERENCES users(id);"))
-                    print("✅ Đã thêm cột item_owner_id vào bảng reports")
-                
-                # Check and add item_owner_username
-                check_owner_username = text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='reports' AND column_name='item_owner_username';
-                """)
-                result = conn.execute(check_owner_username)
-                if result.fetchone() is None:
-                    conn.execute(text("ALTER TABLE reports ADD COLUMN item_owner_username VARCHAR(255);"))
-                    print("✅ Đã thêm cột item_owner_username vào bảng reports")
-        else:
-            # SQLite
-            inspector = inspect(engine)
-            columns = [col['name'] for col in inspector.get_columns('reports')]
-            
-            with engine.begin() as conn:
-                if 'item_title' not in columns:
-                    conn.execute(text("ALTER TABLE reports ADD COLUMN item_title TEXT;"))
-                    print("✅ Đã thêm cột item_title vào bảng reports (SQLite)")
-                if 'item_owner_id' not in columns:
-                    conn.execute(text("ALTER TABLE reports ADD COLUMN item_owner_id INTEGER REFERENCES users(id);"))
-                    print("✅ Đã thêm cột item_owner_id vào bảng reports (SQLite)")
-                if 'item_owner_username' not in columns:
-                    conn.execute(text("ALTER TABLE reports ADD COLUMN item_owner_username VARCHAR(255);"))
-                    print("✅ Đã thêm cột item_owner_username vào bảng reports (SQLite)")
-    except Exception as e:
-        print(f"⚠️  Lỗi khi migration report snapshot fields: {e}")
-
-# Migration: Create notifications table if not exists
-def migrate_create_notifications_table():
-    """Tạo bảng notifications nếu chưa có"""
-    try:
-        if not str(engine.url).startswith("sqlite"):
-            with engine.begin() as conn:
-                check_query = text("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_name='notifications';
-                """)
-                result = conn.execute(check_query)
-                
-                if result.fetchone() is None:
-                    create_query = text("""
-                        CREATE TABLE notifications (
-                            id SERIAL PRIMARY KEY,
-                            user_id INTEGER NOT NULL REFERENCES users(id),
-                            type VARCHAR(50) NOT NULL,
-                            title VARCHAR(255) NOT NULL,
-                            message TEXT NOT NULL,
-                            item_id INTEGER,
-                            read BOOLEAN DEFAULT FALSE,
-                            action_path VARCHAR(255),
-                            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                        );
-                    """)
-                    conn.execute(create_query)
-                    print("✅ Đã tạo bảng notifications")
-                else:
-                    print("ℹ️  Bảng notifications đã tồn tại")
-        else:
-            inspector = inspect(engine)
-            tables = inspector.get_table_names()
-            if 'notifications' not in tables:
-                with engine.begin() as conn:
-                    create_query = text("""
-                        CREATE TABLE notifications (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            user_id INTEGER NOT NULL REFERENCES users(id),
-                            type VARCHAR(50) NOT NULL,
-                            title VARCHAR(255) NOT NULL,
-                            message TEXT NOT NULL,
-                            item_id INTEGER,
-                            read BOOLEAN DEFAULT 0,
-                            action_path VARCHAR(255),
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        );
-                    """)
-                    conn.execute(create_query)
-                    print("✅ Đã tạo bảng notifications (SQLite)")
-            else:
-                print("ℹ️  Bảng notifications đã tồn tại (SQLite)")
-    except Exception as e:
-        print(f"⚠️  Lỗi khi migration notifications table: {e}")
-
-# Chạy migrations
-migrate_add_avatar_url()
-migrate_add_status()
-migrate_create_reports_table()
-migrate_add_report_snapshot_fields()
-migrate_create_notifications_table()
-
-# Tự động tạo admin account nếu chưa có
-def create_default_admin():
-    """Tạo tài khoản admin mặc định nếu chưa có"""
-    try:
-        from app.database import SessionLocal
-        from app import models, auth
-        
-        db = SessionLocal()
-        try:
-            # Kiểm tra xem đã có admin chưa
-            admin = db.query(models.User).filter(models.User.username == "admin").first()
-            if not admin:
-                # Tạo admin
-                admin_password = "admin123"
-                hashed_password = auth.get_password_hash(admin_password)
-                admin_user = models.User(
-                    username="admin",
-                    email="admin@example.com",
-                    hashed_password=hashed_password,
-                    is_active=True,
-                    is_admin=True
-                )
-                db.add(admin_user)
-                db.flush()
-                
-                # Tạo leaderboard entry cho admin
-                admin_leaderboard = models.Leaderboard(user_id=admin_user.id)
-                db.add(admin_leaderboard)
-                
-                db.commit()
-                print("✅ Đã tạo tài khoản admin mặc định (username: admin, password: admin123)")
-            else:
-                print("ℹ️  Tài khoản admin đã tồn tại")
-        except Exception as e:
-            db.rollback()
-            print(f"⚠️  Lỗi khi tạo admin: {e}")
-        finally:
-            db.close()
-    except Exception as e:
-        print(f"⚠️  Lỗi khi khởi tạo admin: {e}")
-
-create_default_admin()
-
-# Create uploads directory if it doesn't exist
 uploads_dir = Path("uploads/avatars")
-uploads_dir.mkdir(parents=True, exist_ok=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create uploads directory if it doesn't exist
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    # Warm-up chạy nền, không chặn việc nhận request
+    warmup_task = asyncio.create_task(run_warm_up()) if APP_WARMUP else None
+    # Purge các set/user đã soft-delete mà chưa purge xong (restart giữa chừng)
+    purge_on_startup()
+    yield
+    if warmup_task is not None:
+        await warmup_task
+    database.engine.dispose()
+    if database.read_engine is not None:
+        database.read_engine.dispose()
+    for async_engine in (database.async_engine, database.async_read_engine):
+        if async_engine is not None:
+            await async_engine.dispose()
 
 app = FastAPI(
         title="Studycard API",
         description="API for Studycard application with spaced repetition",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
 
 # CORS middleware
@@ -335,8 +66,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor pagination (app/pagination.py)
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
 
+# Read-your-writes: user vừa ghi dữ liệu sẽ đọc từ primary thay vì read replica
+app.middleware("http")(read_your_writes_middleware)
+
+# Debug (SQL_DEBUG=true): header X-DB-Queries / X-DB-Time, cảnh báo N+1
+app.middleware("http")(query_stats_middleware)
+
+# Profiling theo yêu cầu: admin gửi header X-Profile: 1
+app.add_middleware(ProfilingMiddleware)
+
+# Slow-query log: ghi lại request nào chạy câu SQL chậm
+app.add_middleware(SlowQueryContextMiddleware)
+
+# Prometheus metrics (ngoài cùng để đo cả thời gian của các middleware khác)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(flashcards.router, prefix="/api/flashcards", tags=["Flashcards"])
@@ -348,7 +96,8 @@ app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notifications"])
 
 # Mount static files for avatar uploads
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# check_dir=False: thư mục được tạo trong lifespan, không phải lúc import
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
 
 @app.get("/")
 async def root():
@@ -358,3 +107,10 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
@@ -0,0 +1,180 @@
+"""
+Prometheus-compatible metrics (text exposition format 0.0.4) at /api/metrics
+
+Collected by MetricsMiddleware, a plain ASGI middleware:
+- http_requests_total{method,route,status}
+- http_request_duration_seconds{method,route} histogram
+- http_requests_in_flight gauge
+plus gauges read from the SQLAlchemy pools when scraped (db_pool_*) and the
+rate limiter counters (rate_limit_requests_total{policy,result}, app/rate_limit.py).
+
+No prometheus_client dependency and no locks: counters are only updated from
+the event loop thread (the middleware runs there even for sync routes, which
+execute in the threadpool), so every update is a plain dict/list increment.
+`route` is the route template (/api/flashcards/sets/{set_id}), never the raw
+path, to keep label cardinality bounded.
+
+Configuration (env):
+- METRICS_ENABLED=true|false  (default true)
+- METRICS_TOKEN=<secret>      (optional: require "Authorization: Bearer <secret>" to scrape)
+"""
+import os
+import time
+from typing import Dict, List, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("true", "1", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last slot = +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        for bound in LATENCY_BUCKETS:
+            if value <= bound:
+                break
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+
+_requests_total: Dict[Tuple[str, str, str], int] = {}
+_latency: Dict[Tuple[str, str], _Histogram] = {}
+_in_flight = 0
+_started_at = time.time()
+
+def _route_template(scope) -> str:
+    """Full route template of the matched route, e.g. /api/flashcards/sets/{set_id}"""
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    # Route trong router được include chỉ biết path tương đối ("/sets/{set_id}"):
+    # lấy prefix từ các segment đầu của path thực tế
+    path_segments = scope["path"].rstrip("/").split("/")
+    template_segments = template.rstrip("/").split("/")
+    prefix = "/".join(path_segments[:len(path_segments) - len(template_segments) + 1])
+    return prefix + template if template != "/" else prefix + "/"
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight -= 1
+            elapsed = time.perf_counter() - started
+            method = scope["method"]
+            route = _route_template(scope)
+            key = (method, route, str(status_code))
+            _requests_total[key] = _requests_total.get(key, 0) + 1
+            histogram = _latency.get((method, route))
+            if histogram is None:
+                histogram = _latency[(method, route)] = _Histogram()
+            histogram.observe(elapsed)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _pool_lines() -> List[str]:
+    from app import database
+
+    lines = []
+    engines = [
+        ("primary", database.engine),
+        ("replica", database.read_engine),
+        ("primary_async", database.async_engine),
+        ("replica_async", database.async_read_engine),
+    ]
+    pools = [(name, getattr(db_engine, "sync_engine", db_engine).pool) for name, db_engine in engines if db_engine is not None]
+    # Mỗi metric family phải liền nhau trong output
+    for metric, attribute, help_text in (
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_checked_out", "checkedout", "Connections currently in use"),
+        ("db_pool_checked_in", "checkedin", "Idle connections in the pool"),
+        ("db_pool_overflow", "overflow", "Connections opened beyond pool_size"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for name, pool in pools:
+            getter = getattr(pool, attribute, None)  # StaticPool/NullPool không có thống kê
+            if getter is not None:
+                lines.append(f"{metric}{_labels(engine=name)} {getter()}")
+    return lines
+
+def _rate_limit_lines() -> List[str]:
+    from app import rate_limit
+
+    lines = [
+        "# HELP rate_limit_requests_total Requests checked by the rate limiter, by policy and result",
+        "# TYPE rate_limit_requests_total counter",
+    ]
+    counts = rate_limit.get_metrics()["policies"]
+    for policy in sorted(counts):
+        for result in ("allowed", "limited"):
+            lines.append(f"rate_limit_requests_total{_labels(policy=policy, result=result)} {counts[policy][result]}")
+    return lines
+
+def render_metrics() -> str:
+    """Current metrics in the Prometheus text exposition format"""
+    lines = [
+        "# HELP process_start_time_seconds Start time of the process since unix epoch",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds {_started_at}",
+        "# HELP http_requests_in_flight Requests currently being served",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {_in_flight}",
+        "# HELP http_requests_total Requests by method, route template and status",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status_code), value in sorted(_requests_total.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status_code)} {value}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency by method and route template",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route), histogram in sorted(_latency.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=le)} {cumulative}")
+        lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {histogram.sum}")
+        lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {histogram.count}")
+
+    lines += _pool_lines()
+    lines += _rate_limit_lines()
+    return "\n".join(lines) + "\n"
+
+def reset_metrics():
+    _requests_total.clear()
+    _latency.clear()
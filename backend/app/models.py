@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -13,13 +13,24 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)  # Admin flag
     avatar_url = Column(String, nullable=True)  # URL to avatar image
+    progress_version = Column(Integer, nullable=False, default=1, server_default="1")  # Tăng khi tiến độ học thay đổi (ETag)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
-    # Relationships
-    flashcard_sets = relationship("FlashcardSet", back_populates="owner", cascade="all, delete-orphan")
-    study_sessions = relationship("StudySession", back_populates="user", cascade="all, delete-orphan")
-    leaderboard_entry = relationship("Leaderboard", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Soft delete, chờ purge (app/purge.py)
+    
+    # Relationships - con bị xóa bởi ON DELETE CASCADE của database (passive_deletes: không load)
+    flashcard_sets = relationship("FlashcardSet", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    study_sessions = relationship("StudySession", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    leaderboard_entry = relationship("Leaderboard", back_populates="user", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # User chờ purge (partial index, rất ít dòng)
+        Index(
+            "ix_users_deleted_at", "deleted_at",
+            sqlite_where=text("deleted_at IS NOT NULL"), postgresql_where=text("deleted_at IS NOT NULL")
+        ),
+    )
 
 class FlashcardSet(Base):
     __tablename__ = "flashcard_sets"
@@ -27,35 +38,63 @@ class FlashcardSet(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     is_public = Column(Boolean, default=False)
     status = Column(String, default='pending')  # pending, approved, rejected
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Tăng khi bộ thẻ hoặc thẻ thay đổi (ETag)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Soft delete, chờ purge (app/purge.py)
     
     # Relationships
     owner = relationship("User", back_populates="flashcard_sets")
-    flashcards = relationship("Flashcard", back_populates="set", cascade="all, delete-orphan")
+    flashcards = relationship(
+        "Flashcard", back_populates="set", cascade="all, delete-orphan", passive_deletes=True,
+        order_by="(Flashcard.position, Flashcard.id)"
+    )
+    
+    __table_args__ = (
+        Index("ix_flashcard_sets_owner_id", "owner_id"),
+        Index("ix_flashcard_sets_is_public_status", "is_public", "status"),
+        # Hàng đợi duyệt của admin (partial index, chỉ các bộ thẻ pending)
+        Index(
+            "ix_flashcard_sets_pending_created_at", "created_at",
+            sqlite_where=text("status = 'pending'"), postgresql_where=text("status = 'pending'")
+        ),
+        # Bộ thẻ chờ purge
+        Index(
+            "ix_flashcard_sets_deleted_at", "deleted_at",
+            sqlite_where=text("deleted_at IS NOT NULL"), postgresql_where=text("deleted_at IS NOT NULL")
+        ),
+    )
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
     
     id = Column(Integer, primary_key=True, index=True)
-    set_id = Column(Integer, ForeignKey("flashcard_sets.id"), nullable=False)
+    set_id = Column(Integer, ForeignKey("flashcard_sets.id", ondelete="CASCADE"), nullable=False)
     front = Column(Text, nullable=False)
     back = Column(Text, nullable=False)
+    position = Column(Integer, nullable=False, default=0, server_default="0")  # Thứ tự trong bộ thẻ, cách nhau POSITION_GAP (app/ordering.py)
+    content_hash = Column(String(40), nullable=True)  # sha1 của mặt trước đã chuẩn hóa (app/dedup.py)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     set = relationship("FlashcardSet", back_populates="flashcards")
-    study_records = relationship("StudyRecord", back_populates="flashcard", cascade="all, delete-orphan")
+    study_records = relationship("StudyRecord", back_populates="flashcard", cascade="all, delete-orphan", passive_deletes=True)
+    
+    __table_args__ = (
+        Index("ix_flashcards_set_id", "set_id"),
+        Index("ix_flashcards_set_id_content_hash", "set_id", "content_hash"),
+        Index("ix_flashcards_set_id_position", "set_id", "position", "id"),  # Thứ tự thẻ, không cần sort
+    )
 
 class StudyRecord(Base):
     __tablename__ = "study_records"
     
     id = Column(Integer, primary_key=True, index=True)
-    flashcard_id = Column(Integer, ForeignKey("flashcards.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    flashcard_id = Column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Spaced repetition fields
     ease_factor = Column(Float, default=2.5)  # SM-2 algorithm ease factor
@@ -72,13 +111,18 @@ class StudyRecord(Base):
     # Relationships
     flashcard = relationship("Flashcard", back_populates="study_records")
     user = relationship("User")
+    
+    __table_args__ = (
+        Index("ix_study_records_user_id_flashcard_id", "user_id", "flashcard_id"),
+        Index("ix_study_records_flashcard_id", "flashcard_id"),
+    )
 
 class StudySession(Base):
     __tablename__ = "study_sessions"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    set_id = Column(Integer, ForeignKey("flashcard_sets.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    set_id = Column(Integer, ForeignKey("flashcard_sets.id", ondelete="CASCADE"), nullable=False)
     cards_studied = Column(Integer, default=0)
     cards_correct = Column(Integer, default=0)
     cards_incorrect = Column(Integer, default=0)
@@ -88,12 +132,17 @@ class StudySession(Base):
     
     # Relationships
     user = relationship("User", back_populates="study_sessions")
+    
+    __table_args__ = (
+        Index("ix_study_sessions_user_id_started_at", "user_id", "started_at"),
+        Index("ix_study_sessions_set_id", "set_id"),  # ON DELETE CASCADE khi xóa bộ thẻ
+    )
 
 class Leaderboard(Base):
     __tablename__ = "leaderboard"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
     total_study_time = Column(Integer, default=0)  # in minutes
     total_cards_studied = Column(Integer, default=0)
     total_correct = Column(Integer, default=0)
@@ -110,30 +159,40 @@ class Report(Base):
     id = Column(Integer, primary_key=True, index=True)
     report_type = Column(String, nullable=False)  # 'deck' or 'card'
     reported_item_id = Column(Integer, nullable=False)  # ID of deck or card
-    reporter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    reporter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     reason = Column(String, nullable=False)  # 'inappropriate', 'copyright', 'spam', 'misinformation', 'other'
     description = Column(Text, nullable=True)  # Optional detailed description
     status = Column(String, default='pending')  # 'pending', 'resolved', 'rejected'
     admin_notes = Column(Text, nullable=True)  # Admin's notes
-    resolved_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # Admin who resolved
+    resolved_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # Admin who resolved
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Snapshot fields to preserve info even after item is deleted
     item_title = Column(Text, nullable=True)  # Title of deck or card content
-    item_owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Owner of the reported item
+    item_owner_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # Owner of the reported item
     item_owner_username = Column(String, nullable=True)  # Username of the owner
     
     # Relationships
     reporter = relationship("User", foreign_keys=[reporter_id])
     resolver = relationship("User", foreign_keys=[resolved_by])
     item_owner = relationship("User", foreign_keys=[item_owner_id])
+    
+    __table_args__ = (
+        Index("ix_reports_status_created_at", "status", "created_at"),
+        # Kiểm tra báo cáo trùng + đếm báo cáo pending để tự ẩn bộ thẻ
+        Index("ix_reports_item_status", "report_type", "reported_item_id", "status"),
+        Index(
+            "ix_reports_pending_created_at", "created_at",
+            sqlite_where=text("status = 'pending'"), postgresql_where=text("status = 'pending'")
+        ),
+    )
 
 class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     type = Column(String, nullable=False)  # 'set_pending', 'set_approved', 'set_rejected', 'report_resolved', etc.
     title = Column(String, nullable=False)
     message = Column(Text, nullable=False)
@@ -144,4 +203,29 @@ class Notification(Base):
     
     # Relationships
     user = relationship("User", back_populates="notifications")
+    
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
 
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 hex of the raw token
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    replaced_by_id = Column(Integer, ForeignKey("refresh_tokens.id"), nullable=True)  # Token issued on rotation
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="refresh_tokens")
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String, primary_key=True)  # '<policy>:ip:<addr>' or '<policy>:user:<id>'
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Unix timestamp of last refill
@@ -0,0 +1,112 @@
+"""
+Card order inside a set: sparse (gapped) positions
+
+Cards are ordered by (position, id), read straight from the
+ix_flashcards_set_id_position index (set_id, position, id) - listing and the
+due queue need no sort. New cards are appended POSITION_GAP after the last
+one, so neighbours leave room between them: moving a card
+(POST /api/flashcards/cards/{id}/move) writes only that card, at the midpoint
+of its new neighbours.
+
+When the neighbours are adjacent integers there is no midpoint left. The cards
+after the target are then shifted by one UPDATE (rare), and the whole set is
+renumbered to multiples of POSITION_GAP in the background (one UPDATE ... FROM
+with row_number()), restoring the gaps for later moves.
+"""
+from typing import Optional
+
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app import models, statements
+
+POSITION_GAP = 1024
+
+def lock_set(db: Session, set_id: int):
+    """Serialize reorders of a set (row lock on PostgreSQL, SQLite writes are serialized anyway)"""
+    db.execute(select(models.FlashcardSet.id).where(models.FlashcardSet.id == set_id).with_for_update())
+
+def next_position(db: Session, set_id: int) -> int:
+    """Position POSITION_GAP after the last card of a set"""
+    last = db.scalar(select(func.max(models.Flashcard.position)).where(models.Flashcard.set_id == set_id))
+    return (last or 0) + POSITION_GAP
+
+def move_card(db: Session, card: models.Flashcard, after: Optional[models.Flashcard]) -> bool:
+    """Put `card` right after `after` (first when None), no commit.
+
+    Returns True when the set ran out of gaps and should be renumbered.
+    """
+    following = select(models.Flashcard.id, models.Flashcard.position).where(
+        models.Flashcard.set_id == card.set_id, models.Flashcard.id != card.id
+    )
+    if after is not None:
+        following = following.where(
+            tuple_(models.Flashcard.position, models.Flashcard.id) > tuple_(after.position, after.id)
+        )
+    successor = db.execute(
+        following.order_by(models.Flashcard.position, models.Flashcard.id).limit(1)
+    ).first()
+
+    renumber = False
+    if after is None and successor is None:
+        position = POSITION_GAP
+    elif after is None:
+        position = successor.position - POSITION_GAP
+    elif successor is None:
+        position = after.position + POSITION_GAP
+    elif successor.position - after.position >= 2:
+        position = (after.position + successor.position) // 2
+        renumber = successor.position - after.position < 4
+    else:
+        # Hết khoảng trống: dời các thẻ phía sau một bậc (một UPDATE), rồi đánh số lại ở background
+        db.execute(
+            update(models.Flashcard)
+            .where(
+                models.Flashcard.set_id == card.set_id,
+                models.Flashcard.id != card.id,
+                tuple_(models.Flashcard.position, models.Flashcard.id) > tuple_(after.position, after.id),
+            )
+            .values(position=models.Flashcard.position + 2)
+            .execution_options(synchronize_session=False)
+        )
+        position = after.position + 1
+        renumber = True
+    card.position = position
+    return renumber
+
+def renumber_set(db: Session, set_id: int) -> int:
+    """Rewrite the positions of a set to POSITION_GAP, 2 * POSITION_GAP, ... keeping the order
+    (one statement, no commit). Returns the number of cards."""
+    ranked = (
+        select(
+            models.Flashcard.id,
+            (func.row_number().over(order_by=(models.Flashcard.position, models.Flashcard.id)) * POSITION_GAP)
+            .label("new_position"),
+        )
+        .where(models.Flashcard.set_id == set_id)
+        .subquery()
+    )
+    result = db.execute(
+        update(models.Flashcard)
+        .where(models.Flashcard.id == ranked.c.id)
+        .values(position=ranked.c.new_position)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
+    return result.rowcount
+
+def renumber_in_background(set_id: int):
+    """BackgroundTasks entry point: renumber in its own session after the response is sent"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        lock_set(db, set_id)
+        count = renumber_set(db, set_id)
+        db.commit()
+        print(f"🔢 Renumbered {count} cards of set {set_id}")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Renumber set {set_id} thất bại: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,142 @@
+"""
+Keyset (cursor) pagination for list endpoints
+
+Instead of offset(skip) - which scans and discards every skipped row, so deep
+pages get linearly slower - pages continue after the (sort_key, id) of the last
+row of the previous page. The position is handed to clients as an opaque
+cursor string:
+
+    items, next_cursor = paginate(query, limit, cursor, sort_column=models.Report.created_at, descending=True)
+    set_pagination_headers(response, next_cursor, total)
+
+List endpoints return `X-Next-Cursor` (absent on the last page) and
+`X-Total-Count` headers; pass `?cursor=<X-Next-Cursor>` to get the next page.
+
+Totals come from estimated_count(): PostgreSQL planner statistics for whole
+tables, otherwise a COUNT cached in-process for COUNT_CACHE_SECONDS. A filter
+that only drops a few rows (soft-deleted users) keeps the whole-table estimate
+by subtracting the count of those rows (GET /api/admin/users).
+"""
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import func, select, text, tuple_
+
+COUNT_CACHE_SECONDS = float(os.getenv("COUNT_CACHE_SECONDS", "60"))
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        value = {"dt": sort_value.isoformat()}
+    else:
+        value = {"v": sort_value}
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Inverse of encode_cursor, 400 on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        sort_value = datetime.fromisoformat(value["dt"]) if "dt" in value else value["v"]
+        return sort_value, int(row_id)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(
+    query,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort_column=None,
+    id_column=None,
+    descending: bool = False,
+    row_key: Optional[Callable[[Any], Tuple[Any, int]]] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Apply keyset pagination to a legacy Query ordered by (sort_column, id_column).
+
+    Without sort_column the order is id only. row_key extracts (sort_value, id)
+    from a result row when rows are not plain entities of the paginated model.
+    Returns (rows, next_cursor).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if id_column is None:
+        id_column = query.column_descriptions[0]["entity"].id
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_column is None:
+            query = query.filter(id_column < row_id if descending else id_column > row_id)
+        else:
+            # Lấy sort value đúng như đang lưu trong DB (tránh lệch format datetime của SQLite);
+            # giá trị trong cursor chỉ dùng khi dòng đó đã bị xóa
+            stored = select(sort_column).where(id_column == row_id).scalar_subquery()
+            position = tuple_(sort_column, id_column)
+            after = tuple_(func.coalesce(stored, sort_value), row_id)
+            query = query.filter(position < after if descending else position > after)
+
+    order = [sort_column, id_column] if sort_column is not None else [id_column]
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in order])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if row_key is not None:
+            sort_value, row_id = row_key(rows[-1])
+        else:
+            last = rows[-1]
+            row_id = last.id
+            sort_value = getattr(last, sort_column.key) if sort_column is not None else row_id
+        next_cursor = encode_cursor(sort_value, row_id)
+    return rows, next_cursor
+
+def set_pagination_headers(response: Response, next_cursor: Optional[str], total: Optional[int] = None):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+
+# {key: (value, expires_at)}
+_count_cache: Dict[str, Tuple[int, float]] = {}
+_count_cache_lock = threading.Lock()
+
+def cached_count(key: str, compute: Callable[[], int], ttl: float = COUNT_CACHE_SECONDS) -> int:
+    """Return compute() cached for `ttl` seconds under `key`"""
+    now = time.monotonic()
+    cached = _count_cache.get(key)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    value = compute()
+    with _count_cache_lock:
+        _count_cache[key] = (value, now + ttl)
+        if len(_count_cache) > 10000:
+            for stale in [k for k, (_, expires) in _count_cache.items() if expires <= now]:
+                _count_cache.pop(stale, None)
+    return value
+
+def estimated_count(db, query, key: str) -> int:
+    """Estimated number of rows of a (possibly filtered) query without loader options.
+
+    Unfiltered PostgreSQL tables use the planner's reltuples (free, updated by
+    autovacuum); everything else is a COUNT cached for COUNT_CACHE_SECONDS.
+    """
+    entity = query.column_descriptions[0]["entity"]
+    if db.get_bind().dialect.name == "postgresql" and query.whereclause is None:
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": entity.__tablename__}
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return cached_count(key, lambda: query.with_entities(func.count(entity.id)).order_by(None).scalar())
+
+def invalidate_counts(prefix: str = ""):
+    """Drop cached counts whose key starts with `prefix` (all by default)"""
+    with _count_cache_lock:
+        for key in [k for k in _count_cache if k.startswith(prefix)]:
+            _count_cache.pop(key, None)
@@ -0,0 +1,170 @@
+"""
+On-demand request profiling for admins
+
+Send `X-Profile: 1` with an admin bearer token and that single request runs
+under a sampling profiler. The response carries `X-Profile-Id`; the result (collapsed
+stacks, the input format of flamegraph.pl / speedscope) is kept in memory and
+downloadable from:
+
+- GET /api/admin/perf/profiles          list of stored profiles
+- GET /api/admin/perf/profiles/{id}     collapsed stacks (text/plain)
+
+Requests without the header only pay for one header lookup. Non-admin
+requests with the header are served normally without profiling.
+
+The sampler reads the stacks of all threads (sync routes run in the
+threadpool) and keeps the ones going through app code, so concurrent requests
+to the same code can show up in a profile: profile under light traffic.
+
+Configuration (env):
+- PROFILING_ENABLED=true|false   (default true)
+- PROFILE_INTERVAL_MS=1          sampling interval
+- PROFILE_KEEP=20                profiles kept in memory
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() in ("true", "1", "yes")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# {profile_id: {"meta": {...}, "collapsed": str}}
+_profiles: "OrderedDict[str, dict]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_DIR):
+        filename = "app" + filename[len(APP_DIR):]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Background thread sampling the stacks of every other thread"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(APP_DIR)
+                    stack.append(_frame_label(code))
+                    frame = frame.f_back
+                # Bỏ các thread idle / không chạy code của app (event loop chờ, worker rảnh)
+                if in_app:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+def _admin_from_headers(headers: dict) -> Optional[str]:
+    """Username of the admin sending the request, or None"""
+    from app import auth
+    from app.database import SessionLocal
+
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        username = auth._decode_username(authorization[7:])
+    except Exception:
+        return None
+    db = SessionLocal()
+    try:
+        user = auth.get_user_by_username(db, username=username)
+        return username if user is not None and user.is_active and user.is_admin else None
+    finally:
+        db.close()
+
+def _store(profile_id: str, meta: dict, collapsed: str):
+    with _profiles_lock:
+        _profiles[profile_id] = {"meta": meta, "collapsed": collapsed}
+        while len(_profiles) > PROFILE_KEEP:
+            _profiles.popitem(last=False)
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that carry X-Profile from an admin"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        flag = next((value for name, value in scope["headers"] if name == b"x-profile"), None)
+        if flag is None or flag in (b"", b"0", b"false"):
+            await self.app(scope, receive, send)
+            return
+        admin = await run_in_threadpool(_admin_from_headers, dict(scope["headers"]))
+        if admin is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            collapsed = profiler.stop()
+            meta = {
+                "id": profile_id,
+                "at": datetime.now(timezone.utc).isoformat(),
+                "request": f"{scope['method']} {scope['path']}",
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": profiler.sample_count,
+                "admin": admin,
+            }
+            _store(profile_id, meta, collapsed)
+            print(f"🔬 Profiled {meta['request']} ({meta['duration_ms']} ms, id={profile_id})")
+
+def list_profiles() -> list:
+    """Metadata of stored profiles, newest first"""
+    with _profiles_lock:
+        return [entry["meta"] for entry in reversed(_profiles.values())]
+
+def get_profile(profile_id: str) -> Optional[str]:
+    with _profiles_lock:
+        entry = _profiles.get(profile_id)
+    return entry["collapsed"] if entry else None
@@ -0,0 +1,195 @@
+"""
+Deleting sets and users: database cascades, soft delete + background purge for big ones
+
+The foreign keys are ON DELETE CASCADE / SET NULL (migration 0014) and the ORM
+relationships use passive_deletes=True, so `db.delete(db_set)` is a single
+DELETE: the database removes the cards, their study records and the study
+sessions itself. SQLAlchemy no longer loads every child into memory first.
+
+A single cascading DELETE of a popular deck or a heavy user still holds its
+locks (the whole database on SQLite) until millions of rows are gone. When a
+deletion reaches SOFT_DELETE_MIN_ROWS rows, it is done in two steps instead:
+
+1. in the request: set deleted_at (users are also deactivated). Read paths skip
+   rows with deleted_at, so the set or user is gone for the API at once.
+2. after the response (BackgroundTasks): purge_set / purge_user delete the
+   children PURGE_CHUNK rows per transaction, then the row itself.
+
+A purge interrupted by a restart is finished at the next server start
+(purge_on_startup(), in a daemon thread) or by `python purge_deleted.py`;
+partial indexes on deleted_at (migration 0015) find the pending rows.
+`python check_purge.py` checks both paths leave no rows behind.
+
+Configuration (env):
+- SOFT_DELETE_MIN_ROWS=<n> (default 20000, 0 = always delete at once)
+- PURGE_CHUNK=<n>          (default 2000)
+- PURGE_ON_STARTUP=true|false (default true)
+"""
+import os
+import threading
+
+from fastapi import BackgroundTasks
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import models, statements
+from app.pagination import invalidate_counts
+
+SOFT_DELETE_MIN_ROWS = int(os.getenv("SOFT_DELETE_MIN_ROWS", "20000"))
+PURGE_CHUNK = int(os.getenv("PURGE_CHUNK", "2000"))
+PURGE_ON_STARTUP = os.getenv("PURGE_ON_STARTUP", "true").lower() in ("true", "1", "yes")
+
+def count_up_to(db: Session, ids, limit: int) -> int:
+    """Number of rows of a select of ids, counting no further than `limit`"""
+    return db.scalar(select(func.count()).select_from(ids.limit(limit).subquery()))
+
+def _reaches(db: Session, queries, limit: int) -> bool:
+    """True when the queries together return at least `limit` rows (bounded counts)"""
+    total = 0
+    for ids in queries:
+        total += count_up_to(db, ids, limit - total)
+        if total >= limit:
+            return True
+    return False
+
+def _card_ids(set_ids):
+    return select(models.Flashcard.id).where(models.Flashcard.set_id.in_(set_ids))
+
+def _record_ids_of_cards(set_ids):
+    return (
+        select(models.StudyRecord.id)
+        .join(models.Flashcard, models.Flashcard.id == models.StudyRecord.flashcard_id)
+        .where(models.Flashcard.set_id.in_(set_ids))
+    )
+
+def _owned_set_ids(user_id: int):
+    return select(models.FlashcardSet.id).where(models.FlashcardSet.owner_id == user_id)
+
+def is_large_set(db: Session, set_id: int) -> bool:
+    return SOFT_DELETE_MIN_ROWS > 0 and _reaches(
+        db, [_card_ids([set_id]), _record_ids_of_cards([set_id])], SOFT_DELETE_MIN_ROWS
+    )
+
+def is_large_user(db: Session, user_id: int) -> bool:
+    own_sets = _owned_set_ids(user_id)
+    return SOFT_DELETE_MIN_ROWS > 0 and _reaches(db, [
+        select(models.StudyRecord.id).where(models.StudyRecord.user_id == user_id),
+        _card_ids(own_sets),
+        _record_ids_of_cards(own_sets),
+    ], SOFT_DELETE_MIN_ROWS)
+
+def delete_set(db: Session, db_set: models.FlashcardSet, background_tasks: BackgroundTasks) -> bool:
+    """Delete a set, no commit. Returns True when it was only soft-deleted: the purge
+    then runs in the background once the response is sent (after the caller's commit)."""
+    if not is_large_set(db, db_set.id):
+        db.delete(db_set)
+        return False
+    db_set.deleted_at = func.now()
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": db_set.id})
+    background_tasks.add_task(purge_set, db_set.id)
+    return True
+
+def delete_user(db: Session, user: models.User, background_tasks: BackgroundTasks) -> bool:
+    """Delete a user with their sets, no commit. Returns True when soft-deleted
+    (deactivated, sets hidden) and purged in the background."""
+    if not is_large_user(db, user.id):
+        db.delete(user)
+        return False
+    user.is_active = False
+    user.deleted_at = func.now()
+    db.execute(
+        update(models.FlashcardSet)
+        .where(models.FlashcardSet.owner_id == user.id, models.FlashcardSet.deleted_at.is_(None))
+        .values(deleted_at=func.now(), version=models.FlashcardSet.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    background_tasks.add_task(purge_user, user.id)
+    return True
+
+def delete_in_chunks(db: Session, model, ids) -> int:
+    """Delete the rows of `model` whose id is in the select `ids`, PURGE_CHUNK rows
+    per transaction (each one short, so other writers get in between)"""
+    total = 0
+    while True:
+        deleted = db.execute(
+            delete(model)
+            .where(model.id.in_(ids.limit(PURGE_CHUNK)))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < PURGE_CHUNK:
+            return total
+
+def _purge_set(db: Session, set_id: int) -> int:
+    # Study record trước, rồi thẻ: mỗi DELETE chỉ cascade tới một phần nhỏ
+    delete_in_chunks(db, models.StudyRecord, _record_ids_of_cards([set_id]))
+    cards = delete_in_chunks(db, models.Flashcard, _card_ids([set_id]))
+    # Còn lại study_sessions (cascade, ít dòng)
+    db.execute(delete(models.FlashcardSet).where(models.FlashcardSet.id == set_id))
+    db.commit()
+    return cards
+
+def purge_set(set_id: int):
+    """BackgroundTasks entry point: delete a soft-deleted set in chunks, in its own session"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        cards = _purge_set(db, set_id)
+        print(f"🧹 Purged set {set_id} ({cards} cards)")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Purge set {set_id} thất bại: {e}")
+    finally:
+        db.close()
+
+def purge_user(user_id: int):
+    """BackgroundTasks entry point: delete a soft-deleted user, their sets and study records in chunks"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        set_ids = db.scalars(_owned_set_ids(user_id)).all()
+        for set_id in set_ids:
+            _purge_set(db, set_id)
+        records = delete_in_chunks(
+            db, models.StudyRecord, select(models.StudyRecord.id).where(models.StudyRecord.user_id == user_id)
+        )
+        # Phần còn lại (sessions, leaderboard, notifications, refresh tokens, reports) do cascade xóa
+        db.execute(delete(models.User).where(models.User.id == user_id))
+        db.commit()
+        invalidate_counts("users:")
+        print(f"🧹 Purged user {user_id} ({len(set_ids)} sets, {records} study records)")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Purge user {user_id} thất bại: {e}")
+    finally:
+        db.close()
+
+def purge_deleted() -> int:
+    """Finish every pending purge (e.g. interrupted by a restart). Returns the number of sets + users purged."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user_ids = db.scalars(select(models.User.id).where(models.User.deleted_at.is_not(None))).all()
+        set_ids = db.scalars(
+            select(models.FlashcardSet.id).where(
+                models.FlashcardSet.deleted_at.is_not(None),
+                models.FlashcardSet.owner_id.not_in(user_ids)
+            )
+        ).all()
+    finally:
+        db.close()
+    for set_id in set_ids:
+        purge_set(set_id)
+    for user_id in user_ids:
+        purge_user(user_id)
+    return len(set_ids) + len(user_ids)
+
+def purge_on_startup():
+    """Run purge_deleted() in a daemon thread. Each chunk is its own transaction, so a
+    shutdown in the middle only leaves the rest for the next start."""
+    if PURGE_ON_STARTUP:
+        threading.Thread(target=purge_deleted, name="purge-deleted", daemon=True).start()
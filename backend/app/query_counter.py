@@ -0,0 +1,118 @@
+"""
+Per-request SQL query counter and N+1 detector
+
+SQLAlchemy engine events count every statement executed (all engines: sync,
+async, read replica) and the time spent in the database. In debug mode
+(SQL_DEBUG=true) the middleware adds to every response:
+
+- X-DB-Queries: number of statements
+- X-DB-Time: total database time in ms
+- X-DB-N-Plus-One: repetitions of the most repeated statement, when it reaches
+  N_PLUS_ONE_THRESHOLD (the same SQL with different parameters, e.g. one query
+  per row in a loop) - the statement is also printed to the log
+
+Query budgets in tests / scripts:
+
+    from app.query_counter import assert_max_queries
+
+    with assert_max_queries(5):
+        client.get("/api/admin/users", headers=headers)
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+
+SQL_DEBUG = os.getenv("SQL_DEBUG", "false").lower() in ("true", "1", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_time: float = 0.0  # seconds
+    statements: Counter = field(default_factory=Counter)  # {sql: executions}
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """Statements executed at least `threshold` times, most repeated first"""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+# Stats của request hiện tại (contextvar -> đúng cả khi route sync chạy trong threadpool)
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+# Bộ đếm toàn process cho count_queries() (TestClient chạy app ở thread khác)
+_captures: List[QueryStats] = []
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Lưu trên execution context (một cho mỗi statement): statement lỗi thì
+    # after_cursor_execute không chạy, giá trị bị bỏ cùng context thay vì tồn trong conn.info
+    context._query_start_time = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start_time
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for capture in _captures:
+        capture.record(statement, elapsed)
+
+async def query_stats_middleware(request: Request, call_next):
+    """Attach X-DB-* headers and log N+1 patterns (only when SQL_DEBUG is on)"""
+    if not SQL_DEBUG:
+        return await call_next(request)
+
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_stats.reset(token)
+
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time"] = f"{stats.total_time * 1000:.1f}"
+    repeated = stats.repeated()
+    if repeated:
+        sql, n = repeated[0]
+        response.headers["X-DB-N-Plus-One"] = str(n)
+        print(f"⚠️  N+1 nghi vấn: {request.method} {request.url.path} chạy {n} lần: {' '.join(sql.split())[:200]}")
+    return response
+
+@contextmanager
+def count_queries():
+    """Count every statement executed in this process while the block runs"""
+    stats = QueryStats()
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+@contextmanager
+def assert_max_queries(max_queries: int, n_plus_one_threshold: Optional[int] = None):
+    """Fail with AssertionError if the block runs more than `max_queries` statements.
+
+    With n_plus_one_threshold, also fail if one statement repeats that many times.
+    """
+    with count_queries() as stats:
+        yield stats
+    problems = []
+    if stats.count > max_queries:
+        problems.append(f"{stats.count} queries > budget {max_queries}")
+    if n_plus_one_threshold is not None:
+        for sql, n in stats.repeated(n_plus_one_threshold):
+            problems.append(f"repeated {n}x: {' '.join(sql.split())[:200]}")
+    if problems:
+        listing = "\n".join(f"  {n}x {' '.join(sql.split())[:200]}" for sql, n in stats.statements.most_common())
+        raise AssertionError("; ".join(problems) + "\n" + listing)
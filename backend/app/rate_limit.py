@@ -0,0 +1,239 @@
+"""
+Token-bucket rate limiting for expensive endpoints (login, register, AI, import)
+
+Usage in a router:
+
+    @router.post("/login", dependencies=[Depends(rate_limit("login"))])
+
+Each policy is a bucket of `capacity` tokens refilled over `period` seconds,
+keyed by client IP (anonymous endpoints) or by user id (authenticated ones).
+
+Backends:
+- memory: per-process dict, fine for a single uvicorn worker
+- database: shared table `rate_limit_buckets`, for several workers/instances
+  (SQLite or PostgreSQL, updated with one atomic conditional UPDATE). Every
+  CLEANUP_EVERY calls, up to CLEANUP_BATCH idle (so full again) buckets are deleted.
+
+Configuration (env):
+- RATE_LIMIT_ENABLED=true|false
+- RATE_LIMIT_BACKEND=memory|database
+- RATE_LIMIT_TRUST_PROXY=true|false  (use X-Forwarded-For, e.g. on Render)
+- RATE_LIMIT_<POLICY>=capacity/period_seconds, e.g. RATE_LIMIT_LOGIN=10/60
+
+Allowed/limited counters per policy: rate_limit_requests_total in /api/metrics,
+and GET /api/admin/perf/rate-limits.
+"""
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import auth, models
+from app.database import engine
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    capacity: int  # Max burst
+    period: float  # Seconds to refill the whole bucket
+    key: str = "ip"  # 'ip' or 'user'
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.period
+
+# Default policies - có thể override bằng biến môi trường RATE_LIMIT_<NAME>
+DEFAULT_POLICIES = {
+    "login": Policy("login", capacity=10, period=60, key="ip"),
+    "register": Policy("register", capacity=5, period=3600, key="ip"),
+    "refresh": Policy("refresh", capacity=30, period=60, key="ip"),
+    "ai_generate": Policy("ai_generate", capacity=10, period=3600, key="user"),
+    "import": Policy("import", capacity=20, period=3600, key="user"),
+}
+
+def _parse_policy(default: Policy) -> Policy:
+    raw = os.getenv(f"RATE_LIMIT_{default.name.upper()}")
+    if not raw:
+        return default
+    try:
+        capacity, period = raw.split("/")
+        return Policy(default.name, capacity=int(capacity), period=float(period), key=default.key)
+    except ValueError:
+        print(f"⚠️  Invalid RATE_LIMIT_{default.name.upper()}={raw!r}, using default")
+        return default
+
+POLICIES: Dict[str, Policy] = {name: _parse_policy(p) for name, p in DEFAULT_POLICIES.items()}
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("true", "1", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("true", "1", "yes")
+
+class MemoryBackend:
+    """In-process buckets: {key: (tokens, updated_at)}"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, policy: Policy, now: float) -> Tuple[bool, float]:
+        """Take one token. Returns (allowed, tokens_left)"""
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(policy.capacity), now))
+            tokens = min(float(policy.capacity), tokens + (now - updated_at) * policy.refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            # Tránh dict phình to vô hạn: dọn các bucket không dùng lâu (chắc chắn đã đầy lại)
+            if len(self._buckets) > 10000:
+                self._evict_stale(now)
+            return allowed, tokens
+
+    def _evict_stale(self, now: float):
+        max_period = max(p.period for p in POLICIES.values())
+        stale = [k for k, (_, updated_at) in self._buckets.items() if now - updated_at > max_period]
+        for k in stale:
+            del self._buckets[k]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+class DatabaseBackend:
+    """Buckets shared through the `rate_limit_buckets` table"""
+
+    CLEANUP_EVERY = 1000
+    CLEANUP_BATCH = 1000
+
+    def __init__(self):
+        self._calls = itertools.count(1)
+
+    def consume(self, key: str, policy: Policy, now: float) -> Tuple[bool, float]:
+        table = models.RateLimitBucket.__table__
+        if next(self._calls) % self.CLEANUP_EVERY == 0:
+            self._delete_stale(now)
+        capacity = float(policy.capacity)
+        refilled = table.c.tokens + (now - table.c.updated_at) * policy.refill_rate
+        current = case((refilled > capacity, capacity), else_=refilled)
+
+        with engine.begin() as conn:
+            # Atomic: only succeeds if the refilled bucket has at least one token
+            result = conn.execute(
+                update(table)
+                .where(table.c.key == key, current >= 1)
+                .values(tokens=current - 1, updated_at=now)
+                .returning(table.c.tokens)
+            ).first()
+            if result is not None:
+                return True, result[0]
+
+            tokens = conn.execute(select(current).where(table.c.key == key)).scalar()
+        if tokens is not None:
+            return False, tokens
+
+        # First request for this key
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(table).values(key=key, tokens=capacity - 1, updated_at=now))
+            return True, capacity - 1
+        except IntegrityError:
+            # Another worker inserted the row concurrently - retry through the UPDATE path
+            return self.consume(key, policy, now)
+
+    def _delete_stale(self, now: float):
+        # Bucket không dùng quá max period đã đầy lại: xóa đi = bucket mới, không đổi hành vi
+        table = models.RateLimitBucket.__table__
+        max_period = max(p.period for p in POLICIES.values())
+        stale = select(table.c.key).where(table.c.updated_at < now - max_period).limit(self.CLEANUP_BATCH)
+        try:
+            with engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.key.in_(stale)))
+        except Exception as e:
+            print(f"⚠️  Dọn rate_limit_buckets thất bại: {e}")
+
+    def reset(self):
+        with engine.begin() as conn:
+            conn.execute(models.RateLimitBucket.__table__.delete())
+
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = DatabaseBackend() if RATE_LIMIT_BACKEND == "database" else MemoryBackend()
+    return _backend
+
+# Metrics: {(policy, 'allowed'|'limited'): count}
+_metrics: Counter = Counter()
+
+def get_metrics() -> dict:
+    """Snapshot of allowed/limited request counts per policy"""
+    result = {}
+    for name, policy in POLICIES.items():
+        result[name] = {
+            "capacity": policy.capacity,
+            "period_seconds": policy.period,
+            "key": policy.key,
+            "allowed": _metrics[(name, "allowed")],
+            "limited": _metrics[(name, "limited")],
+        }
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "backend": RATE_LIMIT_BACKEND,
+        "policies": result,
+    }
+
+def get_client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # Proxy (Render) appends the real client IP at the end, earlier entries can be spoofed
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+def check_rate_limit(policy: Policy, identity: str, response: Optional[Response] = None):
+    """Consume one token for `identity`, raise 429 when the bucket is empty"""
+    if not RATE_LIMIT_ENABLED:
+        return
+    allowed, tokens = get_backend().consume(f"{policy.name}:{identity}", policy, time.time())
+    if not allowed:
+        _metrics[(policy.name, "limited")] += 1
+        retry_after = max(1, math.ceil((1 - tokens) / policy.refill_rate))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again later",
+            headers={
+                "Retry-After": str(retry_after),
+                "X-RateLimit-Limit": str(policy.capacity),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+    _metrics[(policy.name, "allowed")] += 1
+    if response is not None:
+        response.headers["X-RateLimit-Limit"] = str(policy.capacity)
+        response.headers["X-RateLimit-Remaining"] = str(int(tokens))
+
+def rate_limit(policy_name: str):
+    """Build a FastAPI dependency enforcing the named policy"""
+    policy = POLICIES[policy_name]
+
+    if policy.key == "user":
+        def dependency(
+            request: Request,
+            response: Response,
+            current_user: models.User = Depends(auth.get_current_user)
+        ):
+            check_rate_limit(policy, f"user:{current_user.id}", response)
+    else:
+        def dependency(request: Request, response: Response):
+            check_rate_limit(policy, f"ip:{get_client_ip(request)}", response)
+
+    return dependency
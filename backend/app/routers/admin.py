@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, UploadFile, File
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session, joinedload
-from typing import List
-from app.database import get_db
-from app import models, schemas, auth
+from typing import List, Optional
+from app.database import get_db, get_read_db
+from app import models, schemas, auth, statements, catalog, purge
 from pathlib import Path
 import time
 from app.schemas import UserResponse
 from app.routers.notifications import create_notification
+from app import rate_limit, slow_queries, profiling
+from app.pagination import paginate, estimated_count, invalidate_counts, set_pagination_headers
 
 router = APIRouter()
 
@@ -38,26 +41,37 @@ def get_admins(
 
 @router.get("/users", response_model=dict)
 def get_users(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     current_user: models.User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all users (admin only)"""
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    total = db.query(models.User).count()
-    
-    # Get last active date for each user from study_sessions
     from sqlalchemy import func
     from app.models import StudySession
     
+    # Last active date = most recent study session, in the same query (no per-user lookup)
+    last_active = (
+        db.query(StudySession.user_id, func.max(StudySession.started_at).label("last_active"))
+        .group_by(StudySession.user_id)
+        .subquery()
+    )
+    rows, next_cursor = paginate(
+        db.query(models.User, last_active.c.last_active)
+        .outerjoin(last_active, last_active.c.user_id == models.User.id)
+        .filter(models.User.deleted_at.is_(None)),
+        limit, cursor,
+        row_key=lambda row: (row[0].id, row[0].id)
+    )
+    # Ước lượng cả bảng (reltuples trên PostgreSQL, không WHERE) trừ các user chờ purge
+    # (ít dòng, partial index ix_users_deleted_at)
+    pending_purge = estimated_count(db, db.query(models.User).filter(models.User.deleted_at.is_not(None)), "users:deleted")
+    total = max(0, estimated_count(db, db.query(models.User), "users:all") - pending_purge)
+    set_pagination_headers(response, next_cursor, total)
+    
     users_with_activity = []
-    for user in users:
-        # Get most recent study session
-        last_session = db.query(StudySession).filter(
-            StudySession.user_id == user.id
-        ).order_by(StudySession.started_at.desc()).first()
-        
+    for user, user_last_active in rows:
         user_dict = {
             "id": user.id,
             "username": user.username,
@@ -65,14 +79,15 @@ def get_users(
             "is_active": user.is_active,
             "is_admin": user.is_admin,
             "created_at": user.created_at,
-            "last_active": last_session.started_at if last_session else None
+            "last_active": user_last_active
         }
         users_with_activity.append(user_dict)
     
     return {
         "users": users_with_activity,
         "total": total,
-        "count": len(users_with_activity)
+        "count": len(users_with_activity),
+        "next_cursor": next_cursor
     }
 
 @router.get("/users/{user_id}", response_model=UserResponse)
@@ -82,7 +97,7 @@ def get_user(
     db: Session = Depends(get_db)
 ):
     """Get user by ID (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.query(models.User).filter(models.User.id == user_id, models.User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,11 +108,12 @@ def get_user(
 @router.delete("/users/{user_id}")
 def delete_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Delete user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.query(models.User).filter(models.User.id == user_id, models.User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,8 +126,13 @@ def delete_user(
             detail="Cannot delete yourself"
         )
     
-    db.delete(user)
+    # Bộ thẻ, tiến độ học, thông báo...: ON DELETE CASCADE; user nặng được purge ở background
+    purge.delete_user(db, user, background_tasks)
     db.commit()
+    # Bộ thẻ public của user bị xóa cùng
+    invalidate_counts("sets:")
+    invalidate_counts("users:")
+    catalog.invalidate_catalog()
     return {"message": "User deleted successfully"}
 
 @router.put("/users/{user_id}", response_model=UserResponse)
@@ -122,7 +143,7 @@ def update_user(
     db: Session = Depends(get_db)
 ):
     """Update user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.query(models.User).filter(models.User.id == user_id, models.User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,6 +204,8 @@ def update_user(
         user.is_admin = user_update["is_admin"]
     
     db.commit()
+    if "username" in user_update:
+        catalog.invalidate_catalog()  # owner_username trong catalog
     db.refresh(user)
     return user
 
@@ -195,7 +218,7 @@ async def upload_user_avatar(
 ):
     """Upload avatar for a user (admin only)"""
     # Get the target user
-    target_user = db.query(models.User).filter(models.User.id == user_id).first()
+    target_user = db.query(models.User).filter(models.User.id == user_id, models.User.deleted_at.is_(None)).first()
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -242,20 +265,19 @@ async def upload_user_avatar(
 
 @router.get("/sets", response_model=List[schemas.FlashcardSetResponse])
 def get_all_sets(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     current_user: models.User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all flashcard sets (admin only) - for management purposes"""
-    query = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner))
-    sets = query.offset(skip).limit(limit).all()
-    
-    # Add username to each set
-    for set_item in sets:
-        if set_item.owner:
-            set_item.owner_username = set_item.owner.username
+    from app.routers.flashcards import fetch_sets_with_stats
     
+    query = db.query(models.FlashcardSet).filter(models.FlashcardSet.deleted_at.is_(None))
+    total = estimated_count(db, query, "sets:all")
+    sets, next_cursor = fetch_sets_with_stats(query, limit, cursor)
+    set_pagination_headers(response, next_cursor, total)
     return sets
 
 @router.put("/sets/{set_id}/approve", response_model=schemas.FlashcardSetResponse)
@@ -266,13 +288,14 @@ def approve_flashcard_set(
 ):
     """Approve a flashcard set (admin only)"""
     db_set = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner)).filter(
-        models.FlashcardSet.id == set_id
+        models.FlashcardSet.id == set_id, models.FlashcardSet.deleted_at.is_(None)
     ).first()
     
     if not db_set:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     db_set.status = 'approved'
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": db_set.id})
     db.flush()
     
     # Create notification for set owner
@@ -288,6 +311,7 @@ def approve_flashcard_set(
         )
     
     db.commit()
+    catalog.invalidate_catalog()
     db.refresh(db_set)
     
     # Add username
@@ -304,13 +328,14 @@ def reject_flashcard_set(
 ):
     """Reject a flashcard set (admin only)"""
     db_set = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner)).filter(
-        models.FlashcardSet.id == set_id
+        models.FlashcardSet.id == set_id, models.FlashcardSet.deleted_at.is_(None)
     ).first()
     
     if not db_set:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     db_set.status = 'rejected'
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": db_set.id})
     db.flush()
     
     # Create notification for set owner
@@ -326,6 +351,7 @@ def reject_flashcard_set(
         )
     
     db.commit()
+    catalog.invalidate_catalog()
     db.refresh(db_set)
     
     # Add username
@@ -338,7 +364,7 @@ def reject_flashcard_set(
 def get_recent_activities(
     limit: int = 20,
     current_user: models.User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get recent activities from users (admin only)"""
     from sqlalchemy import desc
@@ -348,7 +374,7 @@ def get_recent_activities(
     # Get recently created decks
     recent_decks = db.query(models.FlashcardSet).options(
         joinedload(models.FlashcardSet.owner)
-    ).order_by(desc(models.FlashcardSet.created_at)).limit(limit // 3).all()
+    ).filter(models.FlashcardSet.deleted_at.is_(None)).order_by(desc(models.FlashcardSet.created_at)).limit(limit // 3).all()
     
     for deck in recent_decks:
         activities.append({
@@ -403,7 +429,7 @@ def get_recent_activities(
 def get_user_growth_stats(
     days: int = 30,
     current_user: models.User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user growth statistics over time (admin only)"""
     from datetime import datetime, timedelta
@@ -497,7 +523,7 @@ def get_user_growth_stats(
 @router.get("/stats/cards-created", response_model=dict)
 def get_cards_created_stats(
     current_user: models.User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get statistics about cards created (admin only)"""
     from sqlalchemy import func
@@ -525,7 +551,9 @@ def get_cards_created_stats(
     ).scalar() or 0
     
     # Cards per deck (average)
-    total_decks = db.query(func.count(models.FlashcardSet.id)).scalar() or 1
+    total_decks = db.query(func.count(models.FlashcardSet.id)).filter(
+        models.FlashcardSet.deleted_at.is_(None)
+    ).scalar() or 1
     avg_cards_per_deck = round(total_cards / total_decks, 1) if total_decks > 0 else 0
     
     return {
@@ -537,3 +565,46 @@ def get_cards_created_stats(
         "total_decks": total_decks
     }
 
+@router.get("/perf/rate-limits", response_model=dict)
+def get_rate_limit_metrics(
+    current_user: models.User = Depends(require_admin)
+):
+    """Get rate limiter policies and allowed/limited counters (admin only)"""
+    return rate_limit.get_metrics()
+
+@router.get("/perf/slow-queries", response_model=dict)
+def get_slow_queries(
+    limit: int = 50,
+    current_user: models.User = Depends(require_admin)
+):
+    """Get the most recent slow SQL statements with their query plans (admin only)"""
+    return slow_queries.get_slow_queries(limit)
+
+@router.delete("/perf/slow-queries")
+def clear_slow_queries(
+    current_user: models.User = Depends(require_admin)
+):
+    """Clear the slow-query buffer and cached plans (admin only)"""
+    slow_queries.clear_slow_queries()
+    return {"message": "Slow-query log cleared"}
+
+@router.get("/perf/profiles", response_model=List[dict])
+def get_profiles(
+    current_user: models.User = Depends(require_admin)
+):
+    """List stored request profiles, newest first (admin only)"""
+    return profiling.list_profiles()
+
+@router.get("/perf/profiles/{profile_id}", response_class=PlainTextResponse)
+def download_profile(
+    profile_id: str,
+    current_user: models.User = Depends(require_admin)
+):
+    """Download a request profile as collapsed stacks (admin only)"""
+    collapsed = profiling.get_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'}
+    )
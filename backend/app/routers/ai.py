@@ -3,26 +3,37 @@ import csv
 import io
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas, auth
-from app.schemas import AIGenerateRequest, ImportRequest
+from app import models, schemas, auth, statements, catalog, dedup
+from app.schemas import AIGenerateRequest, ImportRequest, FlashcardCreate
 from app.routers.notifications import create_notification
+from app.routers.flashcards import insert_cards
+from app.rate_limit import rate_limit
 import os
-from openai import OpenAI
 
 router = APIRouter()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) if os.getenv("OPENAI_API_KEY") else None
+# OpenAI client được tạo lần đầu khi cần (import openai mất vài trăm ms)
+_client = None
 
-@router.post("/generate")
+def get_openai_client():
+    """Return the shared OpenAI client, or None if OPENAI_API_KEY is not set"""
+    global _client
+    if _client is None and os.getenv("OPENAI_API_KEY"):
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+@router.post("/generate", dependencies=[Depends(rate_limit("ai_generate"))])
 def generate_flashcards(
     request: AIGenerateRequest,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Generate flashcards using AI"""
+    client = get_openai_client()
     if not client:
         raise HTTPException(
             status_code=500,
@@ -68,7 +79,7 @@ Make sure the flashcards are educational and cover important aspects of {request
             detail=f"Error generating flashcards: {str(e)}"
         )
 
-@router.post("/import")
+@router.post("/import", dependencies=[Depends(rate_limit("import"))])
 def import_flashcards(
     request: ImportRequest,
     current_user: models.User = Depends(auth.get_current_user),
@@ -78,10 +89,12 @@ def import_flashcards(
     
     If set_id is provided, import to existing set.
     If set_id is None, create new set with title, description, and is_public.
+    duplicates: what to do with cards whose front is already in the set (skip, update, keep)
     """
+    duplicates = dedup.check_mode(request.duplicates)
     # If set_id is provided, use existing set
     if request.set_id:
-        db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == request.set_id).first()
+        db_set = db.execute(statements.SET_BY_ID, {"set_id": request.set_id}).scalars().first()
         if not db_set:
             raise HTTPException(status_code=404, detail="Flashcard set not found")
         
@@ -137,13 +150,7 @@ def import_flashcards(
             if isinstance(data, list):
                 for item in data:
                     if "front" in item and "back" in item:
-                        card = models.Flashcard(
-                            set_id=set_id,
-                            front=item["front"],
-                            back=item["back"]
-                        )
-                        db.add(card)
-                        flashcards_created.append(card)
+                        flashcards_created.append(FlashcardCreate(front=str(item["front"]), back=str(item["back"])))
         except json.JSONDecodeError:
             # Try to parse as CSV
             csv_reader = csv.DictReader(io.StringIO(request.file_content))
@@ -152,23 +159,29 @@ def import_flashcards(
                 back = row.get("back") or row.get("Back") or row.get("answer") or row.get("Answer")
                 
                 if front and back:
-                    card = models.Flashcard(
-                        set_id=set_id,
-                        front=front,
-                        back=back
-                    )
-                    db.add(card)
-                    flashcards_created.append(card)
+                    flashcards_created.append(FlashcardCreate(front=front, back=back))
         
+        # Thẻ trùng (đã có trong bộ thẻ hoặc lặp trong file): một IN query mỗi chunk
+        new_cards, updates, skipped = dedup.resolve_duplicates(db, set_id, flashcards_created, duplicates)
+        # Một INSERT nhiều dòng cho toàn bộ thẻ mới
+        insert_cards(db, set_id, new_cards)
+        if updates:
+            db.execute(update(models.Flashcard), updates)
+        db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
         db.commit()
+        if db_set.is_public and db_set.status == 'approved':
+            catalog.invalidate_catalog()
         db.refresh(db_set)
         
         # Verify final status after commit
         print(f"✅ Final status after commit (import text): set_id={db_set.id}, status={db_set.status}, is_public={db_set.is_public}")
         
         return {
-            "message": f"Successfully imported {len(flashcards_created)} flashcards",
-            "count": len(flashcards_created),
+            "message": f"Successfully imported {len(new_cards)} flashcards"
+                       + (f" ({len(updates)} updated, {skipped} duplicates skipped)" if updates or skipped else ""),
+            "count": len(new_cards),
+            "updated": len(updates),
+            "skipped": skipped,
             "set_id": set_id,
             "set": {
                 "id": db_set.id,
@@ -186,13 +199,14 @@ def import_flashcards(
             detail=f"Error importing flashcards: {str(e)}"
         )
 
-@router.post("/import/file")
+@router.post("/import/file", dependencies=[Depends(rate_limit("import"))])
 async def import_flashcards_from_file(
     file: UploadFile = File(...),
     set_id: Optional[int] = Form(None),
     title: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     is_public: str = Form("false"),  # Accept string to handle FormData properly
+    duplicates: str = Form("skip"),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -200,13 +214,15 @@ async def import_flashcards_from_file(
     
     If set_id is provided, import to existing set.
     If set_id is None, create new set with title, description, and is_public.
+    duplicates: what to do with cards whose front is already in the set (skip, update, keep)
     """
+    dedup.check_mode(duplicates)
     # Convert is_public from string to boolean
     is_public_bool = is_public.lower() in ('true', '1', 'yes') if isinstance(is_public, str) else bool(is_public)
     
     # If set_id is provided, use existing set
     if set_id:
-        db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
+        db_set = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
         if not db_set:
             raise HTTPException(status_code=404, detail="Flashcard set not found")
         
@@ -278,13 +294,7 @@ async def import_flashcards_from_file(
                 if isinstance(data, list):
                     for item in data:
                         if "front" in item and "back" in item:
-                            card = models.Flashcard(
-                                set_id=set_id,
-                                front=item["front"],
-                                back=item["back"]
-                            )
-                            db.add(card)
-                            flashcards_created.append(card)
+                            flashcards_created.append(FlashcardCreate(front=str(item["front"]), back=str(item["back"])))
                 else:
                     raise HTTPException(
                         status_code=400,
@@ -304,28 +314,34 @@ async def import_flashcards_from_file(
                     back = row.get("back") or row.get("Back") or row.get("answer") or row.get("Answer")
                     
                     if front and back:
-                        card = models.Flashcard(
-                            set_id=set_id,
-                            front=front,
-                            back=back
-                        )
-                        db.add(card)
-                        flashcards_created.append(card)
+                        flashcards_created.append(FlashcardCreate(front=front, back=back))
             except Exception as e:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Error parsing CSV: {str(e)}"
                 )
         
+        # Thẻ trùng (đã có trong bộ thẻ hoặc lặp trong file): một IN query mỗi chunk
+        new_cards, updates, skipped = dedup.resolve_duplicates(db, set_id, flashcards_created, duplicates)
+        # Một INSERT nhiều dòng cho toàn bộ thẻ mới
+        insert_cards(db, set_id, new_cards)
+        if updates:
+            db.execute(update(models.Flashcard), updates)
+        db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
         db.commit()
+        if db_set.is_public and db_set.status == 'approved':
+            catalog.invalidate_catalog()
         db.refresh(db_set)
         
         # Verify final status after commit
         print(f"✅ Final status after commit (import file): set_id={db_set.id}, status={db_set.status}, is_public={db_set.is_public}")
         
         return {
-            "message": f"Successfully imported {len(flashcards_created)} flashcards",
-            "count": len(flashcards_created),
+            "message": f"Successfully imported {len(new_cards)} flashcards"
+                       + (f" ({len(updates)} updated, {skipped} duplicates skipped)" if updates or skipped else ""),
+            "count": len(new_cards),
+            "updated": len(updates),
+            "skipped": skipped,
             "set_id": set_id,
             "set": {
                 "id": db_set.id,
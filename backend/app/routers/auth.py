@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas, auth
-from app.schemas import LoginRequest, Token, UserResponse, UserCreate
+from app import models, schemas, auth, catalog
+from app.rate_limit import rate_limit
+from app.schemas import LoginRequest, Token, UserResponse, UserCreate, RefreshRequest
 import os
 import shutil
 from pathlib import Path
@@ -12,7 +13,7 @@ import time
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserResponse)
+@router.post("/register", response_model=UserResponse, dependencies=[Depends(rate_limit("register"))])
 def register(user: UserCreate, db: Session = Depends(get_db)):
     try:
         # Check if username exists
@@ -59,7 +60,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             detail=f"Error creating user: {str(e)}"
         )
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit("login"))])
 def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
@@ -72,11 +73,48 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    refresh_token, _ = auth.create_refresh_token(db, user.id)
+    db.commit()
+    return _issue_tokens(user, refresh_token)
+
+@router.post("/refresh", response_model=Token, dependencies=[Depends(rate_limit("refresh"))])
+def refresh_access_token(
+    refresh_data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access token (no password check, no bcrypt)"""
+    result = auth.rotate_refresh_token(db, refresh_data.refresh_token)
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user, new_refresh_token = result
+    db.commit()
+    return _issue_tokens(user, new_refresh_token)
+
+@router.post("/logout")
+def logout(
+    refresh_data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Revoke a refresh token"""
+    auth.revoke_refresh_token(db, refresh_data.refresh_token)
+    db.commit()
+    return {"message": "Logged out successfully"}
+
+def _issue_tokens(user: models.User, refresh_token: str) -> dict:
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds())
+    }
 
 @router.get("/me", response_model=UserResponse)
 def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
@@ -135,6 +173,8 @@ def update_profile(
         current_user.email = new_email
     
     db.commit()
+    if user_update.username is not None:
+        catalog.invalidate_catalog()  # owner_username trong catalog
     db.refresh(current_user)
     return current_user
 
@@ -154,6 +194,8 @@ def change_password(
     
     # Update password
     current_user.hashed_password = auth.get_password_hash(password_data.new_password)
+    # Log out other devices: old refresh tokens must not outlive the old password
+    auth.revoke_user_refresh_tokens(db, current_user.id)
     db.commit()
     
     return {"message": "Password changed successfully"}
@@ -1,17 +1,71 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
-from app.database import get_db
-from app import models, schemas, auth
+from sqlalchemy import Integer, or_, and_, delete, func, insert, literal, select, update
+from app.database import get_db, get_read_db
+from app import models, schemas, auth, statements, card_formats, search, catalog, ordering, purge
+from app.dedup import content_hash
 from app.schemas import (
     FlashcardSetResponse, FlashcardSetCreate, FlashcardSetUpdate, FlashcardSetWithCards,
-    FlashcardResponse, FlashcardCreate, FlashcardBase
+    FlashcardResponse, FlashcardCreate, FlashcardBase, FlashcardBulkCreate,
+    FlashcardBatchUpdate, FlashcardBatchResult, FlashcardReorder, SearchResponse
 )
 from app.routers.notifications import create_notification
+from app.pagination import (
+    MAX_PAGE_SIZE, decode_cursor, paginate, estimated_count, invalidate_counts, set_pagination_headers
+)
+from app.etags import conditional
 
 router = APIRouter()
 
+def with_stats(query, user_id: Optional[int] = None):
+    """FlashcardSet query that also loads the owner, card_count and (with user_id)
+    the user's last_studied_at in the same SELECT; rows go through unpack_stats()"""
+    columns = [statements.card_count_column()]
+    if user_id is not None:
+        columns.append(statements.last_studied_column(user_id))
+    return query.options(joinedload(models.FlashcardSet.owner)).add_columns(*columns)
+
+def fetch_sets_with_stats(query, limit: int, cursor: Optional[str], user_id: Optional[int] = None):
+    """Paginate a FlashcardSet query with_stats(). Returns (sets, next_cursor)."""
+    rows, next_cursor = paginate(
+        with_stats(query, user_id), limit, cursor,
+        row_key=lambda row: (row[0].id, row[0].id)
+    )
+    return unpack_stats(rows), next_cursor
+
+def unpack_stats(rows) -> List[models.FlashcardSet]:
+    sets = []
+    for set_item, card_count, *last_studied in rows:
+        set_item.card_count = card_count
+        set_item.last_studied_at = last_studied[0] if last_studied else None
+        # Add username and avatar_url
+        if set_item.owner:
+            set_item.owner_username = set_item.owner.username
+            set_item.owner_avatar_url = set_item.owner.avatar_url
+        sets.append(set_item)
+    return sets
+
+def insert_cards(db: Session, set_id: int, cards: List[FlashcardCreate]) -> List[models.Flashcard]:
+    """Insert cards into a set with one multi-row INSERT ... RETURNING (no commit).
+
+    Cards without an explicit `position` are appended after the last card, in order.
+    """
+    if not cards:
+        return []
+    position = ordering.next_position(db, set_id)
+    rows = []
+    for card in cards:
+        explicit = getattr(card, "position", None)
+        rows.append({"set_id": set_id, "front": card.front, "back": card.back, "content_hash": content_hash(card.front),
+                     "position": explicit if explicit is not None else position})
+        if explicit is None:
+            position += ordering.POSITION_GAP
+    # Không dùng sort_by_parameter_order: trên SQLite nó chuyển sang INSERT từng dòng.
+    # id tự tăng được cấp theo thứ tự VALUES nên sắp xếp theo id là đúng thứ tự gửi lên
+    db_cards = db.scalars(insert(models.Flashcard).returning(models.Flashcard), rows).all()
+    return sorted(db_cards, key=lambda card: card.id)
+
 @router.post("/sets", response_model=FlashcardSetResponse)
 def create_flashcard_set(
     set_data: FlashcardSetCreate,
@@ -22,8 +76,17 @@ def create_flashcard_set(
     Create a new flashcard set with approval logic:
     - Admin: Auto approved (bất kể public hay private)
     - Non-admin: Always pending (cần admin duyệt, bất kể public hay private)
-    This applies to ALL ways of creating sets (normal create, import file, etc.)
+    This applies to ALL ways of creating sets (normal create, import file, clone, etc.)
+    Optional `cards` are inserted in the same transaction as the set.
     """
+    db_set = add_set(db, current_user, **set_data.dict(exclude={"cards"}))
+    insert_cards(db, db_set.id, set_data.cards or [])
+    db.commit()
+    return created_set_response(db, db_set, len(set_data.cards or []))
+
+def add_set(db: Session, current_user: models.User, **fields) -> models.FlashcardSet:
+    """Add a set owned by current_user with the approval logic of create_flashcard_set
+    (plus the pending notification), flushed but not committed"""
     # Logic: 
     # - Admin: Auto approved (bất kể public hay private)
     # - Non-admin: Always pending (cần admin duyệt, bất kể public hay private)
@@ -34,42 +97,47 @@ def create_flashcard_set(
         status = 'pending'
         print(f"⏳ Non-admin created set - status: pending (needs admin review)")
     
-    print(f"📝 Creating set: title={set_data.title}, is_public={set_data.is_public}, status={status}, user_is_admin={current_user.is_admin}")
+    print(f"📝 Creating set: title={fields.get('title')}, is_public={fields.get('is_public')}, status={status}, user_is_admin={current_user.is_admin}")
     
     db_set = models.FlashcardSet(
-        **set_data.dict(),
+        **fields,
         owner_id=current_user.id,
         status=status
     )
     db.add(db_set)
     db.flush()  # Get the set_id
+    invalidate_counts("sets:")
     
     # Create notification if set is pending
     if status == 'pending':
-        from app.routers.notifications import create_notification
         create_notification(
             db=db,
             user_id=current_user.id,
             type='set_pending',
             title='Bộ thẻ đang chờ duyệt',
-            message=f'Bộ thẻ "{set_data.title}" của bạn đang chờ admin duyệt. Bạn sẽ nhận thông báo khi được duyệt.',
+            message=f'Bộ thẻ "{db_set.title}" của bạn đang chờ admin duyệt. Bạn sẽ nhận thông báo khi được duyệt.',
             item_id=db_set.id,
             action_path=f'/sets/{db_set.id}'
         )
-    
-    db.commit()
-    db.refresh(db_set)
+    return db_set
+
+def created_set_response(db: Session, db_set: models.FlashcardSet, card_count: int) -> models.FlashcardSet:
+    """After commit: invalidate the catalog if needed and reload the set with its owner"""
+    if db_set.is_public and db_set.status == 'approved':
+        catalog.invalidate_catalog()
     # Reload with owner relationship
     db_set = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner)).filter(models.FlashcardSet.id == db_set.id).first()
     # Add username and avatar_url
     if db_set.owner:
         db_set.owner_username = db_set.owner.username
         db_set.owner_avatar_url = db_set.owner.avatar_url
+    db_set.card_count = card_count
     return db_set
 
 @router.get("/sets", response_model=List[FlashcardSetResponse])
 def get_flashcard_sets(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
@@ -78,43 +146,50 @@ def get_flashcard_sets(
     Get flashcard sets for "My Decks" page:
     - All sets owned by current user (regardless of is_public status or status)
     - All public sets from other users (is_public = True) that are approved
+    Paginated by cursor: pass the X-Next-Cursor header of the previous page.
+    Public sets of other users come from the shared catalog cache (app/catalog.py),
+    only the user's own sets are queried.
     """
-    query = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner))
-    
-    # Get user's own sets (any status) OR public approved sets from other users
-    sets = query.filter(
-        or_(
-            # User's own sets (can be public or private, any status)
-            models.FlashcardSet.owner_id == current_user.id,
-            # Public sets from other users (must be approved)
-            and_(
-                models.FlashcardSet.is_public == True,
-                models.FlashcardSet.owner_id != current_user.id,
-                models.FlashcardSet.status == 'approved'
-            )
-        )
-    ).offset(skip).limit(limit).all()
-    
-    # Add username and avatar_url to each set
-    for set_item in sets:
-        if set_item.owner:
-            set_item.owner_username = set_item.owner.username
-            set_item.owner_avatar_url = set_item.owner.avatar_url
-    
-    return sets
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after_id = decode_cursor(cursor)[1] if cursor else 0
+    # User's own sets (can be public or private, any status)
+    own_query = db.query(models.FlashcardSet).filter(
+        models.FlashcardSet.owner_id == current_user.id, models.FlashcardSet.deleted_at.is_(None)
+    )
+    own_sets = unpack_stats(
+        with_stats(own_query, current_user.id)
+        .filter(models.FlashcardSet.id > after_id)
+        .order_by(models.FlashcardSet.id)
+        .limit(limit + 1)
+        .all()
+    )
+    # Public sets from other users (must be approved)
+    public = catalog.public_catalog(db)
+    page, next_cursor = catalog.merge_page(
+        [FlashcardSetResponse.model_validate(set_item).model_dump(mode="json") for set_item in own_sets],
+        public, current_user.id, after_id, limit
+    )
+    missing = [entry for entry in page if "card_count" not in entry]
+    filled = {entry["id"]: entry for entry in catalog.fill_stats(db, missing, current_user.id)}
+    page = [filled.get(entry["id"], entry) for entry in page]
+
+    total = estimated_count(db, own_query, f"sets:own:{current_user.id}") + public.visible_count(current_user.id)
+    set_pagination_headers(response, next_cursor, total)
+    return card_formats.render(card_formats.JSON, page, response)
 
 @router.get("/sets/my", response_model=List[FlashcardSetResponse])
 def get_my_flashcard_sets(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get current user's flashcard sets + public sets from other users (for 'My Decks' page)"""
     try:
-        query = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner))
         # Get user's own sets OR public sets from other users
-        sets = query.filter(
+        query = db.query(models.FlashcardSet).filter(
+            models.FlashcardSet.deleted_at.is_(None),
             or_(
                 models.FlashcardSet.owner_id == current_user.id,
                 and_(
@@ -122,28 +197,47 @@ def get_my_flashcard_sets(
                     models.FlashcardSet.owner_id != current_user.id
                 )
             )
-        ).offset(skip).limit(limit).all()
-        
-        # Add username and avatar_url to each set
-        for set_item in sets:
-            if set_item.owner:
-                set_item.owner_username = set_item.owner.username
-                set_item.owner_avatar_url = set_item.owner.avatar_url
-        
+        )
+        total = estimated_count(db, query, f"sets:my:{current_user.id}")
+        sets, next_cursor = fetch_sets_with_stats(query, limit, cursor, user_id=current_user.id)
+        set_pagination_headers(response, next_cursor, total)
         return sets
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching flashcard sets: {str(e)}"
         )
 
+@router.get("/search", response_model=SearchResponse)
+def search_flashcards(
+    q: str,
+    kind: Optional[str] = None,
+    limit: int = 20,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Full-text search in the sets and cards the user can access (app/search.py).
+    - q: words to find, the last one also matches as a prefix
+    - kind: "sets" or "cards" to search only one of them
+    """
+    if kind not in (None, "sets", "cards"):
+        raise HTTPException(status_code=400, detail="kind must be 'sets' or 'cards'")
+    if len(q) > 200:
+        raise HTTPException(status_code=400, detail="Query too long")
+    return search.search(db, q, current_user, max(1, min(limit, 100)), kind)
+
 @router.get("/sets/{set_id}", response_model=FlashcardSetWithCards)
 def get_flashcard_set(
     set_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    db_set = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner)).filter(models.FlashcardSet.id == set_id).first()
+    db_set = db.execute(statements.SET_WITH_OWNER, {"set_id": set_id}).scalars().first()
     if not db_set:
         print(f"❌ Flashcard set {set_id} not found in database")
         raise HTTPException(status_code=404, detail="Flashcard set not found")
@@ -160,13 +254,76 @@ def get_flashcard_set(
                 raise HTTPException(status_code=403, detail="Not authorized")
         # If owner, allow access regardless of status (so they can see their pending decks)
     
+    # 304 trước khi load thẻ: version đổi khi bộ thẻ/thẻ đổi, thông tin owner đã join sẵn
+    fmt = card_formats.negotiate(request, response)
+    not_modified = conditional(
+        request, response, "set", db_set.id, db_set.version, fmt,
+        getattr(db_set.owner, "username", None), getattr(db_set.owner, "avatar_url", None)
+    )
+    if not_modified:
+        return not_modified
+    
     # Add username and avatar_url
     if db_set.owner:
         db_set.owner_username = db_set.owner.username
         db_set.owner_avatar_url = db_set.owner.avatar_url
     
+    if fmt != card_formats.JSON:
+        cards = card_formats.card_columns(db, set_id)
+        db_set.card_count = cards["count"]
+        content = FlashcardSetResponse.model_validate(db_set).model_dump(mode="json")
+        content["flashcards"] = cards
+        return card_formats.render(fmt, content, response)
+    
+    # Thẻ đã load cho response, đếm không tốn query
+    db_set.card_count = len(db_set.flashcards)
+    
     return db_set
 
+@router.post("/sets/{set_id}/clone", response_model=FlashcardSetResponse)
+def clone_flashcard_set(
+    set_id: int,
+    overrides: Optional[FlashcardSetUpdate] = None,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Copy a set the user can view, with all its cards, into a new set owned by the user.
+    - Cards are copied inside the database by one INSERT ... SELECT (same order, no
+      round trip through the client), whatever the size of the set
+    - Same approval logic and notification as creating a set
+    - Optional body: title / description / is_public of the copy
+      (default: "<title> (bản sao)", same description, private)
+    """
+    source = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Flashcard set not found")
+    
+    # Giống GET /sets/{id}: admin, chủ bộ thẻ, hoặc bộ thẻ public đã duyệt
+    if not current_user.is_admin and source.owner_id != current_user.id:
+        if not source.is_public or source.status != 'approved':
+            raise HTTPException(status_code=403, detail="Not authorized")
+    
+    fields = {"title": f"{source.title} (bản sao)", "description": source.description, "is_public": False}
+    if overrides is not None:
+        fields.update({key: value for key, value in overrides.dict(exclude_unset=True).items() if value is not None})
+    db_set = add_set(db, current_user, **fields)
+    
+    copied = db.execute(
+        insert(models.Flashcard).from_select(
+            ["set_id", "front", "back", "position", "content_hash"],
+            select(
+                literal(db_set.id, Integer), models.Flashcard.front, models.Flashcard.back,
+                models.Flashcard.position, models.Flashcard.content_hash
+            )
+            .where(models.Flashcard.set_id == set_id)
+            .order_by(models.Flashcard.position, models.Flashcard.id)
+        )
+    ).rowcount
+    db.commit()
+    print(f"📄 Cloned set {set_id} -> {db_set.id} ({copied} cards)")
+    return created_set_response(db, db_set, copied)
+
 @router.put("/sets/{set_id}", response_model=FlashcardSetResponse)
 def update_flashcard_set(
     set_id: int,
@@ -174,7 +331,7 @@ def update_flashcard_set(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    db_set = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner)).filter(models.FlashcardSet.id == set_id).first()
+    db_set = db.execute(statements.SET_WITH_OWNER, {"set_id": set_id}).scalars().first()
     if not db_set:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
@@ -187,11 +344,13 @@ def update_flashcard_set(
     update_data = set_data.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_set, key, value)
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
     
     db.commit()
+    catalog.invalidate_catalog()
     db.refresh(db_set)
     # Reload with owner relationship
-    db_set = db.query(models.FlashcardSet).options(joinedload(models.FlashcardSet.owner)).filter(models.FlashcardSet.id == set_id).first()
+    db_set = db.execute(statements.SET_WITH_OWNER, {"set_id": set_id}).scalars().first()
     # Add username and avatar_url
     if db_set.owner:
         db_set.owner_username = db_set.owner.username
@@ -201,18 +360,22 @@ def update_flashcard_set(
 @router.delete("/sets/{set_id}")
 def delete_flashcard_set(
     set_id: int,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
+    db_set = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
     if not db_set:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     if db_set.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    db.delete(db_set)
+    # Thẻ, study record, session: ON DELETE CASCADE; bộ thẻ lớn được purge ở background
+    purge.delete_set(db, db_set, background_tasks)
     db.commit()
+    invalidate_counts("sets:")
+    catalog.invalidate_catalog()
     return {"message": "Flashcard set deleted"}
 
 @router.post("/sets/{set_id}/cards", response_model=FlashcardResponse)
@@ -222,26 +385,120 @@ def create_flashcard(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
+    db_set = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
     if not db_set:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     if db_set.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    db_card = models.Flashcard(**card.dict(), set_id=set_id)
+    db_card = models.Flashcard(
+        **card.dict(), set_id=set_id, position=ordering.next_position(db, set_id), content_hash=content_hash(card.front)
+    )
     db.add(db_card)
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
     db.commit()
     db.refresh(db_card)
     return db_card
 
+@router.post("/sets/{set_id}/cards/bulk", response_model=List[FlashcardResponse])
+def create_flashcards_bulk(
+    set_id: int,
+    data: FlashcardBulkCreate,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add many cards to a set in one request: one INSERT, one commit, all or nothing"""
+    db_set = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
+    if not db_set:
+        raise HTTPException(status_code=404, detail="Flashcard set not found")
+    
+    if db_set.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    # Serialize trước commit: commit expire các object, đọc lại sẽ SELECT từng thẻ
+    result = [FlashcardResponse.model_validate(card) for card in insert_cards(db, set_id, data.cards)]
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
+    db.commit()
+    return result
+
+@router.patch("/sets/{set_id}/cards", response_model=FlashcardBatchResult)
+def update_flashcards_batch(
+    set_id: int,
+    changes: FlashcardBatchUpdate,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply a batch of card edits to one set in a single transaction.
+
+    - upsert: cards with an id are updated, cards without one are created
+    - delete: ids of cards to delete (with their study records)
+    - positions: new positions of existing cards
+    Ownership is checked once; every id must belong to the set (404 otherwise).
+    """
+    db_set = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
+    if not db_set:
+        raise HTTPException(status_code=404, detail="Flashcard set not found")
+    
+    if db_set.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    updates = [card for card in changes.upsert if card.id is not None]
+    new_cards = [card for card in changes.upsert if card.id is None]
+    delete_ids = set(changes.delete)
+    referenced = {card.id for card in updates} | delete_ids | {move.id for move in changes.positions}
+    if delete_ids & ({card.id for card in updates} | {move.id for move in changes.positions}):
+        raise HTTPException(status_code=400, detail="A card cannot be updated and deleted in the same batch")
+    
+    # Một query kiểm tra mọi id thuộc bộ thẻ này
+    if referenced:
+        found = set(db.scalars(
+            select(models.Flashcard.id).where(
+                models.Flashcard.set_id == set_id, models.Flashcard.id.in_(referenced)
+            )
+        ))
+        missing = referenced - found
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Flashcards not found in this set: {sorted(missing)}")
+    
+    # ORM bulk UPDATE by primary key: executemany, không load object
+    rows = {}
+    for card in updates:
+        rows[card.id] = {"id": card.id, "front": card.front, "back": card.back, "content_hash": content_hash(card.front)}
+        if card.position is not None:
+            rows[card.id]["position"] = card.position
+    for move in changes.positions:
+        rows.setdefault(move.id, {"id": move.id})["position"] = move.position
+    # Nhóm theo tập cột để mỗi executemany có cùng tham số
+    by_columns = {}
+    for row in rows.values():
+        by_columns.setdefault(tuple(sorted(row)), []).append(row)
+    for group in by_columns.values():
+        db.execute(update(models.Flashcard), group)
+    
+    if delete_ids:
+        db.execute(delete(models.StudyRecord).where(models.StudyRecord.flashcard_id.in_(delete_ids)))
+        db.execute(delete(models.Flashcard).where(models.Flashcard.id.in_(delete_ids)))
+    
+    created = [FlashcardResponse.model_validate(card) for card in insert_cards(db, set_id, new_cards)]
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": set_id})
+    db.commit()
+    return FlashcardBatchResult(
+        created=created,
+        updated=len(updates),
+        deleted=len(delete_ids),
+        moved=len(changes.positions)
+    )
+
 @router.get("/sets/{set_id}/cards", response_model=List[FlashcardResponse])
 def get_flashcards(
     set_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
+    db_set = db.execute(statements.SET_BY_ID, {"set_id": set_id}).scalars().first()
     if not db_set:
         print(f"❌ Flashcard set {set_id} not found when fetching cards")
         raise HTTPException(status_code=404, detail="Flashcard set not found")
@@ -257,6 +514,14 @@ def get_flashcards(
                 print(f"❌ Access denied to cards: Set {set_id} - is_public={db_set.is_public}, status={db_set.status}, owner_id={db_set.owner_id}, current_user_id={current_user.id}")
                 raise HTTPException(status_code=403, detail="Not authorized")
     
+    fmt = card_formats.negotiate(request, response)
+    not_modified = conditional(request, response, "cards", db_set.id, db_set.version, fmt)
+    if not_modified:
+        return not_modified
+    
+    if fmt != card_formats.JSON:
+        return card_formats.render(fmt, card_formats.card_columns(db, set_id), response)
+    
     return db_set.flashcards
 
 @router.put("/cards/{card_id}", response_model=FlashcardResponse)
@@ -267,7 +532,8 @@ def update_flashcard(
     db: Session = Depends(get_db)
 ):
     db_card = db.query(models.Flashcard).filter(models.Flashcard.id == card_id).first()
-    if not db_card:
+    # Thẻ của bộ thẻ đã soft-delete (đang chờ purge, app/purge.py) coi như không còn
+    if not db_card or db_card.set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard not found")
     
     if db_card.set.owner_id != current_user.id:
@@ -275,8 +541,50 @@ def update_flashcard(
     
     for key, value in card.dict().items():
         setattr(db_card, key, value)
+    db_card.content_hash = content_hash(db_card.front)
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": db_card.set_id})
+    
+    db.commit()
+    db.refresh(db_card)
+    return db_card
+
+@router.post("/cards/{card_id}/move", response_model=FlashcardResponse)
+def move_flashcard(
+    card_id: int,
+    move: FlashcardReorder,
+    background_tasks: BackgroundTasks,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Move a card right after another card of the same set (after_id), or first (after_id null).
+    Only the moved card is written; when its neighbours have no gap left the set is
+    renumbered in the background (app/ordering.py).
+    """
+    db_card = db.query(models.Flashcard).filter(models.Flashcard.id == card_id).first()
+    if not db_card or db_card.set.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
+    
+    if db_card.set.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if move.after_id == card_id:
+        raise HTTPException(status_code=400, detail="A card cannot be moved after itself")
+    
+    ordering.lock_set(db, db_card.set_id)
+    after = None
+    if move.after_id is not None:
+        after = db.query(models.Flashcard).filter(
+            models.Flashcard.id == move.after_id, models.Flashcard.set_id == db_card.set_id
+        ).first()
+        if not after:
+            raise HTTPException(status_code=404, detail="Flashcard not found in this set")
     
+    renumber = ordering.move_card(db, db_card, after)
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": db_card.set_id})
     db.commit()
+    if renumber:
+        background_tasks.add_task(ordering.renumber_in_background, db_card.set_id)
     db.refresh(db_card)
     return db_card
 
@@ -287,7 +595,7 @@ def get_flashcard(
     db: Session = Depends(get_db)
 ):
     db_card = db.query(models.Flashcard).options(joinedload(models.Flashcard.set)).filter(models.Flashcard.id == card_id).first()
-    if not db_card:
+    if not db_card or db_card.set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard not found")
     
     # Admin can access any card, regular users can only access cards from their own sets or public sets
@@ -304,12 +612,13 @@ def delete_flashcard(
     db: Session = Depends(get_db)
 ):
     db_card = db.query(models.Flashcard).filter(models.Flashcard.id == card_id).first()
-    if not db_card:
+    if not db_card or db_card.set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard not found")
     
     if db_card.set.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    db.execute(statements.BUMP_SET_VERSION, {"set_id": db_card.set_id})
     db.delete(db_card)
     db.commit()
     return {"message": "Flashcard deleted"}
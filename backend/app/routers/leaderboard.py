@@ -1,27 +1,35 @@
 from typing import List
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.database import get_db
-from app import models, schemas, auth
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
+from app.database import get_async_read_db
+from app import models, schemas, auth, statements
 from app.schemas import LeaderboardEntry
 
 router = APIRouter()
 
 @router.get("/", response_model=List[LeaderboardEntry])
-def get_leaderboard(
+async def get_leaderboard(
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get top users from leaderboard"""
-    entries = db.query(models.Leaderboard).join(models.User).order_by(
-        desc(models.Leaderboard.points)
-    ).limit(limit).all()
+    entries = (await db.execute(
+        select(
+            models.User.username,
+            models.Leaderboard.points,
+            models.Leaderboard.total_study_time,
+            models.Leaderboard.total_cards_studied,
+            models.Leaderboard.streak_days
+        ).join(models.User).where(models.User.deleted_at.is_(None)).order_by(
+            desc(models.Leaderboard.points)
+        ).limit(limit)
+    )).all()
     
     result = []
     for entry in entries:
         result.append(LeaderboardEntry(
-            username=entry.user.username,
+            username=entry.username,
             points=entry.points,
             total_study_time=entry.total_study_time,
             total_cards_studied=entry.total_cards_studied,
@@ -31,14 +39,12 @@ def get_leaderboard(
     return result
 
 @router.get("/my-rank")
-def get_my_rank(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_rank(
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get current user's rank and stats"""
-    leaderboard = db.query(models.Leaderboard).filter(
-        models.Leaderboard.user_id == current_user.id
-    ).first()
+    leaderboard = (await db.execute(statements.LEADERBOARD_FOR_USER, {"user_id": current_user.id})).scalars().first()
     
     if not leaderboard:
         return {
@@ -50,10 +56,7 @@ def get_my_rank(
         }
     
     # Calculate rank
-    users_above = db.query(models.Leaderboard).filter(
-        models.Leaderboard.points > leaderboard.points
-    ).count()
-    rank = users_above + 1
+    rank = await db.scalar(statements.LEADERBOARD_RANK, {"points": leaderboard.points})
     
     return {
         "rank": rank,
@@ -62,4 +65,3 @@ def get_my_rank(
         "total_cards_studied": leaderboard.total_cards_studied,
         "streak_days": leaderboard.streak_days
     }
-
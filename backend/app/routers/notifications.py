@@ -1,15 +1,16 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
+from app.database import get_async_db
 from app import models, schemas, auth
 from app.schemas import NotificationResponse, NotificationItem, UserNotificationResponse, UserNotification
 from datetime import datetime
 
 router = APIRouter()
 
-def require_admin(current_user: models.User = Depends(auth.get_current_user)):
+async def require_admin(current_user: models.User = Depends(auth.get_current_user_async)):
     """Dependency to require admin access"""
     if not current_user.is_admin:
         raise HTTPException(
@@ -19,9 +20,9 @@ def require_admin(current_user: models.User = Depends(auth.get_current_user)):
     return current_user
 
 @router.get("/", response_model=NotificationResponse)
-def get_notifications(
+async def get_notifications(
     current_user: models.User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get notifications for admin:
@@ -29,18 +30,22 @@ def get_notifications(
     - Pending reports that need review
     """
     # Get pending sets
-    pending_sets = db.query(models.FlashcardSet).options(
-        joinedload(models.FlashcardSet.owner)
-    ).filter(
-        models.FlashcardSet.status == 'pending'
-    ).order_by(models.FlashcardSet.created_at.desc()).all()
+    pending_sets = (await db.execute(
+        select(models.FlashcardSet).options(
+            joinedload(models.FlashcardSet.owner)
+        ).where(
+            models.FlashcardSet.status == 'pending', models.FlashcardSet.deleted_at.is_(None)
+        ).order_by(models.FlashcardSet.created_at.desc())
+    )).scalars().all()
     
     # Get pending reports
-    pending_reports = db.query(models.Report).options(
-        joinedload(models.Report.reporter)
-    ).filter(
-        models.Report.status == 'pending'
-    ).order_by(models.Report.created_at.desc()).all()
+    pending_reports = (await db.execute(
+        select(models.Report).options(
+            joinedload(models.Report.reporter)
+        ).where(
+            models.Report.status == 'pending'
+        ).order_by(models.Report.created_at.desc())
+    )).scalars().all()
     
     # Build notification items
     notifications = []
@@ -81,9 +86,9 @@ def get_notifications(
     )
 
 @router.get("/user", response_model=UserNotificationResponse)
-def get_user_notifications(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_notifications(
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get notifications for current user:
@@ -91,9 +96,11 @@ def get_user_notifications(
     - Set approved/rejected
     - Other user-specific notifications
     """
-    notifications = db.query(models.Notification).filter(
-        models.Notification.user_id == current_user.id
-    ).order_by(models.Notification.created_at.desc()).limit(50).all()
+    notifications = (await db.execute(
+        select(models.Notification).where(
+            models.Notification.user_id == current_user.id
+        ).order_by(models.Notification.created_at.desc()).limit(50)
+    )).scalars().all()
     
     unread_count = sum(1 for n in notifications if not n.read)
     
@@ -103,36 +110,40 @@ def get_user_notifications(
     )
 
 @router.put("/user/{notification_id}/read")
-def mark_notification_read(
+async def mark_notification_read(
     notification_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a notification as read"""
-    notification = db.query(models.Notification).filter(
-        models.Notification.id == notification_id,
-        models.Notification.user_id == current_user.id
-    ).first()
+    notification = (await db.execute(
+        select(models.Notification).where(
+            models.Notification.id == notification_id,
+            models.Notification.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
     notification.read = True
-    db.commit()
+    await db.commit()
     
     return {"message": "Notification marked as read"}
 
 @router.put("/user/read-all")
-def mark_all_notifications_read(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+async def mark_all_notifications_read(
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark all notifications as read for current user"""
-    db.query(models.Notification).filter(
-        models.Notification.user_id == current_user.id,
-        models.Notification.read == False
-    ).update({"read": True})
-    db.commit()
+    await db.execute(
+        update(models.Notification).where(
+            models.Notification.user_id == current_user.id,
+            models.Notification.read == False
+        ).values(read=True).execution_options(synchronize_session=False)
+    )
+    await db.commit()
     
     return {"message": "All notifications marked as read"}
 
@@ -1,12 +1,13 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, func
-from app.database import get_db
-from app import models, schemas, auth
+from app.database import get_db, get_read_db
+from app import models, schemas, auth, statements, catalog, purge
 from app.routers.admin import require_admin
 from app.routers.notifications import create_notification
+from app.pagination import paginate, estimated_count, invalidate_counts, set_pagination_headers
 
 router = APIRouter()
 
@@ -35,7 +36,7 @@ def create_report(
         reported_item = db.query(models.FlashcardSet).options(
             joinedload(models.FlashcardSet.owner)
         ).filter(
-            models.FlashcardSet.id == report_data.reported_item_id
+            models.FlashcardSet.id == report_data.reported_item_id, models.FlashcardSet.deleted_at.is_(None)
         ).first()
         if not reported_item:
             raise HTTPException(status_code=404, detail="Deck not found")
@@ -57,7 +58,7 @@ def create_report(
         reported_item = db.query(models.Flashcard).options(
             joinedload(models.Flashcard.set).joinedload(models.FlashcardSet.owner)
         ).filter(models.Flashcard.id == report_data.reported_item_id).first()
-        if not reported_item:
+        if not reported_item or reported_item.set.deleted_at is not None:
             raise HTTPException(status_code=404, detail="Card not found")
         
         # User cannot report their own card
@@ -99,6 +100,7 @@ def create_report(
     )
     db.add(db_report)
     db.commit()
+    invalidate_counts("reports:")
     db.refresh(db_report)
     
     # Reload with relationships
@@ -125,13 +127,16 @@ def create_report(
             # Auto-hide the deck by changing status to 'rejected' temporarily
             # Or add a new field 'is_hidden' - for now, we'll use status
             reported_item.status = 'rejected'
+            db.execute(statements.BUMP_SET_VERSION, {"set_id": reported_item.id})
             db.commit()
+            catalog.invalidate_catalog()
     
     return db_report
 
 @router.get("/admin", response_model=List[schemas.ReportResponse])
 def get_all_reports(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     status_filter: str = None,
     report_type: str = None,
@@ -139,10 +144,7 @@ def get_all_reports(
     db: Session = Depends(get_db)
 ):
     """Get all reports (admin only)"""
-    query = db.query(models.Report).options(
-        joinedload(models.Report.reporter),
-        joinedload(models.Report.resolver)
-    )
+    query = db.query(models.Report)
     
     # Apply filters
     if status_filter:
@@ -150,7 +152,12 @@ def get_all_reports(
     if report_type:
         query = query.filter(models.Report.report_type == report_type)
     
-    reports = query.order_by(models.Report.created_at.desc()).offset(skip).limit(limit).all()
+    total = estimated_count(db, query, f"reports:{status_filter}:{report_type}")
+    reports, next_cursor = paginate(
+        query.options(joinedload(models.Report.reporter), joinedload(models.Report.resolver)),
+        limit, cursor, sort_column=models.Report.created_at, descending=True
+    )
+    set_pagination_headers(response, next_cursor, total)
     
     # Add usernames
     for report in reports:
@@ -188,6 +195,7 @@ def get_report_detail(
 def resolve_report(
     report_id: int,
     resolve_data: schemas.ReportResolve,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -205,7 +213,7 @@ def resolve_report(
             deck = db.query(models.FlashcardSet).options(
                 joinedload(models.FlashcardSet.owner)
             ).filter(
-                models.FlashcardSet.id == report.reported_item_id
+                models.FlashcardSet.id == report.reported_item_id, models.FlashcardSet.deleted_at.is_(None)
             ).first()
             if deck:
                 report.item_title = deck.title
@@ -216,7 +224,7 @@ def resolve_report(
             card = db.query(models.Flashcard).options(
                 joinedload(models.Flashcard.set).joinedload(models.FlashcardSet.owner)
             ).filter(models.Flashcard.id == report.reported_item_id).first()
-            if card:
+            if card and card.set.deleted_at is None:
                 report.item_title = f"{card.front} / {card.back}"
                 report.item_owner_id = card.set.owner_id
                 if card.set.owner:
@@ -230,29 +238,12 @@ def resolve_report(
     if resolve_data.action == 'delete_deck':
         if report.report_type != 'deck':
             raise HTTPException(status_code=400, detail="Action 'delete_deck' only applies to deck reports")
-        deck = db.query(models.FlashcardSet).options(
-            joinedload(models.FlashcardSet.flashcards),
-            joinedload(models.FlashcardSet.owner)
-        ).filter(
-            models.FlashcardSet.id == report.reported_item_id
-        ).first()
+        deck = db.execute(statements.SET_BY_ID, {"set_id": report.reported_item_id}).scalars().first()
         if deck:
             item_owner_id = deck.owner_id
             item_title = deck.title
-            
-            # Delete all study_sessions related to this deck first
-            db.query(models.StudySession).filter(
-                models.StudySession.set_id == deck.id
-            ).delete()
-            # Delete all study_records related to cards in this deck
-            # Get all card IDs in this deck
-            card_ids = [card.id for card in deck.flashcards]
-            if card_ids:
-                db.query(models.StudyRecord).filter(
-                    models.StudyRecord.flashcard_id.in_(card_ids)
-                ).delete()
-            # Now delete the deck (this will cascade delete flashcards)
-            db.delete(deck)
+            # Thẻ, study record, study session: ON DELETE CASCADE; bộ thẻ lớn được purge ở background
+            purge.delete_set(db, deck, background_tasks)
     
     elif resolve_data.action == 'delete_card':
         if report.report_type != 'card':
@@ -262,9 +253,10 @@ def resolve_report(
         ).filter(
             models.Flashcard.id == report.reported_item_id
         ).first()
-        if card:
+        if card and card.set.deleted_at is None:
             item_owner_id = card.set.owner_id
             item_title = f"Thẻ: {card.front}"
+            db.execute(statements.BUMP_SET_VERSION, {"set_id": card.set_id})
             db.delete(card)
     
     # Update report status
@@ -311,6 +303,10 @@ def resolve_report(
             )
     
     db.commit()
+    invalidate_counts("reports:")
+    if resolve_data.action == 'delete_deck':
+        invalidate_counts("sets:")
+        catalog.invalidate_catalog()
     db.refresh(report)
     
     # Reload with relationships
@@ -362,6 +358,7 @@ def reject_report(
         )
     
     db.commit()
+    invalidate_counts("reports:")
     db.refresh(report)
     
     # Reload with relationships
@@ -391,13 +388,14 @@ def delete_report(
     
     db.delete(report)
     db.commit()
+    invalidate_counts("reports:")
     
     return {"message": "Report deleted successfully"}
 
 @router.get("/admin/stats/summary")
 def get_report_stats(
     current_user: models.User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get report statistics for admin dashboard"""
     total_reports = db.query(func.count(models.Report.id)).scalar()
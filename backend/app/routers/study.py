@@ -1,10 +1,11 @@
 from typing import List
 from datetime import datetime, timedelta, date, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, distinct
-from app.database import get_db
-from app import models, schemas, auth, spaced_repetition
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, distinct, insert, select, update
+from app.database import get_async_db, get_async_read_db
+from app import models, schemas, auth, spaced_repetition, statements
+from app.etags import conditional
 from app.schemas import (
     FlashcardWithProgress, StudyAnswer, StudySessionCreate, StudySessionResponse,
     StudySessionComplete, StudyProgress, StudySessionDataPoint, StudyActivityDataPoint
@@ -13,14 +14,14 @@ from app.schemas import (
 router = APIRouter()
 
 @router.get("/sets/{set_id}/due", response_model=List[FlashcardWithProgress])
-def get_cards_due_for_review(
+async def get_cards_due_for_review(
     set_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get flashcards that are due for review"""
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
-    if not db_set:
+    db_set = await db.get(models.FlashcardSet, set_id)
+    if not db_set or db_set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     # Check if set is pending - không cho học nếu pending (trừ admin)
@@ -36,35 +37,43 @@ def get_cards_due_for_review(
         if db_set.owner_id != current_user.id and not db_set.is_public:
             raise HTTPException(status_code=403, detail="Not authorized")
     
-    due_cards = spaced_repetition.get_cards_due_for_review(db, current_user.id, set_id)
+    due_cards = (await db.execute(
+        statements.DUE_CARDS, {"user_id": current_user.id, "set_id": set_id, "now": datetime.now(timezone.utc)}
+    )).scalars().all()
     
     # If no cards are due, return all cards in the set (for new users or first-time study)
     if not due_cards:
-        all_cards = db.query(models.Flashcard).filter(models.Flashcard.set_id == set_id).all()
+        all_cards = (await db.execute(statements.CARDS_OF_SET, {"set_id": set_id})).scalars().all()
         due_cards = all_cards
     
+    # Study records của tất cả thẻ trong một query, tạo record còn thiếu rồi commit một lần
+    records_params = {"user_id": current_user.id, "set_id": set_id}
+    records = {
+        record.flashcard_id: record
+        for record in (await db.execute(statements.STUDY_RECORDS_FOR_SET, records_params)).scalars()
+    }
+    missing = [
+        {"flashcard_id": card.id, "user_id": current_user.id}
+        for card in due_cards if card.id not in records
+    ]
+    if missing:
+        # executemany: một statement cho tất cả record mới
+        await db.execute(insert(models.StudyRecord), missing)
+        await db.commit()
+        records = {
+            record.flashcard_id: record
+            for record in (await db.execute(statements.STUDY_RECORDS_FOR_SET, records_params)).scalars()
+        }
+    
     result = []
     for card in due_cards:
-        # Get or create study record
-        study_record = db.query(models.StudyRecord).filter(
-            models.StudyRecord.flashcard_id == card.id,
-            models.StudyRecord.user_id == current_user.id
-        ).first()
-        
-        if not study_record:
-            study_record = models.StudyRecord(
-                flashcard_id=card.id,
-                user_id=current_user.id
-            )
-            db.add(study_record)
-            db.commit()
-            db.refresh(study_record)
-        
+        study_record = records[card.id]
         card_data = FlashcardWithProgress(
             id=card.id,
             set_id=card.set_id,
             front=card.front,
             back=card.back,
+            position=card.position,
             created_at=card.created_at,
             ease_factor=study_record.ease_factor,
             interval=study_record.interval,
@@ -78,18 +87,20 @@ def get_cards_due_for_review(
     return result
 
 @router.post("/answer")
-def submit_answer(
+async def submit_answer(
     answer: StudyAnswer,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit answer for a flashcard and update spaced repetition data"""
-    flashcard = db.query(models.Flashcard).filter(models.Flashcard.id == answer.flashcard_id).first()
+    flashcard = await db.get(models.Flashcard, answer.flashcard_id)
     if not flashcard:
         raise HTTPException(status_code=404, detail="Flashcard not found")
     
+    db_set = await db.get(models.FlashcardSet, flashcard.set_id)
+    if db_set and db_set.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
     # Check if set is pending - không cho học nếu pending (trừ admin)
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == flashcard.set_id).first()
     if db_set and not current_user.is_admin:
         if db_set.status == 'pending':
             raise HTTPException(
@@ -98,10 +109,9 @@ def submit_answer(
             )
     
     # Get or create study record
-    study_record = db.query(models.StudyRecord).filter(
-        models.StudyRecord.flashcard_id == answer.flashcard_id,
-        models.StudyRecord.user_id == current_user.id
-    ).first()
+    study_record = (await db.execute(
+        statements.STUDY_RECORD, {"user_id": current_user.id, "flashcard_id": answer.flashcard_id}
+    )).scalars().first()
     
     if not study_record:
         study_record = models.StudyRecord(
@@ -109,11 +119,14 @@ def submit_answer(
             user_id=current_user.id
         )
         db.add(study_record)
-        db.commit()
-        db.refresh(study_record)
+        await db.flush()
+        await db.refresh(study_record)
     
     # Update with spaced repetition algorithm
-    spaced_repetition.update_study_record(db, study_record, answer.quality)
+    spaced_repetition.apply_review(study_record, answer.quality)
+    await db.execute(statements.BUMP_PROGRESS_VERSION, {"user_id": current_user.id})
+    await db.commit()
+    await db.refresh(study_record)
     
     return {
         "message": "Answer recorded",
@@ -123,14 +136,14 @@ def submit_answer(
     }
 
 @router.post("/sessions", response_model=StudySessionResponse)
-def create_study_session(
+async def create_study_session(
     session_data: StudySessionCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new study session"""
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == session_data.set_id).first()
-    if not db_set:
+    db_set = await db.get(models.FlashcardSet, session_data.set_id)
+    if not db_set or db_set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     # Check if set is pending - không cho học nếu pending (trừ admin)
@@ -146,22 +159,25 @@ def create_study_session(
         set_id=session_data.set_id
     )
     db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+    await db.execute(statements.BUMP_PROGRESS_VERSION, {"user_id": current_user.id})
+    await db.commit()
+    await db.refresh(db_session)
     return db_session
 
 @router.put("/sessions/{session_id}", response_model=StudySessionResponse)
-def complete_study_session(
+async def complete_study_session(
     session_id: int,
     session_data: StudySessionComplete,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Complete a study session"""
-    db_session = db.query(models.StudySession).filter(
-        models.StudySession.id == session_id,
-        models.StudySession.user_id == current_user.id
-    ).first()
+    db_session = (await db.execute(
+        select(models.StudySession).where(
+            models.StudySession.id == session_id,
+            models.StudySession.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not db_session:
         raise HTTPException(status_code=404, detail="Study session not found")
@@ -173,9 +189,7 @@ def complete_study_session(
     db_session.completed_at = datetime.now(timezone.utc)
     
     # Update leaderboard
-    leaderboard = db.query(models.Leaderboard).filter(
-        models.Leaderboard.user_id == current_user.id
-    ).first()
+    leaderboard = (await db.execute(statements.LEADERBOARD_FOR_USER, {"user_id": current_user.id})).scalars().first()
     
     if leaderboard:
         # Ensure values are not None
@@ -207,67 +221,86 @@ def complete_study_session(
         
         leaderboard.last_study_date = datetime.now(timezone.utc)
     
-    db.commit()
-    db.refresh(db_session)
+    await db.execute(statements.BUMP_PROGRESS_VERSION, {"user_id": current_user.id})
+    await db.commit()
+    await db.refresh(db_session)
     return db_session
 
 @router.get("/progress/{set_id}", response_model=StudyProgress)
-def get_study_progress(
+async def get_study_progress(
     set_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get study progress for a flashcard set"""
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
-    if not db_set:
+    db_set = await db.get(models.FlashcardSet, set_id)
+    if not db_set or db_set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
-    total_cards = len(db_set.flashcards)
-    due_cards = spaced_repetition.get_cards_due_for_review(db, current_user.id, set_id)
-    cards_to_review = len(due_cards)
+    # Ngoài các version, kết quả còn đổi theo thời gian: daily_progress theo ngày,
+    # cards_to_review khi thẻ đến hạn (một COUNT thay cho cả loạt query bên dưới)
+    now = datetime.now(timezone.utc)
+    due_records = await db.scalar(statements.USER_DUE_RECORDS, {"user_id": current_user.id, "now": now})
+    not_modified = conditional(
+        request, response, "progress", set_id, db_set.version, current_user.progress_version,
+        now.date(), due_records
+    )
+    if not_modified:
+        return not_modified
+    
+    total_cards = await db.scalar(
+        select(func.count(models.Flashcard.id)).where(models.Flashcard.set_id == set_id)
+    )
+    due_cards = spaced_repetition.due_cards_statement(current_user.id, set_id).subquery()
+    cards_to_review = await db.scalar(select(func.count()).select_from(due_cards))
     
     # Count mastered cards (interval > 30 days and correct_count > 5)
-    mastered = db.query(models.StudyRecord).filter(
-        models.StudyRecord.user_id == current_user.id,
-        models.StudyRecord.flashcard.has(models.Flashcard.set_id == set_id),
-        models.StudyRecord.interval > 30,
-        models.StudyRecord.correct_count > 5
-    ).count()
+    mastered = await db.scalar(
+        select(func.count(models.StudyRecord.id)).where(
+            models.StudyRecord.user_id == current_user.id,
+            models.StudyRecord.flashcard.has(models.Flashcard.set_id == set_id),
+            models.StudyRecord.interval > 30,
+            models.StudyRecord.correct_count > 5
+        )
+    )
     
     # Count total unique cards studied by this user
     # A card is considered "studied" if it has a study record with total_reviews > 0
     # This means the user has reviewed it at least once
     # Use distinct on flashcard_id to count unique cards, not study records
-    from sqlalchemy import distinct
-    cards_studied_count = db.query(func.count(distinct(models.StudyRecord.flashcard_id))).filter(
-        models.StudyRecord.user_id == current_user.id,
-        models.StudyRecord.flashcard.has(models.Flashcard.set_id == set_id),
-        models.StudyRecord.total_reviews > 0
-    ).scalar() or 0
+    cards_studied_count = await db.scalar(
+        select(func.count(distinct(models.StudyRecord.flashcard_id))).where(
+            models.StudyRecord.user_id == current_user.id,
+            models.StudyRecord.flashcard.has(models.Flashcard.set_id == set_id),
+            models.StudyRecord.total_reviews > 0
+        )
+    ) or 0
     
     # Count cards with correct answers (cards where correct_count > 0)
     # This represents cards the user has answered correctly at least once
-    cards_correct_count = db.query(func.count(distinct(models.StudyRecord.flashcard_id))).filter(
-        models.StudyRecord.user_id == current_user.id,
-        models.StudyRecord.flashcard.has(models.Flashcard.set_id == set_id),
-        models.StudyRecord.correct_count > 0
-    ).scalar() or 0
+    cards_correct_count = await db.scalar(
+        select(func.count(distinct(models.StudyRecord.flashcard_id))).where(
+            models.StudyRecord.user_id == current_user.id,
+            models.StudyRecord.flashcard.has(models.Flashcard.set_id == set_id),
+            models.StudyRecord.correct_count > 0
+        )
+    ) or 0
     
     # Get daily progress
     today = datetime.utcnow().date()
-    today_sessions = db.query(models.StudySession).filter(
-        models.StudySession.user_id == current_user.id,
-        models.StudySession.set_id == set_id,
-        models.StudySession.started_at >= datetime.combine(today, datetime.min.time())
-    ).all()
-    
-    daily_progress = sum(session.cards_studied for session in today_sessions)
+    daily_progress = await db.scalar(
+        select(func.coalesce(func.sum(models.StudySession.cards_studied), 0)).where(
+            models.StudySession.user_id == current_user.id,
+            models.StudySession.set_id == set_id,
+            models.StudySession.started_at >= datetime.combine(today, datetime.min.time())
+        )
+    )
     daily_goal = 20  # Default daily goal
     
     # Get streak from leaderboard
-    leaderboard = db.query(models.Leaderboard).filter(
-        models.Leaderboard.user_id == current_user.id
-    ).first()
+    leaderboard = (await db.execute(statements.LEADERBOARD_FOR_USER, {"user_id": current_user.id})).scalars().first()
     streak_days = leaderboard.streak_days if leaderboard else 0
     
     return StudyProgress(
@@ -282,23 +315,31 @@ def get_study_progress(
     )
 
 @router.get("/sets/last-studied")
-def get_last_studied_dates(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+async def get_last_studied_dates(
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get last studied date for all sets that the user has studied"""
+    not_modified = conditional(request, response, "last-studied", current_user.id, current_user.progress_version)
+    if not_modified:
+        return not_modified
+    
     # Get the most recent completed session for each set
-    sessions = db.query(
-        models.StudySession.set_id,
-        func.max(models.StudySession.completed_at).label('last_studied')
-    ).filter(
-        and_(
-            models.StudySession.user_id == current_user.id,
-            models.StudySession.completed_at.isnot(None)
+    sessions = (await db.execute(
+        select(
+            models.StudySession.set_id,
+            func.max(models.StudySession.completed_at).label('last_studied')
+        ).where(
+            and_(
+                models.StudySession.user_id == current_user.id,
+                models.StudySession.completed_at.isnot(None)
+            )
+        ).group_by(
+            models.StudySession.set_id
         )
-    ).group_by(
-        models.StudySession.set_id
-    ).all()
+    )).all()
     
     # Convert to dictionary
     result = {}
@@ -309,34 +350,42 @@ def get_last_studied_dates(
     return result
 
 @router.get("/sessions", response_model=List[StudySessionResponse])
-def get_study_sessions(
+async def get_study_sessions(
+    request: Request,
+    response: Response,
     set_id: int = None,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get study sessions for current user, optionally filtered by set_id"""
-    query = db.query(models.StudySession).filter(
+    not_modified = conditional(request, response, "sessions", current_user.id, set_id, current_user.progress_version)
+    if not_modified:
+        return not_modified
+    
+    query = select(models.StudySession).where(
         models.StudySession.user_id == current_user.id,
         models.StudySession.completed_at.isnot(None)
     )
     
     if set_id:
-        query = query.filter(models.StudySession.set_id == set_id)
+        query = query.where(models.StudySession.set_id == set_id)
     
-    sessions = query.order_by(models.StudySession.started_at.asc()).all()
+    sessions = (await db.execute(query.order_by(models.StudySession.started_at.asc()))).scalars().all()
     return sessions
 
 @router.get("/correct-streak")
-def get_correct_streak(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+async def get_correct_streak(
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current consecutive correct answer streak"""
     # Get all study sessions ordered by time (oldest first)
-    sessions = db.query(models.StudySession).filter(
-        models.StudySession.user_id == current_user.id,
-        models.StudySession.completed_at.isnot(None)
-    ).order_by(models.StudySession.started_at.asc()).all()
+    sessions = (await db.execute(
+        select(models.StudySession).where(
+            models.StudySession.user_id == current_user.id,
+            models.StudySession.completed_at.isnot(None)
+        ).order_by(models.StudySession.started_at.asc())
+    )).scalars().all()
     
     current_streak = 0
     max_streak = 0
@@ -357,10 +406,12 @@ def get_correct_streak(
     
     # Also calculate current active streak from most recent sessions
     # Get recent sessions (newest first) and work backwards
-    recent_sessions = db.query(models.StudySession).filter(
-        models.StudySession.user_id == current_user.id,
-        models.StudySession.completed_at.isnot(None)
-    ).order_by(models.StudySession.started_at.desc()).limit(200).all()
+    recent_sessions = (await db.execute(
+        select(models.StudySession).where(
+            models.StudySession.user_id == current_user.id,
+            models.StudySession.completed_at.isnot(None)
+        ).order_by(models.StudySession.started_at.desc()).limit(200)
+    )).scalars().all()
     
     # Reverse to process from oldest to newest
     active_streak = 0
@@ -380,33 +431,35 @@ def get_correct_streak(
     }
 
 @router.get("/sessions/history", response_model=List[StudySessionDataPoint])
-def get_study_sessions_history(
+async def get_study_sessions_history(
     days: int = 30,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get study sessions history for chart visualization"""
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
     
     # Query sessions grouped by date
-    sessions = db.query(
-        func.date(models.StudySession.started_at).label('date'),
-        func.sum(models.StudySession.cards_studied).label('cards_studied'),
-        func.sum(models.StudySession.cards_correct).label('cards_correct'),
-        func.count(models.StudySession.id).label('sessions_count')
-    ).filter(
-        and_(
-            models.StudySession.user_id == current_user.id,
-            models.StudySession.completed_at.isnot(None),
-            func.date(models.StudySession.started_at) >= start_date,
-            func.date(models.StudySession.started_at) <= end_date
+    sessions = (await db.execute(
+        select(
+            func.date(models.StudySession.started_at).label('date'),
+            func.sum(models.StudySession.cards_studied).label('cards_studied'),
+            func.sum(models.StudySession.cards_correct).label('cards_correct'),
+            func.count(models.StudySession.id).label('sessions_count')
+        ).where(
+            and_(
+                models.StudySession.user_id == current_user.id,
+                models.StudySession.completed_at.isnot(None),
+                func.date(models.StudySession.started_at) >= start_date,
+                func.date(models.StudySession.started_at) <= end_date
+            )
+        ).group_by(
+            func.date(models.StudySession.started_at)
+        ).order_by(
+            func.date(models.StudySession.started_at)
         )
-    ).group_by(
-        func.date(models.StudySession.started_at)
-    ).order_by(
-        func.date(models.StudySession.started_at)
-    ).all()
+    )).all()
     
     # Create a dictionary for quick lookup
     sessions_dict = {}
@@ -444,29 +497,31 @@ def get_study_sessions_history(
     return result
 
 @router.get("/activity", response_model=List[StudyActivityDataPoint])
-def get_study_activity(
+async def get_study_activity(
     days: int = 365,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get study activity data for heatmap calendar"""
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
     
     # Query sessions grouped by date
-    sessions = db.query(
-        func.date(models.StudySession.started_at).label('date'),
-        func.sum(models.StudySession.cards_studied).label('cards_studied')
-    ).filter(
-        and_(
-            models.StudySession.user_id == current_user.id,
-            models.StudySession.completed_at.isnot(None),
-            func.date(models.StudySession.started_at) >= start_date,
-            func.date(models.StudySession.started_at) <= end_date
+    sessions = (await db.execute(
+        select(
+            func.date(models.StudySession.started_at).label('date'),
+            func.sum(models.StudySession.cards_studied).label('cards_studied')
+        ).where(
+            and_(
+                models.StudySession.user_id == current_user.id,
+                models.StudySession.completed_at.isnot(None),
+                func.date(models.StudySession.started_at) >= start_date,
+                func.date(models.StudySession.started_at) <= end_date
+            )
+        ).group_by(
+            func.date(models.StudySession.started_at)
         )
-    ).group_by(
-        func.date(models.StudySession.started_at)
-    ).all()
+    )).all()
     
     # Find max cards studied for intensity calculation
     max_cards = max([int(s.cards_studied or 0) for s in sessions], default=1)
@@ -498,14 +553,14 @@ def get_study_activity(
     return result
 
 @router.post("/sets/{set_id}/reset")
-def reset_study_progress(
+async def reset_study_progress(
     set_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reset study progress for a flashcard set (mark all cards as needing review)"""
-    db_set = db.query(models.FlashcardSet).filter(models.FlashcardSet.id == set_id).first()
-    if not db_set:
+    db_set = await db.get(models.FlashcardSet, set_id)
+    if not db_set or db_set.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Flashcard set not found")
     
     # Check access permission
@@ -513,33 +568,31 @@ def reset_study_progress(
         if db_set.owner_id != current_user.id and not db_set.is_public:
             raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get all flashcards in the set
-    all_flashcards = db.query(models.Flashcard).filter(
-        models.Flashcard.set_id == set_id
-    ).all()
-    
-    flashcard_ids = [card.id for card in all_flashcards]
-    
-    # Reset all study records for this user and set
-    study_records = db.query(models.StudyRecord).filter(
-        models.StudyRecord.user_id == current_user.id,
-        models.StudyRecord.flashcard_id.in_(flashcard_ids)
-    ).all()
-    
-    for record in study_records:
-        # Reset to initial state (like a new card)
-        record.ease_factor = 2.5
-        record.interval = 1
-        record.repetitions = 0
-        record.next_review_date = None
-        record.last_reviewed = None
-        record.total_reviews = 0  # Reset total_reviews so cards_studied count resets
-        # Keep correct_count and incorrect_count for overall statistics if needed
-        # But reset them too for a clean restart
-        record.correct_count = 0
-        record.incorrect_count = 0
-    
-    db.commit()
-    
-    return {"message": "Study progress reset successfully", "cards_reset": len(study_records)}
+    # Flashcards in the set
+    flashcard_ids = select(models.Flashcard.id).where(models.Flashcard.set_id == set_id)
+    
+    # Reset all study records for this user and set in one UPDATE
+    result = await db.execute(
+        update(models.StudyRecord).where(
+            models.StudyRecord.user_id == current_user.id,
+            models.StudyRecord.flashcard_id.in_(flashcard_ids)
+        ).values(
+            # Reset to initial state (like a new card)
+            ease_factor=2.5,
+            interval=1,
+            repetitions=0,
+            next_review_date=None,
+            last_reviewed=None,
+            total_reviews=0,  # Reset total_reviews so cards_studied count resets
+            # Keep correct_count and incorrect_count for overall statistics if needed
+            # But reset them too for a clean restart
+            correct_count=0,
+            incorrect_count=0
+        ).execution_options(synchronize_session=False)
+    )
+    await db.execute(statements.BUMP_PROGRESS_VERSION, {"user_id": current_user.id})
+    
+    await db.commit()
+    
+    return {"message": "Study progress reset successfully", "cards_reset": result.rowcount}
 
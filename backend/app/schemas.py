@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -54,14 +54,44 @@ class FlashcardBase(BaseModel):
 class FlashcardCreate(FlashcardBase):
     pass
 
+# Số thẻ tối đa trong một request bulk (một INSERT nhiều dòng, một commit)
+MAX_BULK_CARDS = 1000
+
+class FlashcardBulkCreate(BaseModel):
+    cards: List[FlashcardCreate] = Field(..., min_length=1, max_length=MAX_BULK_CARDS)
+
+class FlashcardUpsert(FlashcardBase):
+    id: Optional[int] = None  # None = thẻ mới
+    position: Optional[int] = None
+
+class FlashcardMove(BaseModel):
+    id: int
+    position: int
+
+class FlashcardReorder(BaseModel):
+    after_id: Optional[int] = None  # Đặt ngay sau thẻ này; None = lên đầu bộ thẻ
+
+class FlashcardBatchUpdate(BaseModel):
+    """PATCH /sets/{id}/cards: every change is applied in one transaction"""
+    upsert: List[FlashcardUpsert] = Field([], max_length=MAX_BULK_CARDS)
+    delete: List[int] = Field([], max_length=MAX_BULK_CARDS)
+    positions: List[FlashcardMove] = Field([], max_length=MAX_BULK_CARDS)
+
 class FlashcardResponse(FlashcardBase):
     id: int
     set_id: int
+    position: int = 0
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class FlashcardBatchResult(BaseModel):
+    created: List[FlashcardResponse]
+    updated: int
+    deleted: int
+    moved: int
+
 class FlashcardWithProgress(FlashcardResponse):
     ease_factor: Optional[float] = None
     interval: Optional[int] = None
@@ -77,7 +107,8 @@ class FlashcardSetBase(BaseModel):
     is_public: bool = False
 
 class FlashcardSetCreate(FlashcardSetBase):
-    pass
+    # Tùy chọn: tạo bộ thẻ cùng các thẻ trong một transaction
+    cards: Optional[List[FlashcardCreate]] = Field(None, max_length=MAX_BULK_CARDS)
 
 class FlashcardSetUpdate(BaseModel):
     title: Optional[str] = None
@@ -91,6 +122,8 @@ class FlashcardSetResponse(FlashcardSetBase):
     status: Optional[str] = 'pending'  # pending, approved, rejected
     created_at: datetime
     updated_at: Optional[datetime] = None
+    card_count: Optional[int] = None
+    last_studied_at: Optional[datetime] = None  # Phiên học gần nhất của user hiện tại
     
     class Config:
         from_attributes = True
@@ -98,6 +131,14 @@ class FlashcardSetResponse(FlashcardSetBase):
 class FlashcardSetWithCards(FlashcardSetResponse):
     flashcards: List[FlashcardResponse]
 
+class SearchCardResult(FlashcardResponse):
+    set_title: str
+
+class SearchResponse(BaseModel):
+    query: str
+    sets: List[FlashcardSetResponse]  # Khớp tiêu đề/mô tả, xếp theo độ liên quan
+    cards: List[SearchCardResult]  # Khớp mặt trước/sau của thẻ
+
 # Study schemas
 class StudyAnswer(BaseModel):
     flashcard_id: int
@@ -167,6 +208,7 @@ class AIGenerateRequest(BaseModel):
 class ImportRequest(BaseModel):
     set_id: int
     file_content: str  # CSV or JSON content
+    duplicates: str = "skip"  # Thẻ trùng mặt trước: skip | update | keep (app/dedup.py)
 
 # Auth schemas
 class LoginRequest(BaseModel):
@@ -176,6 +218,11 @@ class LoginRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
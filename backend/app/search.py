@@ -0,0 +1,178 @@
+"""
+Full-text search over sets and cards (GET /api/flashcards/search?q=)
+
+Index (migration 0011):
+- SQLite: FTS5 tables flashcard_sets_fts / flashcards_fts (external content,
+  synced by triggers, diacritics-insensitive: "tieng" finds "tiếng")
+- PostgreSQL: generated tsvector column search_vector with a GIN index
+
+The query is split into words; every word must match and the last one also
+matches as a prefix (search-as-you-type). Ranking is bm25 (SQLite) / ts_rank
+(PostgreSQL), titles and card fronts weigh more than descriptions and backs.
+
+Work per query is bounded however many rows match (bench_search.py):
+- SQLite's bm25 reads the whole doclist of every word to weigh it, so a query
+  matching more than SEARCH_SCAN_LIMIT rows (very common words such as "anh",
+  "tiếng") is not ranked: the newest matches come first. If the last word alone
+  already matches that many rows it is not used as a prefix either. PostgreSQL ranks only
+  the first SEARCH_SCAN_LIMIT matches it reads (ts_rank has no per-word weighing).
+- only the SEARCH_CANDIDATES best matches are checked against what the user
+  can access (primary-key lookups); the page itself is loaded by id.
+"""
+import os
+import re
+from typing import List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session, joinedload
+
+from app import models, statements
+
+SEARCH_SCAN_LIMIT = int(os.getenv("SEARCH_SCAN_LIMIT", "5000"))
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "1000"))
+MAX_TERMS = 8
+# Tiền tố 1 ký tự khớp quá nhiều từ (và FTS5 chỉ có prefix index cho 2-3 ký tự)
+MIN_PREFIX_LENGTH = 2
+
+_WORD = re.compile(r"\w+")
+
+# kind -> (FTS5 table, table, bm25 weights of the indexed columns)
+_INDEXES = {
+    "sets": ("flashcard_sets_fts", "flashcard_sets", "2.5, 1.0"),
+    "cards": ("flashcards_fts", "flashcards", "2.5, 1.0"),
+}
+
+def parse_terms(q: str) -> List[str]:
+    """Words of the query (letters/digits only, so they are safe inside MATCH / to_tsquery)"""
+    return _WORD.findall(q.lower())[:MAX_TERMS]
+
+def match_expression(terms: List[str], dialect: str, prefix: bool = True) -> str:
+    prefix = prefix and len(terms[-1]) >= MIN_PREFIX_LENGTH
+    if dialect == "postgresql":
+        words = list(terms)
+        if prefix:
+            words[-1] += ":*"
+        return " & ".join(words)
+    words = [f'"{term}"' for term in terms]
+    if prefix:
+        words[-1] += "*"
+    return " ".join(words)
+
+def ranked_ids(db: Session, kind: str, terms: List[str]) -> List[int]:
+    """Ids of the SEARCH_CANDIDATES best matches, best first"""
+    fts, table, weights = _INDEXES[kind]
+    dialect = db.get_bind().dialect.name
+    params = {"query": match_expression(terms, dialect), "scan": SEARCH_SCAN_LIMIT, "candidates": SEARCH_CANDIDATES}
+    if dialect == "postgresql":
+        # LIMIT bên trong dừng việc đọc index sau :scan dòng khớp, rank chỉ tính cho các dòng đó
+        return list(db.scalars(text(
+            f"SELECT id FROM ("
+            f"SELECT id, search_vector FROM {table} "
+            f"WHERE search_vector @@ to_tsquery('simple', :query) LIMIT :scan"
+            f") AS scanned ORDER BY ts_rank(search_vector, to_tsquery('simple', :query)) DESC LIMIT :candidates"
+        ), params))
+    count = text(f"SELECT count(*) FROM (SELECT rowid FROM {fts} WHERE {fts} MATCH :query LIMIT :scan + 1)")
+    exact = match_expression(terms, dialect, prefix=False)
+    if exact != params["query"] and db.scalar(count, {**params, "query": exact}) > SEARCH_SCAN_LIMIT:
+        # Từ cuối đã là một từ phổ biến trọn vẹn: bỏ tiền tố, vì truy vấn tiền tố dài hơn
+        # prefix index phải gộp toàn bộ doclist của mọi từ khớp trước khi trả dòng đầu tiên
+        params["query"] = exact
+    matched = db.scalar(count, params)
+    if not matched:
+        return []
+    if matched > SEARCH_SCAN_LIMIT:
+        # FTS5 đọc doclist theo rowid giảm dần (mới nhất trước) mà không cần sort
+        return list(db.scalars(text(
+            f"SELECT rowid FROM {fts} WHERE {fts} MATCH :query ORDER BY rowid DESC LIMIT :candidates"
+        ), params))
+    return list(db.scalars(text(
+        f"SELECT rowid FROM {fts} WHERE {fts} MATCH :query ORDER BY bm25({fts}, {weights}) LIMIT :candidates"
+    ), params))
+
+def can_view(user: models.User, owner_id: int, is_public: bool, status: str) -> bool:
+    """Same rule as GET /sets/{id}: admins, owners, or public approved sets"""
+    return user.is_admin or owner_id == user.id or (bool(is_public) and status == 'approved')
+
+def visible_set_ids(db: Session, user: models.User, set_ids) -> set:
+    # Chỉ tra theo khóa chính; điều kiện OR truy cập viết trong SQL khiến SQLite quét theo
+    # index owner_id/is_public thay vì theo danh sách id
+    rows = db.execute(
+        select(
+            models.FlashcardSet.id, models.FlashcardSet.owner_id,
+            models.FlashcardSet.is_public, models.FlashcardSet.status
+        ).where(models.FlashcardSet.id.in_(set_ids), models.FlashcardSet.deleted_at.is_(None))
+    )
+    return {row.id for row in rows if can_view(user, row.owner_id, row.is_public, row.status)}
+
+def first_visible(ids: List[int], visible_among, limit: int) -> List[int]:
+    """First `limit` ids, in ranking order, that visible_among(chunk of ids) keeps.
+
+    Checked in small chunks: usually the first chunk already fills the page.
+    """
+    page = []
+    chunk = max(limit * 3, 50)
+    for start in range(0, len(ids), chunk):
+        chunk_ids = ids[start:start + chunk]
+        visible = visible_among(chunk_ids)
+        page.extend(row_id for row_id in chunk_ids if row_id in visible)
+        if len(page) >= limit:
+            break
+    return page[:limit]
+
+def search_sets(db: Session, terms: List[str], user: models.User, limit: int) -> List[models.FlashcardSet]:
+    ids = ranked_ids(db, "sets", terms)
+    page = first_visible(ids, lambda chunk: visible_set_ids(db, user, chunk), limit)
+    if not page:
+        return []
+    rows = (
+        db.query(models.FlashcardSet, statements.card_count_column())
+        .options(joinedload(models.FlashcardSet.owner))
+        .filter(models.FlashcardSet.id.in_(page))
+        .all()
+    )
+    rows.sort(key=lambda row: page.index(row[0].id))
+    sets = []
+    for set_item, card_count in rows:
+        set_item.card_count = card_count
+        if set_item.owner:
+            set_item.owner_username = set_item.owner.username
+            set_item.owner_avatar_url = set_item.owner.avatar_url
+        sets.append(set_item)
+    return sets
+
+def visible_card_ids(db: Session, user: models.User, card_ids) -> set:
+    set_of_card = dict(db.execute(
+        select(models.Flashcard.id, models.Flashcard.set_id).where(models.Flashcard.id.in_(card_ids))
+    ).all())
+    visible = visible_set_ids(db, user, set(set_of_card.values()))
+    return {card_id for card_id, set_id in set_of_card.items() if set_id in visible}
+
+def search_cards(db: Session, terms: List[str], user: models.User, limit: int) -> List[models.Flashcard]:
+    ids = ranked_ids(db, "cards", terms)
+    page = first_visible(ids, lambda chunk: visible_card_ids(db, user, chunk), limit)
+    if not page:
+        return []
+    rows = (
+        db.query(models.Flashcard, models.FlashcardSet.title)
+        .join(models.FlashcardSet, models.FlashcardSet.id == models.Flashcard.set_id)
+        .filter(models.Flashcard.id.in_(page))
+        .all()
+    )
+    rows.sort(key=lambda row: page.index(row[0].id))
+    cards = []
+    for card, set_title in rows:
+        card.set_title = set_title
+        cards.append(card)
+    return cards
+
+def search(db: Session, q: str, user: models.User, limit: int, kind: Optional[str] = None) -> dict:
+    """{"query", "sets", "cards"}; kind="sets"/"cards" searches only one of them"""
+    terms = parse_terms(q)
+    result = {"query": q, "sets": [], "cards": []}
+    if not terms:
+        return result
+    if kind in (None, "sets"):
+        result["sets"] = search_sets(db, terms, user, limit)
+    if kind in (None, "cards"):
+        result["cards"] = search_cards(db, terms, user, limit)
+    return result
@@ -0,0 +1,144 @@
+"""
+Slow-query log with automatic EXPLAIN capture
+
+Every statement is timed through engine events (all engines). Statements
+slower than SLOW_QUERY_MS are:
+- printed to the log with the request that ran them
+- kept in a bounded ring buffer (SLOW_QUERY_BUFFER entries) with the shape of
+  their bound parameters (types only, never values)
+- explained once per unique statement: EXPLAIN QUERY PLAN on SQLite, EXPLAIN
+  on PostgreSQL (no ANALYZE, the statement is not executed again)
+
+Admins read the buffer at GET /api/admin/perf/slow-queries.
+
+Configuration (env):
+- SLOW_QUERY_ENABLED=true|false  (default true)
+- SLOW_QUERY_MS=200
+- SLOW_QUERY_BUFFER=200
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_ENABLED", "true").lower() in ("true", "1", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+MAX_EXPLAINED_STATEMENTS = 500
+
+_slow_queries: Deque[dict] = deque(maxlen=SLOW_QUERY_BUFFER)
+# {statement: plan} - EXPLAIN chỉ chạy một lần cho mỗi statement
+_plans: "OrderedDict[str, Optional[List[str]]]" = OrderedDict()
+_plans_lock = threading.Lock()  # Route sync chạy trong threadpool
+_current_request: ContextVar[Optional[str]] = ContextVar("slow_query_request", default=None)
+
+def parameter_shape(parameters):
+    """Replace bound values by their type names: {'username_1': 'str'} / ['int', 'int']"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _explain(conn, statement: str, parameters) -> Optional[List[str]]:
+    """Query plan of `statement`, or None if it cannot be explained"""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if keyword not in ("SELECT", "WITH", "UPDATE", "DELETE"):
+        return None
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    # Cursor riêng trên cùng DBAPI connection (cùng transaction, không qua engine events).
+    # PostgreSQL: EXPLAIN lỗi sẽ làm hỏng cả transaction của request -> bọc trong SAVEPOINT
+    # (SQL thô: đang ở giữa một execute của Connection nên không dùng begin_nested())
+    explain_cursor = conn.connection.cursor()
+    try:
+        if not sqlite:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            rows = explain_cursor.fetchall()
+        except Exception:
+            if not sqlite:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            raise
+        if not sqlite:
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        explain_cursor.close()
+    if conn.dialect.name == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+def _plan_for(conn, statement: str, parameters) -> Optional[List[str]]:
+    if statement in _plans:
+        return _plans[statement]
+    try:
+        plan = _explain(conn, statement, parameters)
+    except Exception as e:
+        plan = [f"EXPLAIN failed: {e}"]
+    with _plans_lock:
+        _plans[statement] = plan
+        if len(_plans) > MAX_EXPLAINED_STATEMENTS:
+            _plans.popitem(last=False)
+    return plan
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Trên execution context, như app/query_counter.py (không rò khi statement lỗi)
+    context._slow_query_start_time = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._slow_query_start_time) * 1000
+    if not SLOW_QUERY_ENABLED or elapsed_ms < SLOW_QUERY_MS:
+        return
+    request = _current_request.get()
+    _slow_queries.append({
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(elapsed_ms, 2),
+        "request": request,
+        "statement": statement,
+        "parameters": parameter_shape(parameters) if not executemany else f"executemany x{len(parameters)}",
+        "plan": None if executemany else _plan_for(conn, statement, parameters),
+    })
+    print(f"🐢 Slow query {elapsed_ms:.0f} ms ({request or 'no request'}): {' '.join(statement.split())[:200]}")
+
+class SlowQueryContextMiddleware:
+    """ASGI middleware remembering "METHOD /path" so slow queries can name their request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SLOW_QUERY_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        token = _current_request.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+
+def get_slow_queries(limit: int = 50) -> dict:
+    """Newest slow queries first"""
+    entries = list(_slow_queries)[-limit:] if limit > 0 else []
+    return {
+        "enabled": SLOW_QUERY_ENABLED,
+        "threshold_ms": SLOW_QUERY_MS,
+        "buffer_size": _slow_queries.maxlen,
+        "count": len(_slow_queries),
+        "queries": entries[::-1],
+    }
+
+def clear_slow_queries():
+    _slow_queries.clear()
+    with _plans_lock:
+        _plans.clear()
@@ -4,6 +4,7 @@ Based on SuperMemo 2 algorithm
 """
 from datetime import datetime, timedelta, timezone
 from typing import Tuple
+from sqlalchemy import select, or_
 from sqlalchemy.orm import Session
 from app import models
 
@@ -43,12 +44,8 @@ def calculate_next_review(
     
     return ease_factor, interval, repetitions, next_review_date
 
-def update_study_record(
-    db: Session,
-    study_record: models.StudyRecord,
-    quality: int
-):
-    """Update study record with new spaced repetition data"""
+def apply_review(study_record: models.StudyRecord, quality: int) -> models.StudyRecord:
+    """Apply an answer to a study record in memory (no database I/O)"""
     ease_factor, interval, repetitions, next_review_date = calculate_next_review(
         study_record.ease_factor,
         study_record.interval,
@@ -61,49 +58,54 @@ def update_study_record(
     study_record.repetitions = repetitions
     study_record.next_review_date = next_review_date
     study_record.last_reviewed = datetime.now(timezone.utc)
-    study_record.total_reviews += 1
+    study_record.total_reviews = (study_record.total_reviews or 0) + 1
     
     if quality >= 3:
-        study_record.correct_count += 1
+        study_record.correct_count = (study_record.correct_count or 0) + 1
     else:
-        study_record.incorrect_count += 1
+        study_record.incorrect_count = (study_record.incorrect_count or 0) + 1
+    
+    return study_record
+
+def update_study_record(
+    db: Session,
+    study_record: models.StudyRecord,
+    quality: int
+):
+    """Update study record with new spaced repetition data"""
+    apply_review(study_record, quality)
     
     db.commit()
     db.refresh(study_record)
     
     return study_record
 
+def due_cards_statement(user_id: int, set_id: int):
+    """Select flashcards of a set that are due for review for a user.
+    
+    A card is due if the user has no study record for it yet (new card) or
+    its next_review_date is unset or in the past. Evaluated in one query.
+    """
+    now = datetime.now(timezone.utc)
+    user_records = select(models.StudyRecord.id).where(
+        models.StudyRecord.flashcard_id == models.Flashcard.id,
+        models.StudyRecord.user_id == user_id
+    )
+    due_records = user_records.where(
+        or_(
+            models.StudyRecord.next_review_date.is_(None),
+            models.StudyRecord.next_review_date <= now
+        )
+    )
+    return select(models.Flashcard).where(
+        models.Flashcard.set_id == set_id,
+        or_(~user_records.exists(), due_records.exists())
+    ).order_by(models.Flashcard.position, models.Flashcard.id)
+
 def get_cards_due_for_review(
     db: Session,
     user_id: int,
     set_id: int
 ) -> list[models.Flashcard]:
     """Get flashcards that are due for review"""
-    now = datetime.now(timezone.utc)
-    
-    # Get all flashcards in the set
-    all_flashcards = db.query(models.Flashcard).filter(
-        models.Flashcard.set_id == set_id
-    ).all()
-    
-    # Get study records for this user and set
-    all_study_records = db.query(models.StudyRecord).filter(
-        models.StudyRecord.user_id == user_id,
-        models.StudyRecord.flashcard_id.in_([card.id for card in all_flashcards])
-    ).all()
-    
-    record_dict = {record.flashcard_id: record for record in all_study_records}
-    
-    # Separate cards into due and new
-    due_cards = []
-    for card in all_flashcards:
-        record = record_dict.get(card.id)
-        if record is None:
-            # New card, no study record yet
-            due_cards.append(card)
-        elif record.next_review_date is None or record.next_review_date <= now:
-            # Card is due for review
-            due_cards.append(card)
-    
-    return due_cards
-
+    return list(db.execute(due_cards_statement(user_id, set_id)).scalars().all())
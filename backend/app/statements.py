@@ -0,0 +1,131 @@
+"""
+Prebuilt statements for the hottest queries
+
+Every `db.query(...).filter(...)` / `select(...).where(...)` rebuilds the
+statement object and walks it to compute its compiled-cache key on each
+request. The statements below are built once at import with bindparam()
+placeholders; the cache key is memoized on the statement object, so each
+execution only binds the values and hits the engine's compiled cache
+(SQL_COMPILED_CACHE_SIZE, see app/database.py):
+
+    user = db.execute(statements.USER_BY_USERNAME, {"username": username}).scalars().first()
+
+lambda_stmt() was measured too (bench_statement_cache.py): with ORM entities
+SQLAlchemy clones the resolved statement on every execution, which makes it
+slower than the plain select() here.
+"""
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import joinedload
+
+from app import models
+
+USER_BY_USERNAME = select(models.User).where(models.User.username == bindparam("username")).limit(1)
+
+# Soft-deleted sets (deleted_at, app/purge.py) are not found
+SET_BY_ID = select(models.FlashcardSet).where(
+    models.FlashcardSet.id == bindparam("set_id"), models.FlashcardSet.deleted_at.is_(None)
+)
+
+SET_WITH_OWNER = (
+    select(models.FlashcardSet)
+    .options(joinedload(models.FlashcardSet.owner))
+    .where(models.FlashcardSet.id == bindparam("set_id"), models.FlashcardSet.deleted_at.is_(None))
+)
+
+CARDS_OF_SET = (
+    select(models.Flashcard)
+    .where(models.Flashcard.set_id == bindparam("set_id"))
+    .order_by(models.Flashcard.position, models.Flashcard.id)
+)
+
+# Plain column tuples of CARDS_OF_SET for the compact formats (app/card_formats.py). Params: set_id
+CARD_COLUMNS_OF_SET = (
+    select(
+        models.Flashcard.id, models.Flashcard.set_id, models.Flashcard.front, models.Flashcard.back,
+        models.Flashcard.position, models.Flashcard.created_at
+    )
+    .where(models.Flashcard.set_id == bindparam("set_id"))
+    .order_by(models.Flashcard.position, models.Flashcard.id)
+)
+
+# Params: user_id, flashcard_id
+STUDY_RECORD = select(models.StudyRecord).where(
+    models.StudyRecord.flashcard_id == bindparam("flashcard_id"),
+    models.StudyRecord.user_id == bindparam("user_id")
+).limit(1)
+
+# Study records of a user for every card of a set. Params: user_id, set_id
+STUDY_RECORDS_FOR_SET = (
+    select(models.StudyRecord)
+    .join(models.Flashcard, models.Flashcard.id == models.StudyRecord.flashcard_id)
+    .where(models.Flashcard.set_id == bindparam("set_id"), models.StudyRecord.user_id == bindparam("user_id"))
+)
+
+# Same as spaced_repetition.due_cards_statement (kept for composition in counts).
+# Params: user_id, set_id, now
+_user_records = select(models.StudyRecord.id).where(
+    models.StudyRecord.flashcard_id == models.Flashcard.id,
+    models.StudyRecord.user_id == bindparam("user_id")
+)
+DUE_CARDS = select(models.Flashcard).where(
+    models.Flashcard.set_id == bindparam("set_id"),
+    or_(
+        ~_user_records.exists(),
+        _user_records.where(
+            or_(
+                models.StudyRecord.next_review_date.is_(None),
+                models.StudyRecord.next_review_date <= bindparam("now")
+            )
+        ).exists()
+    )
+).order_by(models.Flashcard.position, models.Flashcard.id)
+
+def card_count_column():
+    """Correlated COUNT of a set's cards, for queries over FlashcardSet (uses ix_flashcards_set_id)"""
+    return (
+        select(func.count(models.Flashcard.id))
+        .where(models.Flashcard.set_id == models.FlashcardSet.id)
+        .scalar_subquery()
+        .label("card_count")
+    )
+
+def last_studied_column(user_id: int):
+    """Correlated start of the user's latest study session on a set, for queries over FlashcardSet"""
+    return (
+        select(func.max(models.StudySession.started_at))
+        .where(models.StudySession.set_id == models.FlashcardSet.id, models.StudySession.user_id == user_id)
+        .scalar_subquery()
+        .label("last_studied_at")
+    )
+
+LEADERBOARD_FOR_USER = select(models.Leaderboard).where(models.Leaderboard.user_id == bindparam("user_id")).limit(1)
+
+# 1-based rank of a score: number of (not deleted) users with more points + 1. Params: points
+LEADERBOARD_RANK = (
+    select(func.count(models.Leaderboard.id) + 1)
+    .join(models.User)
+    .where(models.Leaderboard.points > bindparam("points"), models.User.deleted_at.is_(None))
+)
+
+# ETag versions (app/etags.py). Không đồng bộ object trong Session, chỉ cần giá trị trong DB.
+# Params: set_id
+BUMP_SET_VERSION = (
+    update(models.FlashcardSet)
+    .where(models.FlashcardSet.id == bindparam("set_id"))
+    .values(version=models.FlashcardSet.version + 1)
+    .execution_options(synchronize_session=False)
+)
+
+# Params: user_id
+BUMP_PROGRESS_VERSION = (
+    update(models.User)
+    .where(models.User.id == bindparam("user_id"))
+    .values(progress_version=models.User.progress_version + 1)
+    .execution_options(synchronize_session=False)
+)
+
+# Cards of a user that are already due; grows as time passes without any write. Params: user_id, now
+USER_DUE_RECORDS = select(func.count(models.StudyRecord.id)).where(
+    models.StudyRecord.user_id == bindparam("user_id"),
+    models.StudyRecord.next_review_date <= bindparam("now")
+)
@@ -0,0 +1,105 @@
+"""
+Optional background warm-up, started by the lifespan handler in app.main
+
+Runs after the app starts accepting requests so the first real requests do not
+pay for lazy initialization:
+- open WARMUP_CONNECTIONS pooled connections (sync + async engines)
+- configure ORM mappers and compile the hot queries once (SQLAlchemy statement cache)
+- load the public set catalog cache (app/catalog.py)
+- build the OpenAI client (importing openai takes a few hundred ms)
+
+Configuration (env):
+- APP_WARMUP=true|false  (default false)
+- WARMUP_CONNECTIONS=<n> (default 5)
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from starlette.concurrency import run_in_threadpool
+
+APP_WARMUP = os.getenv("APP_WARMUP", "false").lower() in ("true", "1", "yes")
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "5"))
+
+def warm_pool(db_engine, connections: int):
+    """Check out `connections` connections at once so the pool keeps them open"""
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = db_engine.connect()
+            conn.execute(text("SELECT 1"))
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+
+async def warm_async_pool(db_engine, connections: int):
+    """Async counterpart of warm_pool"""
+    async def one():
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    await asyncio.gather(*(one() for _ in range(connections)))
+
+def warm_statement_cache(db_engine):
+    """Compile the hot statements (app/statements.py) so later executions hit the compiled cache"""
+    from sqlalchemy.orm import Session
+    from app import statements
+
+    # Giá trị giả cho mọi bindparam, statement bỏ qua các key không dùng
+    params = {"username": "", "set_id": 0, "user_id": 0, "flashcard_id": 0, "points": 0, "now": datetime.now(timezone.utc)}
+    # Qua Session: statement ORM được compile với ORM plugin, cùng cache key với lúc chạy thật
+    with Session(db_engine) as db:
+        for statement in (
+            statements.USER_BY_USERNAME, statements.SET_BY_ID, statements.SET_WITH_OWNER,
+            statements.CARDS_OF_SET, statements.DUE_CARDS, statements.STUDY_RECORDS_FOR_SET,
+            statements.STUDY_RECORD, statements.LEADERBOARD_FOR_USER, statements.LEADERBOARD_RANK,
+            statements.USER_DUE_RECORDS,
+        ):
+            db.execute(statement, params).all()
+        db.rollback()
+
+def warm_catalog(session_factory):
+    """Load the public catalog cache (app/catalog.py) before the first "My Decks" request"""
+    from app import catalog
+
+    with session_factory() as db:
+        catalog.public_catalog(db)
+
+def warm_up():
+    """Run every warm-up step, logging failures instead of raising"""
+    from app import database
+    from app.routers.ai import get_openai_client
+
+    started = time.perf_counter()
+    steps = [
+        ("mappers", configure_mappers),
+        ("pool", lambda: warm_pool(database.engine, WARMUP_CONNECTIONS)),
+        ("statement cache", lambda: warm_statement_cache(database.engine)),
+        ("catalog", lambda: warm_catalog(database.SessionLocal)),
+        ("openai", get_openai_client),
+    ]
+    if database.read_engine is not None:
+        steps.append(("read pool", lambda: warm_pool(database.read_engine, WARMUP_CONNECTIONS)))
+
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️  Warm-up {name} thất bại: {e}")
+    print(f"🔥 Warm-up xong trong {(time.perf_counter() - started) * 1000:.0f} ms")
+
+async def run_warm_up():
+    """Warm the sync side in the threadpool, then the async engines"""
+    from app import database
+
+    await run_in_threadpool(warm_up)
+    for name, db_engine in (("async pool", database.async_engine), ("async read pool", database.async_read_engine)):
+        if db_engine is None:
+            continue
+        try:
+            await warm_async_pool(db_engine, WARMUP_CONNECTIONS)
+        except Exception as e:
+            print(f"⚠️  Warm-up {name} thất bại: {e}")
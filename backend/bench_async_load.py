@@ -0,0 +1,108 @@
+"""
+Benchmark tải: so sánh chế độ sync (threadpool) và async (DATABASE_ASYNC=true)
+
+Mỗi chế độ chạy trong một process riêng với database SQLite tạm, bắn N request
+đồng thời vào các endpoint nóng (leaderboard, study progress, notifications)
+qua ASGI transport và in ra throughput / p50 / p95 cho từng mức concurrency.
+
+Cách chạy:
+    python bench_async_load.py
+    python bench_async_load.py --requests 2000 --concurrency 10 50 200
+    DATABASE_URL=postgresql://... python bench_async_load.py   (dùng DB có sẵn)
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def run_child(args):
+    import httpx
+    import migrate
+    migrate.run_migrations()
+    migrate.create_default_admin()
+    from app.main import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            login = await client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            # Dữ liệu mẫu: 1 bộ thẻ 50 thẻ
+            created = await client.post(
+                "/api/flashcards/sets", json={"title": "bench", "is_public": True}, headers=headers
+            )
+            set_id = created.json()["id"]
+            for i in range(50):
+                await client.post(
+                    f"/api/flashcards/sets/{set_id}/cards",
+                    json={"front": f"front {i}", "back": f"back {i}"},
+                    headers=headers,
+                )
+
+            paths = [
+                "/api/leaderboard/",
+                f"/api/study/progress/{set_id}",
+                "/api/notifications/user",
+            ]
+            results = []
+            for concurrency in args.concurrency:
+                semaphore = asyncio.Semaphore(concurrency)
+                latencies = []
+
+                async def one(i):
+                    async with semaphore:
+                        start = time.perf_counter()
+                        response = await client.get(paths[i % len(paths)], headers=headers)
+                        latencies.append(time.perf_counter() - start)
+                        response.raise_for_status()
+
+                started = time.perf_counter()
+                await asyncio.gather(*(one(i) for i in range(args.requests)))
+                elapsed = time.perf_counter() - started
+                latencies.sort()
+                results.append({
+                    "concurrency": concurrency,
+                    "rps": args.requests / elapsed,
+                    "p50_ms": statistics.median(latencies) * 1000,
+                    "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+                })
+            print("RESULT " + json.dumps(results))
+
+    asyncio.run(main())
+
+def run_parent(args):
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            env["DATABASE_ASYNC"] = "true" if mode == "async" else "false"
+            env["RATE_LIMIT_ENABLED"] = "false"
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", "--requests", str(args.requests),
+                   "--concurrency", *map(str, args.concurrency)]
+            output = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=tmp)
+            line = next((l for l in output.stdout.splitlines() if l.startswith("RESULT ")), None)
+            if line is None:
+                print(f"❌ {mode} mode failed:\n{output.stderr[-2000:]}")
+                continue
+            print(f"\n=== {mode} mode ===")
+            print(f"{'concurrency':>12} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+            for r in json.loads(line[len("RESULT "):]):
+                print(f"{r['concurrency']:>12} {r['rps']:>10.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if args.child:
+        run_child(args)
+    else:
+        run_parent(args)
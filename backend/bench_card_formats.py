@@ -0,0 +1,120 @@
+"""
+Benchmark định dạng response của danh sách thẻ (app/card_formats.py)
+
+So sánh cho GET /api/flashcards/sets/{id}/cards với một bộ thẻ lớn:
+- json:      cách hiện tại - load ORM object, FastAPI validate thành FlashcardResponse
+             từng thẻ rồi dump JSON (list các object, lặp lại key)
+- columnar:  tuple cột (CARD_COLUMNS_OF_SET) -> mảng song song -> orjson
+- msgpack:   cùng payload columnar, encode MessagePack (cần cài msgpack)
+
+In kích thước payload (thô và gzip) và thời gian (median): query + dựng dữ liệu,
+serialize, tổng.
+
+Cách chạy:
+    python bench_card_formats.py
+    python bench_card_formats.py --cards 50000 --runs 9
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def seed(cards: int) -> int:
+    """One set with `cards` cards of realistic length, returns its id"""
+    from sqlalchemy import insert
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    user = models.User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db_set = models.FlashcardSet(title="Bench", owner_id=user.id, is_public=True, status="approved")
+    db.add(db_set)
+    db.flush()
+    db.execute(insert(models.Flashcard), [
+        {"set_id": db_set.id, "front": f"Từ vựng số {i}", "back": f"Nghĩa của từ số {i}, kèm ví dụ ngắn", "position": i + 1}
+        for i in range(cards)
+    ])
+    db.commit()
+    set_id = db_set.id
+    db.close()
+    return set_id
+
+def variants(set_id: int):
+    """{name: (build(db) -> data, serialize(data) -> bytes)}"""
+    from typing import List
+    from pydantic import TypeAdapter
+    from app import card_formats, statements
+    from app.schemas import FlashcardResponse
+
+    # Giống FastAPI với response_model mặc định: validate từng object rồi dump_json (Rust)
+    adapter = TypeAdapter(List[FlashcardResponse])
+    result = {
+        "json": (
+            lambda db: adapter.validate_python(db.execute(statements.CARDS_OF_SET, {"set_id": set_id}).scalars().all()),
+            adapter.dump_json,
+        ),
+        "columnar": (
+            lambda db: card_formats.card_columns(db, set_id),
+            lambda data: card_formats.encode(card_formats.COLUMNAR, data),
+        ),
+    }
+    if card_formats.msgpack is not None:
+        result["msgpack"] = (
+            lambda db: card_formats.card_columns(db, set_id),
+            lambda data: card_formats.encode(card_formats.MSGPACK, data),
+        )
+    else:
+        print("⚠️  msgpack chưa được cài, bỏ qua định dạng msgpack")
+    return result
+
+def measure(build, serialize, runs: int):
+    """(median build ms, median serialize ms, payload)"""
+    from app.database import SessionLocal
+
+    build_times, serialize_times = [], []
+    payload = b""
+    for _ in range(runs + 1):  # lần đầu để làm nóng
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            data = build(db)
+            built = time.perf_counter()
+            payload = serialize(data)
+            done = time.perf_counter()
+        build_times.append((built - started) * 1000)
+        serialize_times.append((done - built) * 1000)
+    return statistics.median(build_times[1:]), statistics.median(serialize_times[1:]), payload
+
+def main(args):
+    import migrate
+
+    migrate.run_migrations()
+    set_id = seed(args.cards)
+    print(f"📦 Bộ thẻ {args.cards} thẻ, median của {args.runs} lần\n")
+    print(f"{'format':<10}{'bytes':>12}{'gzip':>10}{'query+build':>14}{'serialize':>12}{'total':>10}   (ms)")
+    baseline = None
+    for name, (build, serialize) in variants(set_id).items():
+        build_ms, serialize_ms, payload = measure(build, serialize, args.runs)
+        total = build_ms + serialize_ms
+        baseline = baseline or (len(payload), total)
+        print(f"{name:<10}{len(payload):>12,}{len(gzip.compress(payload)):>10,}"
+              f"{build_ms:>14.1f}{serialize_ms:>12.1f}{total:>10.1f}"
+              f"   {len(payload) / baseline[0] * 100:.0f}% size, {total / baseline[1] * 100:.0f}% time")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("SLOW_QUERY_ENABLED", "false")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        main(args)
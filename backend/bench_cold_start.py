@@ -0,0 +1,93 @@
+"""
+Đo thời gian cold start của một worker: import app.main
+
+So sánh:
+- legacy:   công việc import app.main từng làm trước khi chuyển sang Alembic
+            (create_all, các probe schema của migrate_*, truy vấn admin + bcrypt hash)
+            rồi import app
+- current:  chỉ import app.main (schema do migrate.py lo lúc deploy)
+
+Mỗi lần đo chạy trong một process Python mới trên cùng một database đã migrate.
+
+Cách chạy:
+    python bench_cold_start.py
+    python bench_cold_start.py --runs 10
+    DATABASE_URL=postgresql://... python bench_cold_start.py   (đo với DB thật, ví dụ Render)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def legacy_startup():
+    """Replay the schema I/O the old import-time startup performed"""
+    from sqlalchemy import inspect
+    from app.database import engine, Base, SessionLocal
+    from app import models, auth
+
+    Base.metadata.create_all(bind=engine)
+    # migrate_add_avatar_url, migrate_add_status, migrate_create_reports_table,
+    # migrate_add_report_snapshot_fields, migrate_create_notifications_table
+    inspect(engine).get_columns("users")
+    inspect(engine).get_columns("flashcard_sets")
+    inspect(engine).get_table_names()
+    inspect(engine).get_columns("reports")
+    inspect(engine).get_table_names()
+    # create_default_admin: truy vấn admin; DB mới còn phải hash mật khẩu bằng bcrypt
+    db = SessionLocal()
+    try:
+        db.query(models.User).filter(models.User.username == "admin").first()
+    finally:
+        db.close()
+    auth.get_password_hash("admin123")
+
+def run_child(mode: str):
+    started = time.perf_counter()
+    if mode == "legacy":
+        legacy_startup()
+    import app.main  # noqa: F401
+    print(f"RESULT {time.perf_counter() - started}")
+
+def measure(mode: str, env: dict, cwd: str) -> float:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode],
+        env=env, capture_output=True, text=True, cwd=cwd,
+    )
+    line = next((l for l in output.stdout.splitlines() if l.startswith("RESULT ")), None)
+    if line is None:
+        raise RuntimeError(f"{mode} run failed:\n{output.stderr[-2000:]}")
+    return float(line[len("RESULT "):])
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "migrate.py")], env=env, cwd=tmp,
+                       check=True, capture_output=True)
+
+        results = {}
+        for mode in ("legacy", "current"):
+            timings = [measure(mode, env, tmp) for _ in range(args.runs)]
+            results[mode] = statistics.median(timings)
+
+    print(f"{'mode':>8} {'median (ms)':>12}")
+    for mode, seconds in results.items():
+        print(f"{mode:>8} {seconds * 1000:>12.1f}")
+    print(f"⏱️  Tiết kiệm mỗi cold start: {(results['legacy'] - results['current']) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", choices=["legacy", "current"], help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    if args.child:
+        run_child(args.child)
+    else:
+        main(args)
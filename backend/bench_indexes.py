@@ -0,0 +1,203 @@
+"""
+Benchmark index (migration 0008): seed dữ liệu lớn rồi đo các endpoint trước/sau khi có index
+
+Các bước:
+1. Tạo database SQLite tạm (hoặc dùng DATABASE_URL), migrate tới head
+2. Seed bằng bulk insert: users, bộ thẻ (public/private, pending/approved),
+   thẻ, study records, study sessions, notifications, reports
+3. Bỏ các index của migration 0008 -> đo từng endpoint (median)
+4. Tạo lại các index đó -> đo lại, in bảng so sánh
+
+Cách chạy:
+    python bench_indexes.py
+    python bench_indexes.py --users 2000 --sets 20000 --cards-per-set 30 --runs 7
+    DATABASE_URL=postgresql+psycopg2://... python bench_indexes.py   (DB trống dành riêng cho benchmark)
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def seed(args):
+    """Bulk-insert a realistic data set. Returns ids used by the endpoint calls"""
+    from sqlalchemy import insert, select
+    from app import models
+    from app.database import engine
+
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    hashed = "$2b$12$" + "x" * 53  # Không đăng nhập bằng mật khẩu, token tạo trực tiếp
+
+    with engine.begin() as conn:
+        admin_id = conn.execute(select(models.User.id).where(models.User.username == "admin")).scalar()
+        conn.execute(insert(models.User), [
+            {"username": f"bench_{i}", "email": f"bench_{i}@example.com", "hashed_password": hashed,
+             "is_active": True, "is_admin": False}
+            for i in range(args.users)
+        ])
+        user_ids = conn.execute(select(models.User.id).where(models.User.username.like("bench_%"))).scalars().all()
+
+        conn.execute(insert(models.FlashcardSet), [
+            {"title": f"Set {i}", "description": "benchmark", "owner_id": rng.choice(user_ids),
+             "is_public": rng.random() < 0.6,
+             "status": rng.choices(["approved", "pending", "rejected"], [85, 10, 5])[0],
+             "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))}
+            for i in range(args.sets)
+        ])
+        set_ids = conn.execute(select(models.FlashcardSet.id)).scalars().all()
+
+        for start in range(0, len(set_ids), 1000):
+            conn.execute(insert(models.Flashcard), [
+                {"set_id": set_id, "front": f"front {j}", "back": f"back {j}"}
+                for set_id in set_ids[start:start + 1000] for j in range(args.cards_per_set)
+            ])
+
+        # Người dùng mẫu (sample) học nhiều bộ thẻ, các user khác học rải rác
+        sample_user = user_ids[0]
+        sample_set = conn.execute(
+            select(models.FlashcardSet.id).where(models.FlashcardSet.owner_id == sample_user)
+        ).scalar() or set_ids[0]
+        card_ids = conn.execute(select(models.Flashcard.id).order_by(models.Flashcard.id)).scalars().all()
+        records = [
+            {"flashcard_id": rng.choice(card_ids), "user_id": rng.choice(user_ids),
+             "next_review_date": now + timedelta(days=rng.randint(-10, 10)), "total_reviews": 1}
+            for _ in range(args.study_records)
+        ]
+        for start in range(0, len(records), 10000):
+            conn.execute(insert(models.StudyRecord), records[start:start + 10000])
+
+        conn.execute(insert(models.StudySession), [
+            {"user_id": rng.choice(user_ids), "set_id": rng.choice(set_ids), "cards_studied": 10,
+             "cards_correct": 7, "cards_incorrect": 3, "duration_minutes": 5,
+             "started_at": now - timedelta(days=rng.randint(0, 60)), "completed_at": now}
+            for _ in range(args.sessions)
+        ])
+        conn.execute(insert(models.Notification), [
+            {"user_id": rng.choice(user_ids), "type": "set_approved", "title": "Approved",
+             "message": "Bộ thẻ đã được duyệt", "read": rng.random() < 0.7,
+             "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))}
+            for _ in range(args.notifications)
+        ])
+        conn.execute(insert(models.Report), [
+            {"report_type": rng.choice(["deck", "card"]), "reported_item_id": rng.choice(set_ids),
+             "reporter_id": rng.choice(user_ids), "reason": "spam",
+             "status": rng.choices(["pending", "resolved", "rejected"], [10, 60, 30])[0],
+             "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))}
+            for _ in range(args.reports)
+        ])
+    return {"admin_id": admin_id, "sample_user": sample_user, "sample_set": sample_set}
+
+def endpoints(ids):
+    return [
+        ("GET", "/api/flashcards/sets", "user", None),
+        ("GET", "/api/flashcards/sets/my", "user", None),
+        ("GET", f"/api/flashcards/sets/{ids['sample_set']}/cards", "user", None),
+        ("GET", f"/api/study/sets/{ids['sample_set']}/due", "user", None),
+        ("GET", f"/api/study/progress/{ids['sample_set']}", "user", None),
+        ("GET", "/api/study/sessions", "user", None),
+        ("GET", "/api/notifications/user", "user", None),
+        ("GET", "/api/notifications/", "admin", None),
+        ("GET", "/api/reports/admin?status_filter=pending", "admin", None),
+        # Báo cáo trùng: chạy kiểm tra trùng (report_type, reported_item_id, status) rồi trả 400
+        ("POST", "/api/reports/", "user", {"report_type": "deck", "reported_item_id": ids["sample_set"], "reason": "spam"}),
+    ]
+
+def time_endpoints(client, headers, ids, runs: int) -> dict:
+    results = {}
+    for method, path, who, body in endpoints(ids):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = client.request(method, path, headers=headers[who], json=body)
+            timings.append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{method} {path}: HTTP {response.status_code} {response.text[:200]}")
+        results[f"{method} {path}"] = statistics.median(timings) * 1000
+    return results
+
+def set_hot_filter_indexes(enabled: bool):
+    """Drop or (re)create the indexes of migration 0008, leaving later migrations in place"""
+    import importlib.util
+    from sqlalchemy import Index, MetaData, Table, text
+    from app.database import engine
+
+    path = os.path.join(BACKEND_DIR, "migrations", "versions", "0008_hot_filter_indexes.py")
+    spec = importlib.util.spec_from_file_location("hot_filter_indexes", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    with engine.begin() as conn:
+        for name, table, columns, where in migration.INDEXES:
+            if not enabled:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                continue
+            db_table = Table(table, MetaData(), autoload_with=conn)
+            index = Index(name, *[db_table.c[column] for column in columns], sqlite_where=where, postgresql_where=where)
+            index.create(conn, checkfirst=True)
+
+def main(args):
+    import migrate
+
+    migrate.run_migrations()
+    migrate.create_default_admin()
+
+    started = time.perf_counter()
+    ids = seed(args)
+    print(f"🌱 Seed xong trong {time.perf_counter() - started:.1f}s")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app import auth
+    from app.database import SessionLocal
+    from app import models
+
+    db = SessionLocal()
+    sample_username = db.get(models.User, ids["sample_user"]).username
+    db.close()
+    headers = {
+        "user": {"Authorization": f"Bearer {auth.create_access_token({'sub': sample_username})}"},
+        "admin": {"Authorization": f"Bearer {auth.create_access_token({'sub': 'admin'})}"},
+    }
+    client = TestClient(app)
+    # Tạo báo cáo đầu tiên để các lần POST sau đi vào nhánh kiểm tra trùng
+    client.post("/api/reports/", headers=headers["user"], json=endpoints(ids)[-1][3])
+
+    set_hot_filter_indexes(False)
+    before = time_endpoints(client, headers, ids, args.runs)
+    set_hot_filter_indexes(True)
+    after = time_endpoints(client, headers, ids, args.runs)
+
+    print(f"\n{'endpoint':<60} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<60} {before[name]:>12.1f} {after[name]:>11.1f} {speedup:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--sets", type=int, default=10000)
+    parser.add_argument("--cards-per-set", type=int, default=20)
+    parser.add_argument("--study-records", type=int, default=200000)
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--notifications", type=int, default=100000)
+    parser.add_argument("--reports", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("SLOW_QUERY_ENABLED", "false")
+
+    if os.getenv("DATABASE_URL"):
+        main(args)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            os.chdir(tmp)
+            main(args)
+            os.chdir(BACKEND_DIR)
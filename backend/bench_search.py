@@ -0,0 +1,130 @@
+"""
+Benchmark tìm kiếm toàn văn (app/search.py, migration 0011)
+
+Các bước:
+1. Tạo database SQLite tạm (hoặc dùng DATABASE_URL), migrate tới head
+2. Seed bằng bulk insert: bộ thẻ (public/private, pending/approved) và thẻ với từ vựng
+   ngẫu nhiên (có từ hiếm và từ rất phổ biến) - index FTS được trigger cập nhật
+3. Đo search() cho các loại query (median, p95) với một user thường
+
+Cách chạy:
+    python bench_search.py                      (1 triệu thẻ)
+    python bench_search.py --cards 200000 --runs 30
+    DATABASE_URL=postgresql+psycopg2://... python bench_search.py   (DB trống dành riêng cho benchmark)
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SYLLABLES = ["ba", "ca", "da", "la", "ma", "na", "ta", "xa", "be", "ke", "le", "me", "bi", "ki", "li", "mi",
+             "bo", "co", "lo", "mo", "no", "to", "bu", "cu", "lu", "mu", "nu", "tu", "ra", "ri", "ro", "ru"]
+# Từ xuất hiện trong rất nhiều thẻ (trường hợp xấu cho xếp hạng)
+COMMON = ["tiếng", "anh", "việt", "nghĩa", "ví", "dụ"]
+
+def vocabulary(rng, size: int):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def seed(args):
+    """Bulk-insert sets and cards, returns (user id, vocabulary)"""
+    from sqlalchemy import insert, select
+    from app import models
+    from app.database import engine
+
+    rng = random.Random(45)
+    words = vocabulary(rng, 20000)
+    sets = max(1, args.cards // args.cards_per_set)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"username": f"bench_{i}", "email": f"bench_{i}@example.com", "hashed_password": "x"} for i in range(100)
+        ])
+        user_ids = list(conn.execute(select(models.User.id).where(models.User.username.like("bench_%"))).scalars())
+        conn.execute(insert(models.FlashcardSet), [
+            {
+                "title": " ".join(rng.sample(words, 3)), "description": " ".join(rng.sample(words, 6)),
+                "owner_id": rng.choice(user_ids), "is_public": rng.random() < 0.7,
+                "status": "approved" if rng.random() < 0.8 else "pending",
+            }
+            for _ in range(sets)
+        ])
+        set_ids = list(conn.execute(select(models.FlashcardSet.id)).scalars())
+
+    started = time.perf_counter()
+    batch = []
+    for i in range(args.cards):
+        front = rng.sample(words, rng.randint(1, 3))
+        back = rng.sample(words, rng.randint(3, 7)) + rng.sample(COMMON, 2)
+        batch.append({"set_id": set_ids[i % len(set_ids)], "front": " ".join(front), "back": " ".join(back),
+                      "position": i // len(set_ids) + 1})
+        if len(batch) == 10000 or i == args.cards - 1:
+            with engine.begin() as conn:
+                conn.execute(insert(models.Flashcard), batch)
+            batch = []
+    print(f"📦 Seed {sets} bộ thẻ, {args.cards} thẻ trong {time.perf_counter() - started:.0f}s (gồm cập nhật index)")
+    return user_ids[0], words
+
+def main(args):
+    import migrate
+    from app import models, search
+    from app.database import SessionLocal, engine
+
+    migrate.run_migrations()
+    user_id, words = seed(args)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE flashcards")
+            conn.exec_driver_sql("ANALYZE flashcard_sets")
+
+    rng = random.Random(7)
+    # Không dấu: khớp các từ có dấu trong COMMON (remove_diacritics)
+    common = ["tieng", "anh", "viet", "nghia", "vi", "du"]
+    queries = {
+        "một từ": lambda: rng.choice(words),
+        "hai từ": lambda: " ".join(rng.sample(words, 2)),
+        "tiền tố 3 ký tự": lambda: rng.choice(words)[:3],
+        "từ phổ biến": lambda: rng.choice(common),
+        "hai từ phổ biến": lambda: " ".join(rng.sample(common, 2)),
+        "không khớp": lambda: "zzzqqq",
+    }
+
+    with SessionLocal() as db:
+        user = db.get(models.User, user_id)
+        print(f"\n{'query':<20}{'median':>10}{'p95':>10}{'kết quả':>10}   (ms, sets + cards, limit 20)")
+        for name, make in queries.items():
+            times, hits = [], 0
+            for run in range(args.runs + 1):
+                q = make()
+                started = time.perf_counter()
+                result = search.search(db, q, user, 20)
+                elapsed = (time.perf_counter() - started) * 1000
+                if run:  # lần đầu để làm nóng cache
+                    times.append(elapsed)
+                    hits += len(result["sets"]) + len(result["cards"])
+            times.sort()
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            mark = "✅" if p95 < 50 else "⚠️ "
+            print(f"{name:<20}{statistics.median(times):>10.1f}{p95:>10.1f}{hits / args.runs:>10.1f}   {mark}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    parser.add_argument("--cards-per-set", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("SLOW_QUERY_ENABLED", "false")
+
+    if os.getenv("DATABASE_URL"):
+        main(args)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            main(args)
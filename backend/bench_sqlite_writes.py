@@ -0,0 +1,109 @@
+"""
+Benchmark ghi đồng thời trên SQLite: POST /api/study/answer từ nhiều process
+
+Mô phỏng uvicorn nhiều worker dùng chung một file SQLite. So sánh:
+- default: rollback journal + synchronous=FULL (SQLITE_TUNING=false)
+- tuned:   profile trong app/database.py (WAL, synchronous=NORMAL, busy_timeout, ...)
+
+In ra số answer/giây và số request lỗi (ví dụ "database is locked").
+
+Cách chạy:
+    python bench_sqlite_writes.py
+    python bench_sqlite_writes.py --workers 8 --answers 300
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app, raise_server_exceptions=False)
+
+def setup_data(workers: int, cards: int) -> dict:
+    """Tạo bộ thẻ công khai (admin) và một user cho mỗi worker"""
+    import migrate
+    migrate.run_migrations()
+    migrate.create_default_admin()
+    client = _client()
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    set_id = client.post("/api/flashcards/sets", json={"title": "bench", "is_public": True}, headers=headers).json()["id"]
+    card_ids = []
+    for i in range(cards):
+        card = client.post(f"/api/flashcards/sets/{set_id}/cards", json={"front": f"q{i}", "back": f"a{i}"}, headers=headers)
+        card_ids.append(card.json()["id"])
+    users = []
+    for i in range(workers):
+        username = f"bench_user_{i}"
+        client.post("/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "bench123"})
+        users.append(username)
+    return {"card_ids": card_ids, "users": users}
+
+def worker(username: str, card_ids: list, answers: int, start_event, queue):
+    client = _client()
+    token = client.post("/api/auth/login", json={"username": username, "password": "bench123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    start_event.wait()
+    errors = 0
+    started = time.perf_counter()
+    for i in range(answers):
+        response = client.post(
+            "/api/study/answer",
+            json={"flashcard_id": card_ids[i % len(card_ids)], "quality": 4},
+            headers=headers,
+        )
+        if response.status_code != 200:
+            errors += 1
+    queue.put((time.perf_counter() - started, errors))
+
+def run_mode(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["SQLITE_TUNING"] = "true" if mode == "tuned" else "false"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.chdir(tmp)
+
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(1) as pool:
+            data = pool.apply(setup_data, (args.workers, args.cards))
+
+        start_event = ctx.Event()
+        queue = ctx.Queue()
+        processes = [
+            ctx.Process(target=worker, args=(username, data["card_ids"], args.answers, start_event, queue))
+            for username in data["users"]
+        ]
+        for p in processes:
+            p.start()
+        time.sleep(3)  # Chờ các worker import app và đăng nhập
+        wall_start = time.perf_counter()
+        start_event.set()
+        results = [queue.get() for _ in processes]
+        wall = time.perf_counter() - wall_start
+        for p in processes:
+            p.join()
+        os.chdir(BACKEND_DIR)
+
+    total = args.workers * args.answers
+    errors = sum(e for _, e in results)
+    return {"mode": mode, "answers_per_sec": (total - errors) / wall, "errors": errors, "total": total}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--answers", type=int, default=200, help="answers per worker")
+    parser.add_argument("--cards", type=int, default=50)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+
+    print(f"{'mode':>8} {'answers/s':>10} {'errors':>8}")
+    for mode in ("default", "tuned"):
+        r = run_mode(mode, args)
+        print(f"{r['mode']:>8} {r['answers_per_sec']:>10.1f} {r['errors']:>8} / {r['total']}")
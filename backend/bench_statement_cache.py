@@ -0,0 +1,181 @@
+"""
+Micro-benchmark: CPU mỗi lần chạy các query nóng (auth, set, study, leaderboard)
+
+So sánh các cách viết cùng một query, chạy qua Session như trong router:
+- legacy:    db.query(...).filter(...) dựng lại mỗi lần (code trước đây)
+- select:    select(...).where(...) dựng lại mỗi lần, tính cache key mỗi lần
+- lambda:    lambda_stmt(lambda: select(...)), chỉ lấy bound value từ closure
+- prebuilt:  app/statements.py (select dựng sẵn với bindparam, cache key đã memoize)
+và thêm legacy với compiled cache tắt (query_cache_size=0) để thấy chi phí compile.
+
+Đo bằng time.process_time (CPU của process, gồm cả phần SQLite thực thi - như nhau
+cho mọi cách viết), in µs/lần cho từng query và tổng cho request GET /api/study/sets/{id}/due.
+
+Cách chạy:
+    python bench_statement_cache.py
+    python bench_statement_cache.py --iterations 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def seed():
+    """One user with a set of 20 cards, half of them already studied"""
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    user = models.User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db_set = models.FlashcardSet(title="Bench", owner_id=user.id, is_public=True, status="approved")
+    db.add(db_set)
+    db.flush()
+    cards = [models.Flashcard(set_id=db_set.id, front=f"front {i}", back=f"back {i}") for i in range(20)]
+    db.add_all(cards)
+    db.flush()
+    db.add_all([models.StudyRecord(flashcard_id=card.id, user_id=user.id) for card in cards[:10]])
+    db.add(models.Leaderboard(user_id=user.id, points=100))
+    db.commit()
+    ids = {"username": user.username, "user_id": user.id, "set_id": db_set.id, "card_id": cards[0].id}
+    db.close()
+    return ids
+
+def variants(ids):
+    """{query name: {variant: callable(db)}}"""
+    from datetime import datetime, timezone
+    from sqlalchemy import func, lambda_stmt, select
+    from sqlalchemy.orm import joinedload
+    from app import models, statements
+    from app.spaced_repetition import due_cards_statement
+
+    username, user_id, set_id, card_id = ids["username"], ids["user_id"], ids["set_id"], ids["card_id"]
+    User, FlashcardSet, Flashcard, StudyRecord, Leaderboard = (
+        models.User, models.FlashcardSet, models.Flashcard, models.StudyRecord, models.Leaderboard
+    )
+    # `func` trong closure làm lambda_stmt đệ quy vô hạn khi phân tích, dựng cột trước
+    rank_column = func.count(Leaderboard.id) + 1
+    return {
+        "user by username (auth)": {
+            "legacy": lambda db: db.query(User).filter(User.username == username).first(),
+            "select": lambda db: db.execute(select(User).where(User.username == username).limit(1)).scalars().first(),
+            "lambda": lambda db: db.execute(
+                lambda_stmt(lambda: select(User).where(User.username == username).limit(1))
+            ).scalars().first(),
+            "prebuilt": lambda db: db.execute(statements.USER_BY_USERNAME, {"username": username}).scalars().first(),
+        },
+        "set with owner": {
+            "legacy": lambda db: db.query(FlashcardSet).options(joinedload(FlashcardSet.owner))
+                .filter(FlashcardSet.id == set_id).first(),
+            "select": lambda db: db.execute(
+                select(FlashcardSet).options(joinedload(FlashcardSet.owner)).where(FlashcardSet.id == set_id)
+            ).scalars().first(),
+            "lambda": lambda db: db.execute(lambda_stmt(
+                lambda: select(FlashcardSet).options(joinedload(FlashcardSet.owner)).where(FlashcardSet.id == set_id)
+            )).scalars().first(),
+            "prebuilt": lambda db: db.execute(statements.SET_WITH_OWNER, {"set_id": set_id}).scalars().first(),
+        },
+        "due queue": {
+            "legacy": lambda db: db.execute(due_cards_statement(user_id, set_id)).scalars().all(),
+            "select": lambda db: db.execute(due_cards_statement(user_id, set_id)).scalars().all(),
+            # lambda_stmt không gọi được hàm dựng statement bên trong lambda (giá trị bị "đóng băng")
+            "lambda": None,
+            "prebuilt": lambda db: db.execute(
+                statements.DUE_CARDS, {"user_id": user_id, "set_id": set_id, "now": datetime.now(timezone.utc)}
+            ).scalars().all(),
+        },
+        "study records of set": {
+            "legacy": lambda db: db.query(StudyRecord).join(Flashcard)
+                .filter(Flashcard.set_id == set_id, StudyRecord.user_id == user_id).all(),
+            "select": lambda db: db.execute(
+                select(StudyRecord).join(Flashcard).where(Flashcard.set_id == set_id, StudyRecord.user_id == user_id)
+            ).scalars().all(),
+            "lambda": lambda db: db.execute(lambda_stmt(
+                lambda: select(StudyRecord).join(Flashcard)
+                .where(Flashcard.set_id == set_id, StudyRecord.user_id == user_id)
+            )).scalars().all(),
+            "prebuilt": lambda db: db.execute(
+                statements.STUDY_RECORDS_FOR_SET, {"user_id": user_id, "set_id": set_id}
+            ).scalars().all(),
+        },
+        "study record": {
+            "legacy": lambda db: db.query(StudyRecord).filter(
+                StudyRecord.flashcard_id == card_id, StudyRecord.user_id == user_id).first(),
+            "select": lambda db: db.execute(select(StudyRecord).where(
+                StudyRecord.flashcard_id == card_id, StudyRecord.user_id == user_id).limit(1)).scalars().first(),
+            "lambda": lambda db: db.execute(lambda_stmt(lambda: select(StudyRecord).where(
+                StudyRecord.flashcard_id == card_id, StudyRecord.user_id == user_id).limit(1))).scalars().first(),
+            "prebuilt": lambda db: db.execute(
+                statements.STUDY_RECORD, {"user_id": user_id, "flashcard_id": card_id}
+            ).scalars().first(),
+        },
+        "leaderboard rank": {
+            "legacy": lambda db: db.query(func.count(Leaderboard.id)).filter(Leaderboard.points > 50).scalar() + 1,
+            "select": lambda db: db.scalar(select(func.count(Leaderboard.id)).where(Leaderboard.points > 50)) + 1,
+            "lambda": lambda db: db.scalar(lambda_stmt(
+                lambda: select(rank_column).where(Leaderboard.points > 50)
+            )),
+            "prebuilt": lambda db: db.scalar(statements.LEADERBOARD_RANK, {"points": 50}),
+        },
+    }
+
+# Các query của GET /api/study/sets/{id}/due (auth + set + due queue + study records)
+DUE_REQUEST = ["user by username (auth)", "set with owner", "due queue", "study records of set"]
+
+def measure(session_factory, fn, iterations: int) -> float:
+    """CPU µs per call, one Session per call like a request"""
+    for _ in range(20):  # warm-up: compiled cache, lambda analysis
+        with session_factory() as db:
+            fn(db)
+    started = time.process_time()
+    for _ in range(iterations):
+        with session_factory() as db:
+            fn(db)
+    return (time.process_time() - started) / iterations * 1e6
+
+def main(args):
+    import migrate
+    from sqlalchemy.orm import sessionmaker
+    from app.database import SessionLocal, create_db_engine
+
+    migrate.run_migrations()
+    ids = seed()
+
+    import app.database as database
+    database.SQL_COMPILED_CACHE_SIZE = 0
+    uncached_engine = create_db_engine(os.environ["DATABASE_URL"])
+    Uncached = sessionmaker(bind=uncached_engine)
+
+    columns = ["no cache", "legacy", "select", "lambda", "prebuilt"]
+    print(f"{'query':<26}" + "".join(f"{column:>10}" for column in columns) + f"{'saved':>8}   (µs CPU/lần)")
+    totals = dict.fromkeys(columns, 0.0)
+    for name, fns in variants(ids).items():
+        row = {"no cache": measure(Uncached, fns["legacy"], args.iterations)}
+        for variant in columns[1:]:
+            row[variant] = measure(SessionLocal, fns[variant], args.iterations) if fns[variant] else None
+        if name in DUE_REQUEST:
+            for variant, value in row.items():
+                totals[variant] += value if value is not None else row["select"]
+        saved = (1 - row["prebuilt"] / row["legacy"]) * 100
+        cells = "".join(f"{row[column]:>10.0f}" if row[column] is not None else f"{'-':>10}" for column in columns)
+        print(f"{name:<26}{cells}{saved:>7.0f}%")
+
+    saved = totals["legacy"] - totals["prebuilt"]
+    print(f"\nGET /api/study/sets/{{id}}/due ({len(DUE_REQUEST)} query): legacy {totals['legacy']:.0f} µs -> "
+          f"prebuilt {totals['prebuilt']:.0f} µs CPU, tiết kiệm {saved:.0f} µs/request "
+          f"({saved / totals['legacy'] * 100:.0f}%); không có compiled cache: {totals['no cache']:.0f} µs")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("SLOW_QUERY_ENABLED", "false")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        main(args)
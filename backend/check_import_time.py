@@ -0,0 +1,76 @@
+"""
+Regression check cho thời gian import app.main (python -X importtime)
+
+Import app phải nhẹ: không I/O, không module nặng chỉ dùng lúc runtime
+(openai được import lazy trong app/routers/ai.py). Script này:
+- chạy `python -X importtime -c "import app.main"` nhiều lần trong process mới
+- lấy median thời gian cumulative của app.main
+- fail (exit 1) nếu vượt ngân sách hoặc một module bị cấm xuất hiện
+
+Cách chạy (CI hoặc trước khi merge):
+    python check_import_time.py
+    python check_import_time.py --budget-ms 800 --runs 7
+    IMPORT_TIME_BUDGET_MS=800 python check_import_time.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module chỉ được import khi thực sự dùng
+FORBIDDEN_MODULES = ["openai"]
+
+def parse_importtime(stderr: str) -> dict:
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        result[name] = (int(self_us), int(cumulative_us))
+    return result
+
+def measure_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if output.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{output.stderr[-2000:]}")
+    return parse_importtime(output.stderr)
+
+def main(args) -> int:
+    runs = [measure_once() for _ in range(args.runs)]
+    total_ms = statistics.median(r["app.main"][1] for r in runs) / 1000
+
+    # Top package theo self time (gộp theo package gốc)
+    by_package = defaultdict(int)
+    for name, (self_us, _) in runs[-1].items():
+        by_package[name.split(".")[0]] += self_us
+    print(f"{'package':>20} {'self (ms)':>10}")
+    for package, self_us in sorted(by_package.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"{package:>20} {self_us / 1000:>10.1f}")
+
+    failed = False
+    print(f"\n⏱️  import app.main: {total_ms:.0f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    if total_ms > args.budget_ms:
+        print("❌ Vượt ngân sách import time")
+        failed = True
+    for module in FORBIDDEN_MODULES:
+        if any(name == module or name.startswith(module + ".") for name in runs[-1]):
+            print(f"❌ Module '{module}' bị import lúc khởi động (cần import lazy)")
+            failed = True
+    if not failed:
+        print("✅ Import time OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,196 @@
+"""
+Purge check: xóa bộ thẻ / user không để lại dòng con nào (app/purge.py)
+
+Tạo database SQLite tạm (migrate.py) cho mỗi chế độ, seed một user có bộ thẻ,
+thẻ, study record, session, leaderboard, refresh token, thông báo và báo cáo,
+rồi xóa một bộ thẻ và user đó qua API:
+- hard: SOFT_DELETE_MIN_ROWS=0, xóa ngay bằng ON DELETE CASCADE
+- soft: SOFT_DELETE_MIN_ROWS=1, bộ thẻ / user phải bị ẩn trước khi purge
+  (purge được giữ lại rồi chạy bằng purge_deleted()) và hết dòng sau khi purge
+
+Fail (exit 1) nếu còn dòng con hoặc dòng soft-delete vẫn truy cập được.
+
+Cách chạy:
+    python check_purge.py
+    python check_purge.py --cards 500
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODES = {"hard": "0", "soft": "1"}
+
+class Checks:
+    def __init__(self):
+        self.total = 0
+        self.failed = 0
+
+    def check(self, label: str, ok: bool, detail=""):
+        self.total += 1
+        if not ok:
+            self.failed += 1
+        print(f"{'✅' if ok else '❌'} {label}{f' ({detail})' if detail and not ok else ''}")
+
+def login(client, username: str, password: str) -> dict:
+    token = client.post("/api/auth/login", json={"username": username, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def seed(client, admin_headers, cards: int):
+    """Owner with two studied public sets (also studied and reported by a reader). Returns (owner headers, set ids)"""
+    users = {}
+    for username in ("purge_owner", "purge_reader"):
+        client.post("/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "purge123"})
+        users[username] = login(client, username, "purge123")
+    set_ids = []
+    for i in range(2):
+        created = client.post(
+            "/api/flashcards/sets",
+            json={"title": f"purge set {i}", "is_public": True,
+                  "cards": [{"front": f"q{i} {j}", "back": f"a{j}"} for j in range(cards)]},
+            headers=users["purge_owner"]
+        ).json()
+        client.put(f"/api/admin/sets/{created['id']}/approve", headers=admin_headers)
+        set_ids.append(created["id"])
+        for headers in users.values():
+            client.post("/api/study/sessions", json={"set_id": created["id"]}, headers=headers)
+            for card in client.get(f"/api/study/sets/{created['id']}/due", headers=headers).json()[:5]:
+                client.post("/api/study/answer", json={"flashcard_id": card["id"], "quality": 4}, headers=headers)
+        client.post("/api/reports/", json={"report_type": "deck", "reported_item_id": created["id"], "reason": "spam"},
+                    headers=users["purge_reader"])
+    return users["purge_owner"], set_ids
+
+def remaining(set_ids=(), user_id=None) -> dict:
+    """Rows still referencing the sets / the user, per table"""
+    from sqlalchemy import func, or_, select
+    from app import models
+    from app.database import SessionLocal
+
+    card_ids = select(models.Flashcard.id).where(models.Flashcard.set_id.in_(set_ids))
+    queries = {
+        "flashcard_sets": select(models.FlashcardSet.id).where(models.FlashcardSet.id.in_(set_ids)),
+        "flashcards": card_ids,
+        "study_records": select(models.StudyRecord.id).where(models.StudyRecord.flashcard_id.in_(card_ids)),
+        "study_sessions": select(models.StudySession.id).where(models.StudySession.set_id.in_(set_ids)),
+    }
+    if user_id is not None:
+        queries.update({
+            "users": select(models.User.id).where(models.User.id == user_id),
+            "user study_records": select(models.StudyRecord.id).where(models.StudyRecord.user_id == user_id),
+            "user study_sessions": select(models.StudySession.id).where(models.StudySession.user_id == user_id),
+            "leaderboard": select(models.Leaderboard.id).where(models.Leaderboard.user_id == user_id),
+            "refresh_tokens": select(models.RefreshToken.id).where(models.RefreshToken.user_id == user_id),
+            "notifications": select(models.Notification.id).where(models.Notification.user_id == user_id),
+            "reports": select(models.Report.id).where(or_(
+                models.Report.reporter_id == user_id, models.Report.resolved_by == user_id,
+                models.Report.item_owner_id == user_id
+            )),
+        })
+    db = SessionLocal()
+    try:
+        counts = {table: db.scalar(select(func.count()).select_from(query.subquery())) for table, query in queries.items()}
+    finally:
+        db.close()
+    return {table: count for table, count in counts.items() if count}
+
+def foreign_key_violations() -> list:
+    from app.database import engine
+
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA foreign_key_check").fetchall()
+
+def run(args) -> int:
+    from fastapi.testclient import TestClient
+    from app import purge
+    from app.main import app
+    from app.models import User
+    from app.database import SessionLocal
+
+    soft = args.mode == "soft"
+    client = TestClient(app)
+    admin_headers = login(client, "admin", "admin123")
+    with contextlib.redirect_stdout(io.StringIO()):  # Bỏ log của các route khi seed
+        owner_headers, (first_set, second_set) = seed(client, admin_headers, args.cards)
+    db = SessionLocal()
+    owner_id = db.query(User.id).filter(User.username == "purge_owner").scalar()
+    db.close()
+
+    checks = Checks()
+    print(f"— {args.mode} (SOFT_DELETE_MIN_ROWS={purge.SOFT_DELETE_MIN_ROWS})")
+    deferred = []
+    if soft:
+        # Giữ purge lại để kiểm tra trạng thái giữa soft delete và purge
+        real_purge_set, real_purge_user = purge.purge_set, purge.purge_user
+        purge.purge_set = purge.purge_user = deferred.append
+
+    response = client.delete(f"/api/flashcards/sets/{first_set}", headers=owner_headers)
+    checks.check("DELETE set", response.status_code == 200, response.status_code)
+    if soft:
+        checks.check("set purge deferred", deferred == [first_set], deferred)
+        checks.check("set rows kept until purge", "flashcards" in remaining([first_set]))
+        card_id = client.get(f"/api/flashcards/sets/{second_set}/cards", headers=owner_headers).json()[0]["id"]
+        listed = [item["id"] for item in client.get("/api/flashcards/sets", headers=admin_headers).json()]
+        with contextlib.redirect_stdout(io.StringIO()):  # Log "not found" của các route
+            statuses = (
+                client.get(f"/api/flashcards/sets/{first_set}", headers=owner_headers).status_code,
+                client.get(f"/api/study/sets/{first_set}/due", headers=owner_headers).status_code,
+            )
+        checks.check("soft-deleted set hidden", statuses == (404, 404) and first_set not in listed, statuses)
+        checks.check("other set untouched", client.get(f"/api/flashcards/cards/{card_id}", headers=owner_headers).status_code == 200)
+    else:
+        left = remaining([first_set])
+        checks.check("set children deleted", not left, left)
+
+    response = client.delete(f"/api/admin/users/{owner_id}", headers=admin_headers)
+    checks.check("DELETE user", response.status_code == 200, response.status_code)
+    if soft:
+        checks.check("user purge deferred", deferred[1:] == [owner_id], deferred)
+        checks.check("user rows kept until purge", "flashcards" in remaining([second_set], owner_id))
+        leaderboard = [entry["username"] for entry in client.get("/api/leaderboard/?limit=100").json()]
+        with contextlib.redirect_stdout(io.StringIO()):
+            statuses = (
+                client.get(f"/api/admin/users/{owner_id}", headers=admin_headers).status_code,
+                client.post("/api/auth/login", json={"username": "purge_owner", "password": "purge123"}).status_code,
+                client.get(f"/api/flashcards/sets/{second_set}", headers=admin_headers).status_code,
+            )
+        checks.check("soft-deleted user hidden", statuses == (404, 401, 404) and "purge_owner" not in leaderboard, statuses)
+        purge.purge_set, purge.purge_user = real_purge_set, real_purge_user
+        with contextlib.redirect_stdout(io.StringIO()):
+            purged = purge.purge_deleted()
+        # Bộ thẻ đầu tiên thuộc user đã soft-delete: purge_user xóa luôn
+        checks.check("purge_deleted() finished the pending purge", purged == 1, purged)
+
+    left = remaining([first_set, second_set], owner_id)
+    checks.check("no rows left for the sets and the user", not left, left)
+    violations = foreign_key_violations()
+    checks.check("PRAGMA foreign_key_check", not violations, violations)
+    print(f"{checks.total - checks.failed}/{checks.total} kiểm tra đạt")
+    return 1 if checks.failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--cards", type=int, default=20)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    if args.mode:
+        sys.exit(run(args))
+
+    failed = 0
+    for mode, min_rows in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'purge.db')}"
+            env["RATE_LIMIT_ENABLED"] = "false"
+            env["SOFT_DELETE_MIN_ROWS"] = min_rows
+            env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+            subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "migrate.py")], env=env, cwd=tmp,
+                           check=True, capture_output=True)
+            cmd = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--cards", str(args.cards)]
+            failed += subprocess.run(cmd, env=env, cwd=tmp).returncode != 0
+    sys.exit(1 if failed else 0)
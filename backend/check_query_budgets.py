@@ -0,0 +1,117 @@
+"""
+Query budget check: số câu SQL mỗi endpoint không được tăng theo số dòng dữ liệu
+
+Tạo database SQLite tạm (migrate.py), seed dữ liệu (nhiều user, bộ thẻ, thẻ,
+study record, báo cáo, thông báo) rồi gọi từng endpoint trong
+assert_max_queries(). Fail (exit 1) nếu một endpoint vượt ngân sách hoặc
+có statement lặp lại >= N_PLUS_ONE lần (dấu hiệu N+1).
+
+Khi thêm endpoint mới hoặc sửa query, cập nhật BUDGETS bên dưới.
+
+Cách chạy:
+    python check_query_budgets.py
+    python check_query_budgets.py --users 50 --cards 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (path, max queries) - {set_id} được thay bằng bộ thẻ mẫu
+BUDGETS = [
+    ("/api/auth/me", 2),
+    ("/api/flashcards/sets", 5),  # +1 khi catalog public chưa có trong cache (app/catalog.py)
+    ("/api/flashcards/sets/my", 4),
+    ("/api/flashcards/sets/{set_id}", 5),
+    ("/api/flashcards/sets/{set_id}/cards", 4),
+    ("/api/study/sets/{set_id}/due", 6),
+    ("/api/study/progress/{set_id}", 10),
+    ("/api/study/sets/last-studied", 4),
+    ("/api/study/sessions", 3),
+    ("/api/leaderboard/", 3),
+    ("/api/leaderboard/my-rank", 4),
+    ("/api/notifications/user", 4),
+    ("/api/admin/users", 4),
+    ("/api/admin/sets", 4),
+    ("/api/reports/admin", 4),
+    ("/api/reports/admin/stats/summary", 8),
+]
+N_PLUS_ONE = 5
+
+def seed(client, admin_headers, users: int, cards: int) -> int:
+    """Create users with public sets, cards, study activity and reports. Returns a sample set id"""
+    set_id = None
+    for i in range(users):
+        username = f"budget_user_{i}"
+        client.post("/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "budget123"})
+        token = client.post("/api/auth/login", json={"username": username, "password": "budget123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        created = client.post("/api/flashcards/sets", json={"title": f"set {i}", "is_public": True}, headers=headers).json()
+        client.put(f"/api/admin/sets/{created['id']}/approve", headers=admin_headers)
+        client.post(
+            f"/api/flashcards/sets/{created['id']}/cards/bulk",
+            json={"cards": [{"front": f"q{j}", "back": f"a{j}"} for j in range(cards if i == 0 else 3)]},
+            headers=headers
+        )
+        if set_id is None:
+            set_id = created["id"]
+        # Học bộ thẻ mẫu + báo cáo nó
+        session = client.post("/api/study/sessions", json={"set_id": set_id}, headers=headers).json()
+        for card in client.get(f"/api/study/sets/{set_id}/due", headers=headers).json()[:5]:
+            client.post("/api/study/answer", json={"flashcard_id": card["id"], "quality": 4}, headers=headers)
+        client.put(f"/api/study/sessions/{session['id']}", json={"cards_studied": 5, "cards_correct": 4, "cards_incorrect": 1, "duration_minutes": 3}, headers=headers)
+        client.post("/api/reports/", json={"report_type": "deck", "reported_item_id": set_id, "reason": "spam"}, headers=headers)
+    return set_id
+
+def run(args) -> int:
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.query_counter import assert_max_queries
+
+    client = TestClient(app)
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    with contextlib.redirect_stdout(io.StringIO()):  # Bỏ log của các route khi seed
+        set_id = seed(client, headers, args.users, args.cards)
+        # Admin học bộ thẻ mẫu một lần để có study record
+        client.get(f"/api/study/sets/{set_id}/due", headers=headers)
+
+    failed = 0
+    print(f"{'endpoint':<45} {'queries':>8} {'budget':>7}")
+    for path, budget in BUDGETS:
+        url = path.format(set_id=set_id)
+        try:
+            with assert_max_queries(budget, n_plus_one_threshold=N_PLUS_ONE) as stats:
+                response = client.get(url, headers=headers)
+            status = "✅" if response.status_code == 200 else f"⚠️  HTTP {response.status_code}"
+            print(f"{url:<45} {stats.count:>8} {budget:>7} {status}")
+        except AssertionError as e:
+            failed += 1
+            print(f"{url:<45} {'':>8} {budget:>7} ❌ {e}")
+    print(f"\n{len(BUDGETS) - failed}/{len(BUDGETS)} endpoint trong ngân sách")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=50)
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+    if args.child:
+        sys.exit(run(args))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'budget.db')}"
+        env["RATE_LIMIT_ENABLED"] = "false"
+        env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "migrate.py")], env=env, cwd=tmp,
+                       check=True, capture_output=True)
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", "--users", str(args.users), "--cards", str(args.cards)]
+        sys.exit(subprocess.run(cmd, env=env, cwd=tmp).returncode)
@@ -0,0 +1,66 @@
+"""
+Deploy step: áp dụng các migration Alembic và tạo tài khoản admin mặc định
+
+Chạy một lần trước khi khởi động server (xem render.yaml / run.py), thay cho
+create_all + các hàm migrate_* từng chạy mỗi lần import app.main:
+
+    python migrate.py
+
+Phiên bản schema hiện tại được lưu trong bảng alembic_version.
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def run_migrations(revision: str = "head"):
+    """Upgrade the database to `revision` (default: latest)"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(config, revision)
+    print(f"✅ Database đã được migrate tới {revision}")
+
+def create_default_admin():
+    """Tạo tài khoản admin mặc định nếu chưa có"""
+    from app.database import SessionLocal
+    from app import models, auth
+
+    db = SessionLocal()
+    try:
+        # Kiểm tra xem đã có admin chưa
+        admin = db.query(models.User).filter(models.User.username == "admin").first()
+        if not admin:
+            # Tạo admin
+            admin_password = "admin123"
+            hashed_password = auth.get_password_hash(admin_password)
+            admin_user = models.User(
+                username="admin",
+                email="admin@example.com",
+                hashed_password=hashed_password,
+                is_active=True,
+                is_admin=True
+            )
+            db.add(admin_user)
+            db.flush()
+
+            # Tạo leaderboard entry cho admin
+            admin_leaderboard = models.Leaderboard(user_id=admin_user.id)
+            db.add(admin_leaderboard)
+
+            db.commit()
+            print("✅ Đã tạo tài khoản admin mặc định (username: admin, password: admin123)")
+        else:
+            print("ℹ️  Tài khoản admin đã tồn tại")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Lỗi khi tạo admin: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.path.insert(0, BACKEND_DIR)
+    run_migrations(sys.argv[1] if len(sys.argv) > 1 else "head")
+    create_default_admin()
@@ -0,0 +1,50 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import engine, Base
+from app import models  # noqa: F401 - đăng ký các model vào Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """Generate SQL without a database connection (alembic upgrade head --sql)"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations using the app engine (same DATABASE_URL and SQLite pragmas)"""
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # Batch mode tạo lại bảng (DROP + RENAME): với foreign_keys=ON, DROP bảng đang được
+            # tham chiếu sẽ lỗi. PRAGMA này chỉ có tác dụng ngoài transaction.
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite không hỗ trợ đầy đủ ALTER TABLE -> batch mode
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+        if connection.dialect.name == "sqlite":
+            # Không trả connection đã tắt foreign_keys về pool, connection mới sẽ áp lại pragma
+            connection.invalidate()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,18 @@
+"""
+Helpers cho các migration đầu tiên.
+
+Các database đã deploy trước khi có Alembic được tạo bởi create_all + các hàm
+migrate_* cũ trong main.py, nên schema có thể đã có một phần. Các migration
+0001-0007 kiểm tra trước khi tạo bảng/cột để chạy được trên cả DB mới lẫn DB cũ.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+def has_table(name: str) -> bool:
+    return name in sa.inspect(op.get_bind()).get_table_names()
+
+def has_column(table: str, column: str) -> bool:
+    return column in [col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)]
+
+def has_index(table: str, name: str) -> bool:
+    return name in [index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)]
@@ -0,0 +1,111 @@
+"""initial schema (users, sets, cards, study, leaderboard)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('hashed_password', sa.String(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('is_admin', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if not has_table('flashcard_sets'):
+        op.create_table(
+            'flashcard_sets',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('title', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('is_public', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_flashcard_sets_id', 'flashcard_sets', ['id'])
+
+    if not has_table('flashcards'):
+        op.create_table(
+            'flashcards',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('set_id', sa.Integer(), sa.ForeignKey('flashcard_sets.id'), nullable=False),
+            sa.Column('front', sa.Text(), nullable=False),
+            sa.Column('back', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_flashcards_id', 'flashcards', ['id'])
+
+    if not has_table('study_records'):
+        op.create_table(
+            'study_records',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('flashcard_id', sa.Integer(), sa.ForeignKey('flashcards.id'), nullable=False),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('ease_factor', sa.Float(), nullable=True),
+            sa.Column('interval', sa.Integer(), nullable=True),
+            sa.Column('repetitions', sa.Integer(), nullable=True),
+            sa.Column('next_review_date', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('last_reviewed', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('total_reviews', sa.Integer(), nullable=True),
+            sa.Column('correct_count', sa.Integer(), nullable=True),
+            sa.Column('incorrect_count', sa.Integer(), nullable=True),
+        )
+        op.create_index('ix_study_records_id', 'study_records', ['id'])
+
+    if not has_table('study_sessions'):
+        op.create_table(
+            'study_sessions',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('set_id', sa.Integer(), sa.ForeignKey('flashcard_sets.id'), nullable=False),
+            sa.Column('cards_studied', sa.Integer(), nullable=True),
+            sa.Column('cards_correct', sa.Integer(), nullable=True),
+            sa.Column('cards_incorrect', sa.Integer(), nullable=True),
+            sa.Column('duration_minutes', sa.Integer(), nullable=True),
+            sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_study_sessions_id', 'study_sessions', ['id'])
+
+    if not has_table('leaderboard'):
+        op.create_table(
+            'leaderboard',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, unique=True),
+            sa.Column('total_study_time', sa.Integer(), nullable=True),
+            sa.Column('total_cards_studied', sa.Integer(), nullable=True),
+            sa.Column('total_correct', sa.Integer(), nullable=True),
+            sa.Column('streak_days', sa.Integer(), nullable=True),
+            sa.Column('last_study_date', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('points', sa.Integer(), nullable=True),
+        )
+        op.create_index('ix_leaderboard_id', 'leaderboard', ['id'])
+
+
+def downgrade() -> None:
+    for table in ('leaderboard', 'study_sessions', 'study_records', 'flashcards', 'flashcard_sets', 'users'):
+        op.drop_table(table)
@@ -0,0 +1,29 @@
+"""add users.avatar_url
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:01:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('users', 'avatar_url'):
+        op.add_column('users', sa.Column('avatar_url', sa.String(255), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('avatar_url')
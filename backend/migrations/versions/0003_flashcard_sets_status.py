@@ -0,0 +1,31 @@
+"""add flashcard_sets.status (existing sets become approved)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:02:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('flashcard_sets', 'status'):
+        op.add_column('flashcard_sets', sa.Column('status', sa.String(20), server_default='pending', nullable=True))
+        # Bộ thẻ có từ trước khi có duyệt -> coi như đã duyệt
+        op.execute("UPDATE flashcard_sets SET status = 'approved'")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('flashcard_sets') as batch_op:
+        batch_op.drop_column('status')
@@ -0,0 +1,42 @@
+"""create reports table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:03:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('reports'):
+        op.create_table(
+            'reports',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('report_type', sa.String(20), nullable=False),
+            sa.Column('reported_item_id', sa.Integer(), nullable=False),
+            sa.Column('reporter_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('reason', sa.String(50), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('status', sa.String(20), server_default='pending', nullable=True),
+            sa.Column('admin_notes', sa.Text(), nullable=True),
+            sa.Column('resolved_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+            sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_reports_id', 'reports', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('reports')
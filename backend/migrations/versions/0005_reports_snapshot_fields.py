@@ -0,0 +1,39 @@
+"""add reports snapshot fields (item_title, item_owner_id, item_owner_username)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:04:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # batch: SQLite cần copy-and-move để thêm cột có foreign key
+    with op.batch_alter_table('reports') as batch_op:
+        if not has_column('reports', 'item_title'):
+            batch_op.add_column(sa.Column('item_title', sa.Text(), nullable=True))
+        if not has_column('reports', 'item_owner_id'):
+            batch_op.add_column(sa.Column('item_owner_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_reports_item_owner_id_users', 'users', ['item_owner_id'], ['id'])
+        if not has_column('reports', 'item_owner_username'):
+            batch_op.add_column(sa.Column('item_owner_username', sa.String(255), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.drop_constraint('fk_reports_item_owner_id_users', type_='foreignkey')
+        batch_op.drop_column('item_owner_username')
+        batch_op.drop_column('item_owner_id')
+        batch_op.drop_column('item_title')
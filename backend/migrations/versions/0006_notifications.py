@@ -0,0 +1,40 @@
+"""create notifications table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('notifications'):
+        op.create_table(
+            'notifications',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('type', sa.String(50), nullable=False),
+            sa.Column('title', sa.String(255), nullable=False),
+            sa.Column('message', sa.Text(), nullable=False),
+            sa.Column('item_id', sa.Integer(), nullable=True),
+            sa.Column('read', sa.Boolean(), server_default=sa.false(), nullable=True),
+            sa.Column('action_path', sa.String(255), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_notifications_id', 'notifications', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('notifications')
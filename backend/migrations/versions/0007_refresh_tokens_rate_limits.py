@@ -0,0 +1,49 @@
+"""create refresh_tokens and rate_limit_buckets tables
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 09:06:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('refresh_tokens'):
+        op.create_table(
+            'refresh_tokens',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('token_hash', sa.String(64), nullable=False),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('replaced_by_id', sa.Integer(), sa.ForeignKey('refresh_tokens.id'), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_refresh_tokens_id', 'refresh_tokens', ['id'])
+        op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+        op.create_index('ix_refresh_tokens_token_hash', 'refresh_tokens', ['token_hash'], unique=True)
+
+    if not has_table('rate_limit_buckets'):
+        op.create_table(
+            'rate_limit_buckets',
+            sa.Column('key', sa.String(), primary_key=True),
+            sa.Column('tokens', sa.Float(), nullable=False),
+            sa.Column('updated_at', sa.Float(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets')
+    op.drop_table('refresh_tokens')
@@ -0,0 +1,52 @@
+"""add indexes for hot filters (owner, public catalog, moderation queues, study, notifications)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status = 'pending'")
+
+# (name, table, columns, partial index condition)
+INDEXES = [
+    ('ix_flashcard_sets_owner_id', 'flashcard_sets', ['owner_id'], None),
+    ('ix_flashcard_sets_is_public_status', 'flashcard_sets', ['is_public', 'status'], None),
+    ('ix_flashcard_sets_pending_created_at', 'flashcard_sets', ['created_at'], PENDING),
+    ('ix_flashcards_set_id', 'flashcards', ['set_id'], None),
+    ('ix_study_records_user_id_flashcard_id', 'study_records', ['user_id', 'flashcard_id'], None),
+    ('ix_study_records_flashcard_id', 'study_records', ['flashcard_id'], None),
+    ('ix_study_sessions_user_id_started_at', 'study_sessions', ['user_id', 'started_at'], None),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at'], None),
+    ('ix_reports_status_created_at', 'reports', ['status', 'created_at'], None),
+    ('ix_reports_item_status', 'reports', ['report_type', 'reported_item_id', 'status'], None),
+    ('ix_reports_pending_created_at', 'reports', ['created_at'], PENDING),
+]
+
+
+def upgrade() -> None:
+    # PostgreSQL: CREATE INDEX CONCURRENTLY (không khóa ghi bảng) phải chạy ngoài transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=where,
+                sqlite_where=where,
+            )
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,33 @@
+"""add flashcards.position (card order inside a set, existing cards keep id order)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('flashcards', sa.Column('position', sa.Integer(), nullable=False, server_default='0'))
+    # Thứ tự hiện tại (theo id) thành 1..n trong từng bộ thẻ: row_number() một lượt,
+    # không đếm lại cả bộ cho từng thẻ (COUNT tương quan là O(n²) với bộ thẻ lớn)
+    op.execute(
+        "UPDATE flashcards SET position = ranked.rn FROM ("
+        "SELECT id, row_number() OVER (PARTITION BY set_id ORDER BY id) AS rn FROM flashcards"
+        ") AS ranked WHERE flashcards.id = ranked.id"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('flashcards') as batch_op:
+        batch_op.drop_column('position')
@@ -0,0 +1,29 @@
+"""add flashcard_sets.version and users.progress_version (ETag versions)
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('flashcard_sets', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('users', sa.Column('progress_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('progress_version')
+    with op.batch_alter_table('flashcard_sets') as batch_op:
+        batch_op.drop_column('version')
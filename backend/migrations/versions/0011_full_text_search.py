@@ -0,0 +1,94 @@
+"""full-text search over sets and cards (SQLite FTS5 / PostgreSQL tsvector + GIN)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 13:00:00
+
+SQLite: external-content FTS5 tables (flashcard_sets_fts, flashcards_fts) kept in
+sync by triggers. PostgreSQL: stored generated tsvector columns (search_vector)
+with GIN indexes. Both follow every write path, including bulk INSERT/UPDATE.
+Note: batch_alter_table on flashcards / flashcard_sets (SQLite) recreates the
+table and drops its triggers - create_sqlite_triggers() must be run again after it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (FTS table, content table, indexed columns)
+FTS_TABLES = [
+    ('flashcard_sets_fts', 'flashcard_sets', ['title', 'description']),
+    ('flashcards_fts', 'flashcards', ['front', 'back']),
+]
+
+# PostgreSQL: (table, tsvector expression). 'simple' - nội dung lẫn tiếng Việt và tiếng Anh, không stemming
+PG_VECTORS = [
+    ('flashcard_sets', "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+                       "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"),
+    ('flashcards', "setweight(to_tsvector('simple', coalesce(front, '')), 'A') || "
+                   "setweight(to_tsvector('simple', coalesce(back, '')), 'B')"),
+]
+
+
+def create_sqlite_triggers(fts: str, table: str, columns) -> None:
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    # Chỉ khi cột được index đổi (đổi position/status không đụng tới FTS)
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END"
+    )
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for fts, table, columns in FTS_TABLES:
+            # remove_diacritics 2: "tieng" khớp "tiếng"; prefix index cho tìm kiếm dạng "tie*"
+            op.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({', '.join(columns)}, "
+                f"content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            create_sqlite_triggers(fts, table, columns)
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for table, expression in PG_VECTORS:
+            op.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({expression}) STORED"
+            )
+        with op.get_context().autocommit_block():
+            for table, _ in PG_VECTORS:
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_vector "
+                    f"ON {table} USING gin (search_vector)"
+                )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for fts, _, _ in reversed(FTS_TABLES):
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+    elif dialect == 'postgresql':
+        for table, _ in reversed(PG_VECTORS):
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,73 @@
+"""add flashcards.content_hash + (set_id, content_hash) index (duplicate detection on import)
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 14:00:00
+
+content_hash = sha1 of the normalized front (app/dedup.py). Existing cards are
+backfilled in chunks; the normalization is copied here so this revision keeps
+producing the same hashes if app/dedup.py changes later.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK = 5000
+_SPACES = re.compile(r"\s+")
+
+
+def content_hash(front: str) -> str:
+    normalized = _SPACES.sub(" ", unicodedata.normalize("NFKC", front).casefold()).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('flashcards', sa.Column('content_hash', sa.String(40), nullable=True))
+
+    bind = op.get_bind()
+    flashcards = sa.table('flashcards', sa.column('id', sa.Integer), sa.column('front', sa.Text),
+                          sa.column('content_hash', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(flashcards.c.id, flashcards.c.front)
+            .where(flashcards.c.id > last_id)
+            .order_by(flashcards.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            flashcards.update().where(flashcards.c.id == sa.bindparam('card_id')),
+            [{"card_id": row.id, "content_hash": content_hash(row.front or "")} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_flashcards_set_id_content_hash', 'flashcards', ['set_id', 'content_hash'],
+                            postgresql_concurrently=True)
+    else:
+        op.create_index('ix_flashcards_set_id_content_hash', 'flashcards', ['set_id', 'content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_flashcards_set_id_content_hash', table_name='flashcards')
+    with op.batch_alter_table('flashcards') as batch_op:
+        batch_op.drop_column('content_hash')
+    if op.get_bind().dialect.name == 'sqlite':
+        # Batch tạo lại bảng flashcards trên SQLite nên mất các trigger FTS của 0011
+        fts = context.script.get_revision('0011').module
+        for fts_table, table, columns in fts.FTS_TABLES:
+            if table == 'flashcards':
+                fts.create_sqlite_triggers(fts_table, table, columns)
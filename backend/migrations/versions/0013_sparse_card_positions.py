@@ -0,0 +1,42 @@
+"""sparse card positions (multiples of 1024) + (set_id, position, id) index
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 15:00:00
+
+Positions 1, 2, 3 ... become 1024, 2048, 3072 ... (app/ordering.py), leaving
+room to move a card between two others by writing only that card. The index
+returns the cards of a set already in (position, id) order.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSITION_GAP = 1024
+
+
+def upgrade() -> None:
+    op.execute(f"UPDATE flashcards SET position = position * {POSITION_GAP}")
+    # PostgreSQL: CREATE INDEX CONCURRENTLY (không khóa ghi bảng) phải chạy ngoài transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_flashcards_set_id_position', 'flashcards', ['set_id', 'position', 'id'],
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_flashcards_set_id_position', table_name='flashcards')
+    # Về lại 1..n trong từng bộ thẻ, giữ thứ tự. Thứ hạng tính trước trong subquery FROM:
+    # subquery tương quan trong SET sẽ đọc cả các dòng vừa được UPDATE (SQLite)
+    op.execute(
+        "UPDATE flashcards SET position = ranked.rn FROM ("
+        "SELECT id, row_number() OVER (PARTITION BY set_id ORDER BY position, id) AS rn FROM flashcards"
+        ") AS ranked WHERE flashcards.id = ranked.id"
+    )
@@ -0,0 +1,96 @@
+"""ON DELETE CASCADE / SET NULL foreign keys + deleted_at (soft delete before a background purge)
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 16:00:00
+
+The database removes the children of a deleted set or user itself (app/purge.py),
+instead of SQLAlchemy loading and deleting them one by one. study_sessions.set_id
+gets an index: every set deletion now looks its sessions up by it.
+Constraint names are read from the database: they depend on how it was created
+(0005 names reports.item_owner_id's 'fk_reports_item_owner_id_users', databases
+from before Alembic have PostgreSQL's default {table}_{column}_fkey). On SQLite
+most are unnamed; the batch naming_convention gives the reflected ones that
+default name so they can be dropped, and the tables are recreated - which drops
+the FTS triggers of 0011, re-created at the end.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column, has_index
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+# table -> [(column, referred table, ondelete)]
+FOREIGN_KEYS = {
+    'flashcard_sets': [('owner_id', 'users', 'CASCADE')],
+    'flashcards': [('set_id', 'flashcard_sets', 'CASCADE')],
+    'study_records': [('flashcard_id', 'flashcards', 'CASCADE'), ('user_id', 'users', 'CASCADE')],
+    'study_sessions': [('user_id', 'users', 'CASCADE'), ('set_id', 'flashcard_sets', 'CASCADE')],
+    'leaderboard': [('user_id', 'users', 'CASCADE')],
+    'notifications': [('user_id', 'users', 'CASCADE')],
+    'refresh_tokens': [('user_id', 'users', 'CASCADE')],
+    # Báo cáo giữ snapshot item_title / item_owner_username khi user bị xóa
+    'reports': [('reporter_id', 'users', 'CASCADE'), ('resolved_by', 'users', 'SET NULL'),
+                ('item_owner_id', 'users', 'SET NULL')],
+}
+
+
+def foreign_key_names(table: str) -> dict:
+    """{column: name of its foreign key} as found in the database (SQLite: None when unnamed)"""
+    return {
+        fk['constrained_columns'][0]: fk['name']
+        for fk in sa.inspect(op.get_bind()).get_foreign_keys(table)
+        if len(fk['constrained_columns']) == 1
+    }
+
+
+def replace_foreign_keys(cascade: bool) -> None:
+    for table, keys in FOREIGN_KEYS.items():
+        existing = foreign_key_names(table)
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referred, ondelete in keys:
+                name = existing.get(column) or f"{table}_{column}_fkey"
+                if column in existing:
+                    batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete if cascade else None)
+
+
+def recreate_fts_triggers() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        fts = context.script.get_revision('0011').module
+        for fts_table, table, columns in fts.FTS_TABLES:
+            fts.create_sqlite_triggers(fts_table, table, columns)
+
+
+def upgrade() -> None:
+    # SQLite không chạy DDL trong transaction: lần chạy trước lỗi giữa chừng có thể đã thêm cột / index
+    for table in ('flashcard_sets', 'users'):
+        if not has_column(table, 'deleted_at'):
+            op.add_column(table, sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        # Bảng tạm của batch mode còn sót lại khi lần chạy trước lỗi giữa chừng
+        for table in FOREIGN_KEYS:
+            op.execute(f'DROP TABLE IF EXISTS _alembic_tmp_{table}')
+    replace_foreign_keys(cascade=True)
+    if not has_index('study_sessions', 'ix_study_sessions_set_id'):
+        op.create_index('ix_study_sessions_set_id', 'study_sessions', ['set_id'])
+    recreate_fts_triggers()
+
+
+def downgrade() -> None:
+    op.drop_index('ix_study_sessions_set_id', table_name='study_sessions')
+    replace_foreign_keys(cascade=False)
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('deleted_at')
+    with op.batch_alter_table('flashcard_sets') as batch_op:
+        batch_op.drop_column('deleted_at')
+    recreate_fts_triggers()
@@ -0,0 +1,44 @@
+"""partial indexes on deleted_at (soft-deleted users and sets waiting for purge)
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 18:00:00
+
+Only the few rows with deleted_at set are indexed: purge_deleted() and the
+admin users count find them without scanning the tables.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0015'
+down_revision: Union[str, None] = '0014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DELETED = sa.text("deleted_at IS NOT NULL")
+
+INDEXES = [
+    ('ix_users_deleted_at', 'users'),
+    ('ix_flashcard_sets_deleted_at', 'flashcard_sets'),
+]
+
+
+def upgrade() -> None:
+    # PostgreSQL: CREATE INDEX CONCURRENTLY (không khóa ghi bảng) phải chạy ngoài transaction
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, ['deleted_at'],
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=DELETED,
+                sqlite_where=DELETED,
+            )
+
+
+def downgrade() -> None:
+    for name, table in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,12 @@
+"""
+Xóa hẳn các bộ thẻ / user đã soft-delete (deleted_at) mà purge ở background
+chưa chạy xong, ví dụ do server khởi động lại giữa chừng (app/purge.py)
+
+Cách chạy:
+    python purge_deleted.py
+"""
+from app.purge import purge_deleted
+
+if __name__ == "__main__":
+    count = purge_deleted()
+    print(f"✅ Purged {count} soft-deleted sets/users" if count else "✅ Nothing to purge")
@@ -1,5 +1,7 @@
 import uvicorn
+import migrate
 
 if __name__ == "__main__":
+    migrate.run_migrations()
+    migrate.create_default_admin()
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
-
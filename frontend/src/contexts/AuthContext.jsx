@@ -29,6 +29,7 @@ export function AuthProvider({ children }) {
     } catch (error) {
       console.error('Failed to fetch user:', error)
       localStorage.removeItem('token')
+      localStorage.removeItem('refresh_token')
       localStorage.removeItem('username')
       delete api.defaults.headers.common['Authorization']
       setUser(null)
@@ -45,6 +46,9 @@ export function AuthProvider({ children }) {
     })
     const token = response.data.access_token
     localStorage.setItem('token', token)
+    if (response.data.refresh_token) {
+      localStorage.setItem('refresh_token', response.data.refresh_token)
+    }
     localStorage.setItem('username', username)
     api.defaults.headers.common['Authorization'] = `Bearer ${token}`
     
@@ -57,6 +61,7 @@ export function AuthProvider({ children }) {
       // If fetchUser fails, clean up and rethrow
       console.error('Failed to fetch user after login:', error)
       localStorage.removeItem('token')
+      localStorage.removeItem('refresh_token')
       localStorage.removeItem('username')
       delete api.defaults.headers.common['Authorization']
       throw error
@@ -79,7 +84,13 @@ export function AuthProvider({ children }) {
   }
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token')
+    if (refreshToken) {
+      // Revoke refresh token on server (không cần chờ kết quả)
+      api.post('/api/auth/logout', { refresh_token: refreshToken }).catch(() => {})
+    }
     localStorage.removeItem('token')
+    localStorage.removeItem('refresh_token')
     delete api.defaults.headers.common['Authorization']
     setUser(null)
   }
@@ -59,18 +59,13 @@ export default function CreateSet() {
     }
 
     try {
-      // Create the set
-      const setResponse = await api.post('/api/flashcards/sets', setData)
+      // Create the set and all its cards in one request (one transaction)
+      const setResponse = await api.post('/api/flashcards/sets', {
+        ...setData,
+        cards: validCards.map(card => ({ front: card.front, back: card.back }))
+      })
       const setId = setResponse.data.id
 
-      // Add all cards
-      for (const card of validCards) {
-        await api.post(`/api/flashcards/sets/${setId}/cards`, {
-          front: card.front,
-          back: card.back
-        })
-      }
-
       toast.success(`Đã tạo bộ thẻ với ${validCards.length} thẻ!`)
       // Check if user is admin
       const isAdmin = user?.is_admin || false
@@ -58,9 +58,11 @@ export default function Dashboard() {
       setStudyHistory(historyRes.data || [])
       setStudyActivity(activityRes.data || [])
       
-      // Fetch last studied dates for all sets
-      const lastStudiedRes = await api.get('/api/study/sets/last-studied').catch(() => ({ data: {} }))
-      const lastStudiedMap = lastStudiedRes.data || {}
+      // card_count và last_studied_at có sẵn trong danh sách bộ thẻ
+      const lastStudiedMap = {}
+      for (const set of setsRes.data) {
+        lastStudiedMap[set.id] = set.last_studied_at || null
+      }
       
       // Fetch progress for all sets
       const progressData = []
@@ -78,14 +80,9 @@ export default function Dashboard() {
 
       for (const set of setsRes.data) {
         try {
-          // Fetch progress and cards count in parallel
-          const [progressRes, cardsRes] = await Promise.all([
-            api.get(`/api/study/progress/${set.id}`).catch(() => null),
-            api.get(`/api/flashcards/sets/${set.id}/cards`).catch(() => ({ data: [] }))
-          ])
+          const progressRes = await api.get(`/api/study/progress/${set.id}`).catch(() => null)
           
-          // Get total cards from cards API (more accurate)
-          const total_cards_from_api = cardsRes.data?.length || 0
+          const total_cards_from_api = set.card_count || 0
           
           if (progressRes && progressRes.data) {
             const { total_cards, cards_mastered, cards_correct, cards_studied } = progressRes.data
@@ -127,36 +124,18 @@ export default function Dashboard() {
             })
           }
         } catch {
-          // Error fetching, try to get at least card count
-          try {
-            const cardsRes = await api.get(`/api/flashcards/sets/${set.id}/cards`).catch(() => ({ data: [] }))
-            const total_cards_from_api = cardsRes.data?.length || 0
-            // Get last studied date from study sessions, fallback to null if not studied
-            const lastStudiedDate = lastStudiedMap[set.id] || null
-            
-            progressData.push({
-              id: set.id,
-              name: set.title,
-              mastery: 0,
-              accuracy: 0,
-              cards_studied: 0,
-              total_cards: total_cards_from_api,
-              lastStudied: lastStudiedDate
-            })
-          } catch {
-            // Get last studied date from study sessions, fallback to null if not studied
-            const lastStudiedDate = lastStudiedMap[set.id] || null
-            
-            progressData.push({
-              id: set.id,
-              name: set.title,
-              mastery: 0,
-              accuracy: 0,
-              cards_studied: 0,
-              total_cards: 0,
-              lastStudied: lastStudiedDate
-            })
-          }
+          // Error fetching progress, still show card count from the set listing
+          const lastStudiedDate = lastStudiedMap[set.id] || null
+          
+          progressData.push({
+            id: set.id,
+            name: set.title,
+            mastery: 0,
+            accuracy: 0,
+            cards_studied: 0,
+            total_cards: set.card_count || 0,
+            lastStudied: lastStudiedDate
+          })
         }
       }
 
@@ -55,27 +55,13 @@ export default function SetManagement() {
       const response = await api.get('/api/admin/sets').catch(() => ({ data: [] }))
       const allSets = response.data || []
 
-      // Get card counts for each set
-      const setsWithCards = await Promise.all(
-        allSets.map(async (set) => {
-          try {
-            const cardsRes = await api.get(`/api/flashcards/sets/${set.id}/cards`).catch(() => ({ data: [] }))
-            return {
-              ...set,
-              card_count: cardsRes.data.length || 0,
-              creator: set.owner_username || 'Không xác định',
-              status: set.status || 'pending'
-            }
-          } catch {
-            return {
-              ...set,
-              card_count: 0,
-              creator: set.owner_username || 'Không xác định',
-              status: set.status || 'pending'
-            }
-          }
-        })
-      )
+      // card_count đã có trong response của /api/admin/sets
+      const setsWithCards = allSets.map((set) => ({
+        ...set,
+        card_count: set.card_count || 0,
+        creator: set.owner_username || 'Không xác định',
+        status: set.status || 'pending'
+      }))
 
       setSets(setsWithCards)
       
@@ -210,23 +210,12 @@ export default function Sets() {
   }, [user, authLoading, location.pathname, sets])
 
   useEffect(() => {
-    const fetchCardCounts = async () => {
-      const counts = {}
-      for (const set of sets) {
-        try {
-          const response = await api.get(`/api/flashcards/sets/${set.id}/cards`)
-          counts[set.id] = response.data.length
-        } catch {
-          counts[set.id] = 0
-        }
-      }
-      setCardCounts(counts)
-    }
-    if (sets.length > 0) {
-      fetchCardCounts()
-    } else {
-      setCardCounts({})
+    // card_count có sẵn trong danh sách bộ thẻ, không cần gọi /cards cho từng bộ
+    const counts = {}
+    for (const set of sets) {
+      counts[set.id] = set.card_count || 0
     }
+    setCardCounts(counts)
   }, [sets])
 
   useEffect(() => {
@@ -305,18 +294,6 @@ export default function Sets() {
       // Get only current user's sets (not public sets from others)
       const response = await api.get('/api/flashcards/sets')
       setSets(response.data || [])
-      
-      // Fetch card counts for all sets
-      const counts = {}
-      for (const set of response.data || []) {
-        try {
-          const cardsRes = await api.get(`/api/flashcards/sets/${set.id}/cards`).catch(() => ({ data: [] }))
-          counts[set.id] = cardsRes.data?.length || 0
-        } catch (err) {
-          counts[set.id] = 0
-        }
-      }
-      setCardCounts(counts)
     } catch (error) {
       console.error('Error fetching sets:', error)
       toast.error('Không thể tải danh sách bộ thẻ')
@@ -385,7 +362,7 @@ export default function Sets() {
             'Content-Type': 'multipart/form-data',
           },
         })
-        toast.success(`Đã nhập ${response.data.count} flashcard thành công!`)
+        toast.success(`Đã nhập ${response.data.count} flashcard thành công!${response.data.skipped ? ` (bỏ qua ${response.data.skipped} thẻ trùng)` : ''}`)
         
         // If created new set, navigate to it
         if (importToNewSet && response.data.set_id) {
@@ -410,7 +387,7 @@ export default function Sets() {
         }
         
         const response = await api.post('/api/ai/import', payload)
-        toast.success(`Đã nhập ${response.data.count} flashcard thành công!`)
+        toast.success(`Đã nhập ${response.data.count} flashcard thành công!${response.data.skipped ? ` (bỏ qua ${response.data.skipped} thẻ trùng)` : ''}`)
         
         // If created new set, navigate to it
         if (importToNewSet && response.data.set_id) {
@@ -461,16 +438,14 @@ export default function Sets() {
       const response = await api.post('/api/ai/generate', aiData)
       const flashcards = response.data.flashcards
       
-      const setResponse = await api.post('/api/flashcards/sets', {
+      // Tạo bộ thẻ cùng toàn bộ thẻ trong một request
+      await api.post('/api/flashcards/sets', {
         title: `AI Generated: ${aiData.topic}`,
         description: `Generated ${aiData.number_of_cards} flashcards about ${aiData.topic}`,
-        is_public: false
+        is_public: false,
+        cards: flashcards.map(card => ({ front: card.front, back: card.back }))
       })
       
-      for (const card of flashcards) {
-        await api.post(`/api/flashcards/sets/${setResponse.data.id}/cards`, card)
-      }
-      
       toast.success(`Đã tạo và thêm ${flashcards.length} flashcard!`)
       setShowAIModal(false)
       setAiData({ topic: '', number_of_cards: 10, difficulty: 'medium' })
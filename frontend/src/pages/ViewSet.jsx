@@ -111,7 +111,7 @@ export default function ViewSet() {
             'Content-Type': 'multipart/form-data',
           },
         })
-        toast.success(`Đã nhập ${response.data.count} flashcard thành công!`)
+        toast.success(`Đã nhập ${response.data.count} flashcard thành công!${response.data.skipped ? ` (bỏ qua ${response.data.skipped} thẻ trùng)` : ''}`)
       } else if (importMode === 'paste' && importFileContent) {
         // Paste content
         await api.post('/api/ai/import', {
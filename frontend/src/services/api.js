@@ -21,5 +21,52 @@ api.interceptors.request.use(
   }
 )
 
+// Refresh access token once when a request fails with 401
+// (access token sống ngắn, refresh token dùng để lấy token mới mà không phải đăng nhập lại)
+let refreshPromise = null
+
+const refreshAccessToken = async () => {
+  const refreshToken = localStorage.getItem('refresh_token')
+  if (!refreshToken) {
+    throw new Error('No refresh token')
+  }
+  const response = await axios.post(`${api.defaults.baseURL}/api/auth/refresh`, {
+    refresh_token: refreshToken,
+  })
+  const { access_token, refresh_token } = response.data
+  localStorage.setItem('token', access_token)
+  localStorage.setItem('refresh_token', refresh_token)
+  api.defaults.headers.common['Authorization'] = `Bearer ${access_token}`
+  return access_token
+}
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const originalRequest = error.config
+    const isAuthRequest = originalRequest?.url?.includes('/api/auth/login') ||
+      originalRequest?.url?.includes('/api/auth/refresh')
+    if (error.response?.status !== 401 || !originalRequest || originalRequest._retry || isAuthRequest) {
+      return Promise.reject(error)
+    }
+    originalRequest._retry = true
+    try {
+      // Share one refresh call between concurrent failing requests (token rotation)
+      if (!refreshPromise) {
+        refreshPromise = refreshAccessToken().finally(() => {
+          refreshPromise = null
+        })
+      }
+      const token = await refreshPromise
+      originalRequest.headers.Authorization = `Bearer ${token}`
+      return api(originalRequest)
+    } catch (refreshError) {
+      localStorage.removeItem('token')
+      localStorage.removeItem('refresh_token')
+      return Promise.reject(error)
+    }
+  }
+)
+
 export default api
 